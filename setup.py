@@ -9,12 +9,19 @@ setup(
     long_description=open("README.md", encoding="utf-8").read() if __import__("os").path.exists("README.md") else "",
     long_description_content_type="text/markdown",
     url="https://github.com/EcoCodeSolutions/TEO",
-    py_modules=["teo_cli"],
+    py_modules=["teo_cli", "teo_client", "teo_daemon"],
+    # the regulation stack teo_daemon runs; tgo_core is a namespace package (no __init__.py)
+    packages=["tgo_core", "tgo_core.adapters", "tgo_core.allocators", "tgo_core.routing",
+              "trinity_gpu", "trinity_gpu.tools", "loops"],
+    package_dir={"tgo_core": "src/TGO_Substrate/tgo_core", "trinity_gpu": "src/trinity_gpu", "loops": "src/loops"},
+    data_files=[("share/teo", ["src/TGO_Substrate/tgo_config.yaml"])],
     include_package_data=True,
     install_requires=[
         "psutil>=5.9.0",
         "click>=8.0.0",
         "py-cpuinfo>=9.0.0",
+        "pyyaml>=6.0",
+        "numpy>=1.23",
     ],
     entry_points={
         "console_scripts": [
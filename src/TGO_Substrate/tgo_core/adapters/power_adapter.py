@@ -1,8 +1,119 @@
-from typing import Dict, Any
+import glob, os, time
+from typing import Dict, Any, Optional
+
+class _Counter:
+    """One cumulative energy counter (µJ) exposed by powercap or hwmon."""
+    def __init__(self, label: str, kind: str, path: str, max_range_uj: Optional[int]):
+        self.label = label; self.kind = kind; self.path = path
+        self.max_range_uj = max_range_uj
+        self.last_uj: Optional[int] = None; self.last_ts = 0.0
+        self.watts: Optional[float] = None
+        self.energy_uj = 0   # µJ counted since the first update, wrap-around unrolled
+    def read_uj(self) -> Optional[int]:
+        try:
+            with open(self.path, "r") as f: return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+    def update(self, now: float) -> Optional[float]:
+        uj = self.read_uj()
+        if uj is None: return None
+        if self.last_uj is not None:
+            delta = uj - self.last_uj
+            if delta < 0:
+                # counter wrapped (powercap) or was reset (hwmon): on reset, re-baseline with no reading
+                delta = delta + self.max_range_uj if self.max_range_uj else None
+            if delta is not None: self.energy_uj += delta
+            if now > self.last_ts:
+                self.watts = (delta / 1e6) / (now - self.last_ts) if delta is not None else None
+        self.last_uj = uj; self.last_ts = now
+        return self.watts
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, "r") as f: return f.read().strip()
+    except OSError:
+        return None
+
+def _kind(name: str) -> str:
+    name = name.lower()
+    if name.startswith("package") or name.startswith("esocket"): return "package"
+    if name.startswith("dram"): return "dram"
+    if name.startswith("core") or name.startswith("ecore"): return "core"
+    return name
+
+def discover_counters(sysfs_root: str = "/sys") -> Dict[str, _Counter]:
+    """
+    Finds RAPL energy counters under `sysfs_root`:
+      class/powercap/intel-rapl:*  (Intel, and AMD on kernels >= 5.8)
+      class/powercap/amd-rapl:*
+      class/hwmon/*  with name == amd_energy
+    Unreadable counters (energy_uj is root-only on patched kernels) are skipped.
+    """
+    counters: Dict[str, _Counter] = {}
+    zones = []
+    for pat in ("intel-rapl:*", "amd-rapl:*"):
+        zones += glob.glob(os.path.join(sysfs_root, "class", "powercap", pat))
+    names = {os.path.basename(z): _read(os.path.join(z, "name")) or os.path.basename(z) for z in zones}
+    for z in sorted(zones):
+        zid = os.path.basename(z); name = names[zid]
+        parent = zid.rsplit(":", 1)[0]
+        label = f"{names[parent]}/{name}" if parent in names else name
+        rng = _read(os.path.join(z, "max_energy_range_uj"))
+        c = _Counter(label, _kind(name), os.path.join(z, "energy_uj"), int(rng) if rng and rng.isdigit() else None)
+        if c.read_uj() is not None and label not in counters:
+            counters[label] = c
+    if counters: return counters
+    for hw in sorted(glob.glob(os.path.join(sysfs_root, "class", "hwmon", "hwmon*"))):
+        if _read(os.path.join(hw, "name")) != "amd_energy": continue
+        for inp in sorted(glob.glob(os.path.join(hw, "energy*_input"))):
+            label = _read(inp.replace("_input", "_label")) or os.path.basename(inp)
+            # per-core counters would double count the socket counter
+            if _kind(label) != "package": continue
+            c = _Counter(label, "package", inp, None)
+            if c.read_uj() is not None: counters[label] = c
+    return counters
+
 class PowerAdapter:
-    def __init__(self, cfg: dict): self.cfg = cfg
-    def read_power(self) -> Dict[str, Any]:
-        return {'cpu_watts': None, 'dram_watts': None}
+    """
+    Reads CPU/DRAM watts from RAPL energy counters (delta energy / delta time
+    between calls, so the rate follows the caller's sampling period).
+    Without counters, falls back to a utilization model calibrated in cfg['power']:
+      P = idle_watts + (max_watts - idle_watts) * util**curve
+    """
+    def __init__(self, cfg: dict, sysfs_root: Optional[str] = None):
+        self.cfg = cfg
+        pcfg = (cfg or {}).get('power', {}) or {}
+        self.sysfs_root = sysfs_root or pcfg.get('sysfs_root', '/sys')
+        self.idle_watts = float(pcfg.get('idle_watts', 6.0))
+        self.max_watts = float(pcfg.get('max_watts', 28.0))
+        self.curve = float(pcfg.get('curve', 1.3))
+        self.model_dram_watts = pcfg.get('dram_watts')
+        self.counters = discover_counters(self.sysfs_root)
+        now = time.time()
+        for c in self.counters.values(): c.update(now)
+    @property
+    def source(self) -> str:
+        return 'rapl' if self.counters else 'model'
+    def model_watts(self, cpu_percent: Optional[float]) -> Optional[float]:
+        if cpu_percent is None: return None
+        u = min(1.0, max(0.0, cpu_percent / 100.0))
+        return self.idle_watts + (self.max_watts - self.idle_watts) * (u ** self.curve)
+    def read_power(self, cpu_percent: Optional[float] = None) -> Dict[str, Any]:
+        if not self.counters:
+            return {'cpu_watts': self.model_watts(cpu_percent), 'dram_watts': self.model_dram_watts,
+                    'power_source': 'model', 'domains': {}}
+        now = time.time()
+        domains = {label: c.update(now) for label, c in self.counters.items()}
+        def total(kind):
+            vals = [w for label, w in domains.items() if self.counters[label].kind == kind and w is not None]
+            return sum(vals) if vals else None
+        cpu = total('package')
+        if cpu is None: cpu = total('core')
+        if cpu is None:
+            # first call after start, or every counter became unreadable
+            cpu = self.model_watts(cpu_percent)
+            return {'cpu_watts': cpu, 'dram_watts': total('dram'), 'power_source': 'model', 'domains': domains}
+        return {'cpu_watts': cpu, 'dram_watts': total('dram'), 'power_source': 'rapl', 'domains': domains}
     def burst_limit(self, delta_watts: float, duration_ms: int) -> None:
         return
     def rollback(self) -> None:
@@ -20,10 +20,11 @@ class TokenAllocator:
 
     def forecast_to_token(self, task_id:str, importance:float, work_units:int,
                           unit_joules:float=0.00005, unit_ms:float=0.05,
-                          deadline_ms:float=0.0) -> EnergyToken:
+                          deadline_ms:float=0.0, now:float|None=None) -> EnergyToken:
         pj = max(1e-6, work_units * unit_joules)
         pm = max(self.min_quanta_ms, work_units * unit_ms)
-        return EnergyToken(task_id, float(importance), float(deadline_ms), float(pj), float(pm), time())
+        return EnergyToken(task_id, float(importance), float(deadline_ms), float(pj), float(pm),
+                           time() if now is None else now)
 
     def _priority(self, tok:EnergyToken, now:float) -> float:
         age_ms = (now - tok.created_ts) * 1000.0
@@ -43,6 +44,6 @@ class TokenAllocator:
         # light decay toward zero to avoid bias accumulation
         self.debt[tok.task_id] *= 0.9
 
-    def rank(self, tokens:list[EnergyToken]) -> list[EnergyToken]:
-        now = time()
+    def rank(self, tokens:list[EnergyToken], now:float|None=None) -> list[EnergyToken]:
+        now = time() if now is None else now
         return sorted(tokens, key=lambda t: self._priority(t, now), reverse=True)
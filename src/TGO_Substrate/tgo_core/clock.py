@@ -0,0 +1,17 @@
+import asyncio, time
+class SystemClock:
+    """Wall clock; sleep() really waits."""
+    def time(self) -> float:
+        return time.time()
+    async def sleep(self, s: float):
+        await asyncio.sleep(s)
+class VirtualClock:
+    """Simulated clock for replay: sleep() advances time instantly."""
+    def __init__(self, start: float = 0.0):
+        self.now = float(start)
+    def time(self) -> float:
+        return self.now
+    def advance(self, s: float):
+        self.now += max(0.0, s)
+    async def sleep(self, s: float):
+        self.advance(s)
@@ -0,0 +1,152 @@
+from typing import Dict, Any, List, Optional, Tuple
+
+# Online one-step-ahead load forecasters. Every model exposes
+#   update(y) -> None          feed the newest observation
+#   predict() -> float|None    forecast for the next frame (None until warmed up)
+# Loads are fractions in [0, 1].
+
+def _clip(v: float) -> float:
+    return min(1.0, max(0.0, v))
+
+class EWMAModel:
+    name = 'ewma'
+    def __init__(self, alpha: float = 0.3):
+        self.alpha = alpha; self.level: Optional[float] = None
+    def update(self, y: float):
+        self.level = y if self.level is None else self.level + self.alpha * (y - self.level)
+    def predict(self) -> Optional[float]:
+        return self.level
+
+class HoltModel:
+    """Holt's linear trend (double exponential smoothing)."""
+    name = 'holt'
+    def __init__(self, alpha: float = 0.5, beta: float = 0.2):
+        self.alpha = alpha; self.beta = beta
+        self.level: Optional[float] = None; self.trend = 0.0
+    def update(self, y: float):
+        if self.level is None:
+            self.level = y; return
+        prev = self.level
+        self.level = self.alpha * y + (1 - self.alpha) * (self.level + self.trend)
+        self.trend = self.beta * (self.level - prev) + (1 - self.beta) * self.trend
+    def predict(self) -> Optional[float]:
+        return None if self.level is None else _clip(self.level + self.trend)
+
+class ARModel:
+    """AR(p) with intercept, fitted online by recursive least squares with forgetting."""
+    name = 'ar'
+    def __init__(self, order: int = 3, forgetting: float = 0.98, delta: float = 100.0):
+        self.p = order; self.lam = forgetting
+        n = order + 1
+        self.theta = [0.0] * n
+        self.delta = delta
+        self._reset_P()
+        # forgetting inflates P by 1/lam per step along directions the data never
+        # excites (e.g. a channel stuck at 0); keep its trace at the initial level
+        self.max_trace = delta * n
+    def _reset_P(self):
+        n = self.p + 1
+        self.P = [[self.delta if i == j else 0.0 for j in range(n)] for i in range(n)]
+        self.hist: List[float] = []
+    def _x(self) -> List[float]:
+        return [1.0] + self.hist[::-1][:self.p]
+    def update(self, y: float):
+        if len(self.hist) >= self.p:
+            x = self._x()
+            Px = [sum(row[j] * x[j] for j in range(len(x))) for row in self.P]
+            xPx = sum(x[i] * Px[i] for i in range(len(x)))
+            if xPx < 1e-12: return self._push(y)   # x carries no new information
+            denom = self.lam + xPx
+            k = [v / denom for v in Px]
+            err = y - sum(t * xi for t, xi in zip(self.theta, x))
+            self.theta = [t + ki * err for t, ki in zip(self.theta, k)]
+            # P is symmetric, so x'P == (Px)'
+            n = len(x)
+            P = [[(self.P[i][j] - k[i] * Px[j]) / self.lam for j in range(n)] for i in range(n)]
+            self.P = [[(P[i][j] + P[j][i]) / 2 for j in range(n)] for i in range(n)]   # rounding drifts P off symmetry
+            diag = [self.P[i][i] for i in range(n)]
+            tr = sum(diag)
+            if not all(0.0 < d < float('inf') for d in diag):
+                self._reset_P()   # P lost positive definiteness; start its estimate over, keep theta
+            elif tr > self.max_trace:
+                self.P = [[v * self.max_trace / tr for v in row] for row in self.P]
+        self._push(y)
+    def _push(self, y: float):
+        self.hist.append(y)
+        if len(self.hist) > self.p: self.hist.pop(0)
+    def predict(self) -> Optional[float]:
+        if len(self.hist) < self.p: return None
+        return _clip(sum(t * xi for t, xi in zip(self.theta, self._x())))
+
+MODELS = {'ewma': EWMAModel, 'holt': HoltModel, 'ar': ARModel}
+
+def _build(name: str, cfg: dict):
+    if name == 'ewma': return EWMAModel(cfg.get('ewma_alpha', 0.3))
+    if name == 'holt': return HoltModel(cfg.get('holt_alpha', 0.5), cfg.get('holt_beta', 0.2))
+    if name == 'ar': return ARModel(cfg.get('ar_order', 3), cfg.get('ar_forgetting', 0.98))
+    return MODELS[name]()
+
+class ChannelForecaster:
+    """
+    Runs every model on one load channel, scores each by an EWMA of its absolute
+    one-step error and answers with the currently best model.
+    """
+    def __init__(self, models: list, error_alpha: float = 0.1, warmup: int = 8):
+        self.models = models; self.error_alpha = error_alpha; self.warmup = warmup
+        self.mae: Dict[str, Optional[float]] = {m.name: None for m in models}
+        self.pending: Dict[str, Optional[float]] = {m.name: None for m in models}
+        self.n = 0
+    def update(self, y: float):
+        for m in self.models:
+            pred = self.pending[m.name]
+            if pred is not None:
+                e = abs(y - pred); prev = self.mae[m.name]
+                self.mae[m.name] = e if prev is None else prev + self.error_alpha * (e - prev)
+            m.update(y)
+            self.pending[m.name] = m.predict()
+        self.n += 1
+    def best(self) -> Optional[str]:
+        scored = [(mae, name) for name, mae in self.mae.items() if mae is not None and self.pending[name] is not None]
+        if scored: return min(scored)[1]
+        ready = [name for name, p in self.pending.items() if p is not None]
+        return ready[0] if ready else None
+    def forecast(self) -> Tuple[Optional[float], float, Optional[str]]:
+        name = self.best()
+        if name is None: return None, 0.0, None
+        mae = self.mae[name] if self.mae[name] is not None else 0.5
+        # error of 0.5 load (or worse) means no confidence; ramp in during warmup
+        conf = _clip(1.0 - 2.0 * mae) * min(1.0, self.n / max(1, self.warmup))
+        return self.pending[name], conf, name
+
+class LoadForecaster:
+    """
+    Forecast stage for HoloframeScheduler. Derives per-channel load fractions
+    from telemetry samples and forecasts the next frame:
+      cpu <- cpu_percent, gpu <- gpu_util_percent (if reported),
+      io  <- disk MB/s normalised by forecast.io_full_mb_s
+    """
+    CHANNELS = ('cpu', 'gpu', 'io')
+    def __init__(self, cfg: dict):
+        self.cfg = (cfg or {}).get('forecast', {}) or {}
+        names = self.cfg.get('models', ['ewma', 'holt', 'ar'])
+        self.channels = {ch: ChannelForecaster([_build(n, self.cfg) for n in names],
+                                                self.cfg.get('error_alpha', 0.1), self.cfg.get('warmup', 8))
+                         for ch in self.CHANNELS}
+        self.io_full = float(self.cfg.get('io_full_mb_s', 200.0))
+        self._last_io = None
+    def _loads(self, sys: Dict[str, Any]) -> Dict[str, float]:
+        loads = {}
+        if sys.get('cpu_percent') is not None: loads['cpu'] = _clip(sys['cpu_percent'] / 100.0)
+        if sys.get('gpu_util_percent') is not None: loads['gpu'] = _clip(sys['gpu_util_percent'] / 100.0)
+        rd, wr, ts = sys.get('disk_read_mb'), sys.get('disk_write_mb'), sys.get('ts')
+        if rd is not None and wr is not None and ts is not None:
+            if self._last_io and ts > self._last_io[1]:
+                rate = (rd + wr - self._last_io[0]) / (ts - self._last_io[1])
+                loads['io'] = _clip(rate / self.io_full)
+            self._last_io = (rd + wr, ts)
+        return loads
+    def observe(self, sys: Dict[str, Any]):
+        for ch, y in self._loads(sys).items():
+            self.channels[ch].update(y)
+    def forecast(self) -> Dict[str, Tuple[Optional[float], float, Optional[str]]]:
+        return {ch: f.forecast() for ch, f in self.channels.items()}
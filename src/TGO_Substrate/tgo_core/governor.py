@@ -1,13 +1,18 @@
-import asyncio, time
 from typing import Dict, Any
+from .clock import SystemClock
 
 class ResonanceGovernor:
-    def __init__(self, cfg: dict, telemetry):
+    def __init__(self, cfg: dict, telemetry, clock=None):
         self.cfg = cfg; self.telemetry = telemetry
+        self.clock = clock or SystemClock()
         self.last_dp = 0.0; self.last_dt = 0.0; self.last_gain = 0.0
     def can_fire(self, frame, sys: Dict[str, Any]) -> bool:
         cpu = sys.get('cpu_percent', 50); free = sys.get('ram_free_mb', 0)
-        useful = cpu > self.cfg['thresholds']['cpu_busy_percent'] or frame.predicted_load.get('gpu',0) > 0.4
+        busy = self.cfg['thresholds']['cpu_busy_percent']
+        # fire ahead of a forecast spike, not only once it is visible in telemetry
+        min_conf = self.cfg.get('forecast', {}).get('min_confidence', 0.6)
+        spike = frame.predicted_load.get('cpu',0) * 100 > busy and frame.confidence.get('cpu',0) >= min_conf
+        useful = cpu > busy or spike or frame.predicted_load.get('gpu',0) > 0.4
         return bool(useful)
     def adaptive_cooldown(self) -> float:
         base = self.cfg['safety']['min_cooldown_s']
@@ -17,12 +22,12 @@ class ResonanceGovernor:
     async def fire_burst(self, cpu_budget: float, gpu_budget: float, io_budget: float):
         pre = self.telemetry.read_system()
         max_ms = self.cfg['bursts']['max_ms']
-        start = time.time()
+        start = self.clock.time()
         # SAFE placeholder 'burst' (NO-OP control)
-        await asyncio.sleep(min(max_ms/1000.0, 0.05))
+        await self.clock.sleep(min(max_ms/1000.0, 0.05))
         post = self.telemetry.read_system()
         self.last_dp = (post.get('cpu_percent',0) - pre.get('cpu_percent',0)) * 0.05
         self.last_dt = 0.0
         self.last_gain = (post.get('ram_free_mb',0) - pre.get('ram_free_mb',0)) - (post.get('cpu_percent',0) - pre.get('cpu_percent',0))
-        if (time.time() - start) * 1000.0 > max_ms:
+        if (self.clock.time() - start) * 1000.0 > max_ms:
             pass
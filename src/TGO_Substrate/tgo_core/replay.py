@@ -0,0 +1,183 @@
+import asyncio, csv, json, math, random, time
+from typing import Dict, Any, List, Optional
+from .clock import VirtualClock
+from .governor import ResonanceGovernor
+from .scheduler import HoloframeScheduler
+from .adapters.power_adapter import PowerAdapter
+from .allocators.token_allocator import TokenAllocator
+from .routing.energy_router import EnergyRouter
+
+# Deterministic replay: a telemetry trace (recorded, or synthesized from
+# configs/chaos_levels.json) drives HoloframeScheduler + ResonanceGovernor and
+# the token/router stack under a VirtualClock, so hours of behaviour replay in
+# seconds. Per tick the simulator also turns load into microtasks: arrivals
+# scale with cpu_percent, the allocator ranks the backlog, the router hands out
+# frame budgets, and a burst's granted cpu widens that frame's capacity (and its
+# power draw). The report scores J = Σ L + λ·P + β·Var(L) (docs/math/energy_objective.md)
+# with L = mean in-system latency of the frame's tasks (ms) and P from the
+# PowerAdapter utilization model (W).
+
+def load_trace(path: str) -> List[Dict[str, Any]]:
+    """Samples from NDJSON (one read_system() dict per line), a JSON list / {'samples': [...]}, or CSV."""
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        out = []
+        for r in rows:
+            s = {}
+            for k, v in r.items():
+                try: s[k] = float(v)
+                except (TypeError, ValueError): s[k] = v
+            out.append(s)
+        return out
+    with open(path, encoding='utf-8-sig') as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+        return data.get('samples', []) if isinstance(data, dict) else list(data)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+def chaos_trace(level: Dict[str, Any], tick_s: float = 0.25, base: float = 45.0,
+                period_s: float = 30.0) -> List[Dict[str, Any]]:
+    """Synthetic load from a chaos level (amp, noise, impulse_p, steps, seed): wave + noise + impulses."""
+    rng = random.Random(level.get('seed', 0))
+    amp, noise, imp_p = level.get('amp', 1.0), level.get('noise', 0.05), level.get('impulse_p', 0.0)
+    out, ram, disk = [], 8192.0, 0.0
+    for i in range(int(level.get('steps', 400))):
+        t = i * tick_s
+        cpu = base + 25.0 * amp * math.sin(2 * math.pi * t / period_s) + 100.0 * noise * rng.gauss(0, 1)
+        if rng.random() < imp_p: cpu += rng.uniform(25.0, 50.0)
+        cpu = min(100.0, max(0.0, cpu))
+        ram = min(16384.0, max(512.0, ram + rng.gauss(0, 40.0 * amp)))
+        disk += max(0.0, rng.gauss(5.0 * amp, 20.0 * noise)) * tick_s
+        out.append({'ts': t, 'cpu_percent': cpu, 'ram_free_mb': ram, 'ram_used_mb': 16384.0 - ram,
+                    'disk_read_mb': disk, 'disk_write_mb': disk * 0.5})
+    return out
+
+def record_trace(telemetry, seconds: float, tick_s: float, path: str) -> int:
+    """Sample live Telemetry into an NDJSON trace replayable with load_trace()."""
+    n, end = 0, time.time() + seconds
+    with open(path, 'w', encoding='utf-8') as f:
+        while time.time() < end:
+            s = {k: v for k, v in telemetry.read_system().items() if k != 'domains'}
+            f.write(json.dumps(s) + '\n'); n += 1
+            time.sleep(tick_s)
+    return n
+
+class TraceTelemetry:
+    """Telemetry stand-in: read_system() returns the trace sample for the clock's current time."""
+    def __init__(self, cfg: dict, trace: List[Dict[str, Any]], clock, dt_s: float):
+        self.cfg = cfg; self.trace = trace; self.clock = clock; self.dt_s = dt_s
+        self.t0 = clock.time(); self.sample = {}
+        self.power = PowerAdapter(cfg)
+    def index(self) -> int:
+        return int((self.clock.time() - self.t0) / self.dt_s + 1e-9)
+    def done(self) -> bool:
+        return self.index() >= len(self.trace)
+    def read_system(self) -> Dict[str, Any]:
+        s = dict(self.trace[min(self.index(), len(self.trace) - 1)])
+        s['ts'] = self.clock.time()
+        s.setdefault('cpu_percent', 50.0)
+        s['cpu_watts'] = self.power.model_watts(s['cpu_percent']); s['power_source'] = 'model'
+        self.sample = s
+        return s
+
+class _Welford:
+    def __init__(self): self.n = 0; self.mean = 0.0; self.m2 = 0.0
+    def add(self, x: float):
+        self.n += 1; d = x - self.mean; self.mean += d / self.n; self.m2 += d * (x - self.mean)
+    @property
+    def var(self) -> float: return self.m2 / self.n if self.n > 1 else 0.0
+
+class ReplaySimulator:
+    def __init__(self, cfg: dict, trace: List[Dict[str, Any]], allocator=None, router=None,
+                 dt_s: Optional[float] = None, seed: int = 0):
+        if not trace: raise ValueError('empty trace')
+        self.cfg = cfg; self.trace = trace
+        rcfg = cfg.get('replay', {}) or {}; ocfg = cfg.get('objective', {}) or {}
+        self.tick_s = cfg['loop']['tick_s']
+        self.dt_s = dt_s or rcfg.get('dt_s') or self.tick_s
+        self.tasks_per_tick = int(rcfg.get('tasks_per_tick', 20))
+        self.deadline_frac = float(rcfg.get('deadline_frac', 0.25))
+        self.lam = float(ocfg.get('lambda', 1.0)); self.beta = float(ocfg.get('beta', 0.01))
+        self.rng = random.Random(seed)
+        self.clock = VirtualClock()
+        self.telemetry = TraceTelemetry(cfg, trace, self.clock, self.dt_s)
+        self.governor = ResonanceGovernor(cfg, self.telemetry, clock=self.clock)
+        self.scheduler = HoloframeScheduler(cfg, self.telemetry, self.governor, clock=self.clock)
+        self.alloc = allocator or TokenAllocator()
+        self.router = router or EnergyRouter({'cpu': {}}, frame_ms=self.tick_s * 1000.0)
+        self.backlog = []; self.n_tasks = 0
+
+    def _serve(self, now: float, cpu_percent: float, burst_cpu: float) -> Dict[str, float]:
+        n = int(round(self.tasks_per_tick * cpu_percent / 100.0))
+        for _ in range(n):
+            ddl = self.rng.choice((20.0, 50.0, 100.0)) if self.rng.random() < self.deadline_frac else 0.0
+            tok = self.alloc.forecast_to_token(f'sim-{self.n_tasks}', self.rng.random(),
+                                               self.rng.randint(50, 600), deadline_ms=ddl)
+            tok.created_ts = now; self.n_tasks += 1
+            self.backlog.append(tok)
+        ranked = self.alloc.rank(self.backlog, now)
+        budgets = self.router.route(ranked)
+        # a burst's granted cpu fraction widens this frame's service capacity
+        cap = self.router.frame_ms * (1.0 + burst_cpu)
+        used: Dict[str, float] = {}; lat = []; served = set()
+        for b, tok in zip(budgets, ranked):
+            end = used.get(b.device, 0.0) + tok.predicted_ms
+            if end > cap: continue
+            used[b.device] = end; served.add(tok.task_id)
+            lat.append((now - tok.created_ts) * 1000.0 + end)
+        waiting = [t for t in self.backlog if t.task_id not in served]
+        lat.extend((now - t.created_ts) * 1000.0 + cap for t in waiting)
+        for t in ranked:
+            if t.task_id in served: self.alloc.settle(t, t.predicted_joules)
+        self.backlog = waiting
+        return {'latency_ms': sum(lat) / len(lat) if lat else 0.0, 'served': len(served), 'arrived': n}
+
+    async def _run(self) -> Dict[str, Any]:
+        power = self.telemetry.power
+        lat = _Welford(); sum_l = sum_p = sum_var = 0.0
+        bursts = frames = served = arrived = blocked = 0
+        granted = {'cpu': 0.0, 'gpu': 0.0, 'io': 0.0}; cooldowns = []
+        while not self.telemetry.done():
+            tick_start = self.clock.time()
+            was_cooling = (tick_start - self.scheduler.last_burst_ts) < self.scheduler.cooldown_s
+            out = await self.scheduler.step()
+            frames += 1; cooldowns.append(out['cooldown_s'])
+            if out['burst']:
+                bursts += 1
+                for k in granted: granted[k] += out['granted'][k]
+            elif was_cooling:
+                blocked += 1
+            cpu = out['sys'].get('cpu_percent', 50.0)
+            sim = self._serve(tick_start, cpu, out['granted']['cpu'])
+            served += sim['served']; arrived += sim['arrived']
+            p = power.model_watts(min(100.0, cpu * (1.0 + out['granted']['cpu'])))
+            lat.add(sim['latency_ms'])
+            sum_l += sim['latency_ms']; sum_p += p; sum_var += lat.var
+            # the burst already advanced the clock; sleep the rest of the tick
+            await self.clock.sleep(max(0.0, self.tick_s - (self.clock.time() - tick_start)))
+        j = sum_l + self.lam * sum_p + self.beta * sum_var
+        return {'frames': frames, 'sim_seconds': round(self.clock.time(), 3),
+                'bursts': bursts, 'burst_rate': round(bursts / frames, 4) if frames else 0.0,
+                'granted': {k: round(v, 4) for k, v in granted.items()},
+                'cooldown': {'mean_s': round(sum(cooldowns) / len(cooldowns), 4) if cooldowns else 0.0,
+                             'min_s': min(cooldowns, default=0.0), 'max_s': max(cooldowns, default=0.0),
+                             'blocked_frames': blocked},
+                'tasks': {'arrived': arrived, 'served': served, 'backlog_end': len(self.backlog)},
+                'latency_ms': {'mean': round(lat.mean, 3), 'var': round(lat.var, 3)},
+                'mean_watts': round(sum_p / frames, 3) if frames else 0.0,
+                'objective': {'J': round(j, 3), 'sum_L': round(sum_l, 3), 'sum_P': round(sum_p, 3),
+                              'sum_varL': round(sum_var, 3), 'lambda': self.lam, 'beta': self.beta}}
+
+    def run(self) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        report = asyncio.run(self._run())
+        wall = time.perf_counter() - t0
+        report['wall_seconds'] = round(wall, 3)
+        report['speedup'] = round(report['sim_seconds'] / wall, 1) if wall > 0 else None
+        return report
+
+def replay(cfg: dict, trace: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+    return ReplaySimulator(cfg, trace, **kwargs).run()
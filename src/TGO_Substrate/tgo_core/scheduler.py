@@ -1,38 +1,57 @@
-import asyncio, time
 from typing import Dict, Any
 from .tokens import HoloFrame, EnergyToken
+from .forecast import LoadForecaster
+from .clock import SystemClock
 
 class HoloframeScheduler:
-    def __init__(self, cfg: dict, telemetry, governor):
+    def __init__(self, cfg: dict, telemetry, governor, forecaster=None, clock=None):
         self.cfg = cfg; self.telemetry = telemetry; self.governor = governor
-        self.frame_id = 0; self.last_burst_ts = 0.0
+        self.forecaster = forecaster or LoadForecaster(cfg)
+        self.clock = clock or SystemClock()
+        self.frame_id = 0; self.last_burst_ts = float('-inf')
         self.cooldown_s = self.cfg['safety']['min_cooldown_s']
     async def run_forever(self):
         interval = self.cfg['loop']['tick_s']
         while True:
-            sys = self.telemetry.read_system()
-            frame = self._predict_next_frame(sys)
-            self._pre_allocate(frame)
-            await self._maybe_burst(frame, sys)
-            await asyncio.sleep(interval)
+            await self.step()
+            await self.clock.sleep(interval)
+    async def step(self) -> Dict[str, Any]:
+        """One tick: sample, predict, pre-allocate, maybe burst. Returns what happened."""
+        sys = self.telemetry.read_system()
+        frame = self._predict_next_frame(sys)
+        self._pre_allocate(frame)
+        granted = await self._maybe_burst(frame, sys)
+        return {'ts': self.clock.time(), 'frame': frame, 'sys': sys, 'cooldown_s': self.cooldown_s,
+                'burst': granted is not None, 'granted': granted or {'cpu': 0.0, 'gpu': 0.0, 'io': 0.0}}
     def _predict_next_frame(self, sys: Dict[str, Any]) -> HoloFrame:
         self.frame_id += 1
-        predicted = {'cpu': 0.3 if sys.get('cpu_percent', 50) <= 60 else 0.5,
-                     'gpu': 0.5 if sys.get('cpu_percent', 50) <= 60 else 0.3,
-                     'io': 0.2}
-        tokens = [EnergyToken('cpu', self.cfg['tokens']['cpu_budget'], self.cfg['tokens']['ttl_s']),
-                  EnergyToken('gpu', self.cfg['tokens']['gpu_budget'], self.cfg['tokens']['ttl_s']),
-                  EnergyToken('io',  self.cfg['tokens']['io_budget'],  self.cfg['tokens']['ttl_s'])]
-        return HoloFrame(self.frame_id, {'hint':'next-holoframe'}, predicted, {'cpu':0.0,'gpu':0.0,'io':0.0}, tokens)
+        self.forecaster.observe(sys)
+        fc = self.forecaster.forecast()
+        # static guess for channels without history (e.g. no GPU telemetry)
+        fallback = {'cpu': 0.3 if sys.get('cpu_percent', 50) <= 60 else 0.5,
+                    'gpu': 0.5 if sys.get('cpu_percent', 50) <= 60 else 0.3,
+                    'io': 0.2}
+        predicted = {k: (fc[k][0] if fc[k][0] is not None else v) for k, v in fallback.items()}
+        confidence = {k: fc[k][1] for k in fallback}
+        tk = self.cfg['tokens']; now = self.clock.time()
+        # confident high-load forecasts widen the budget, low-load ones shrink it (0.5x..1.5x)
+        scale = {k: 1.0 + confidence[k] * (predicted[k] - 0.5) for k in predicted}
+        tokens = [EnergyToken('cpu', tk['cpu_budget'] * scale['cpu'], tk['ttl_s'], created_at=now),
+                  EnergyToken('gpu', tk['gpu_budget'] * scale['gpu'], tk['ttl_s'], created_at=now),
+                  EnergyToken('io',  tk['io_budget'] * scale['io'],  tk['ttl_s'], created_at=now)]
+        context = {'hint': 'next-holoframe', 'models': {k: fc[k][2] for k in fc}}
+        return HoloFrame(self.frame_id, context, predicted, {'cpu':0.0,'gpu':0.0,'io':0.0}, tokens, confidence)
     def _pre_allocate(self, frame: HoloFrame):
-        _ = frame.allocate('cpu', 0.05); _ = frame.allocate('gpu', 0.05); _ = frame.allocate('io', 0.02)
+        now = self.clock.time()
+        _ = frame.allocate('cpu', 0.05, now); _ = frame.allocate('gpu', 0.05, now); _ = frame.allocate('io', 0.02, now)
     async def _maybe_burst(self, frame: HoloFrame, sys: Dict[str, Any]):
-        now = time.time()
+        now = self.clock.time()
         self.cooldown_s = self.governor.adaptive_cooldown()
-        if (now - self.last_burst_ts) < self.cooldown_s: return
-        if not self.governor.can_fire(frame, sys): return
-        granted_cpu = frame.allocate('cpu', self.cfg['bursts']['cpu_grant'])
-        granted_gpu = frame.allocate('gpu', self.cfg['bursts']['gpu_grant'])
-        granted_io  = frame.allocate('io',  self.cfg['bursts']['io_grant'])
+        if (now - self.last_burst_ts) < self.cooldown_s: return None
+        if not self.governor.can_fire(frame, sys): return None
+        granted_cpu = frame.allocate('cpu', self.cfg['bursts']['cpu_grant'], now)
+        granted_gpu = frame.allocate('gpu', self.cfg['bursts']['gpu_grant'], now)
+        granted_io  = frame.allocate('io',  self.cfg['bursts']['io_grant'], now)
         await self.governor.fire_burst(granted_cpu, granted_gpu, granted_io)
         self.last_burst_ts = now
+        return {'cpu': granted_cpu, 'gpu': granted_gpu, 'io': granted_io}
@@ -4,11 +4,13 @@ try:
     import psutil
 except Exception:
     psutil = None
+from .adapters.power_adapter import PowerAdapter
 
 class Telemetry:
     def __init__(self, cfg: dict):
         self.cfg = cfg
         self.sample = {}
+        self.power = PowerAdapter(cfg)
     def read_system(self) -> Dict[str, Any]:
         now = time.time()
         data = {'ts': now}
@@ -25,5 +27,6 @@ class Telemetry:
                 'disk_read_mb': getattr(disk, 'read_bytes', 0) / (1024*1024) if disk else None,
                 'disk_write_mb': getattr(disk, 'write_bytes', 0) / (1024*1024) if disk else None,
             })
+        data.update(self.power.read_power(data.get('cpu_percent')))
         self.sample = data
         return data
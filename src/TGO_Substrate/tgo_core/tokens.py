@@ -9,8 +9,9 @@ class EnergyToken:
     ttl: float
     meta: Dict[str, Any] = field(default_factory=dict)
     created_at: float = field(default_factory=time.time)
-    def alive(self) -> bool:
-        return (time.time() - self.created_at) < self.ttl and self.budget > 0
+    def alive(self, now: float = None) -> bool:
+        now = time.time() if now is None else now
+        return (now - self.created_at) < self.ttl and self.budget > 0
 
 @dataclass
 class HoloFrame:
@@ -19,10 +20,11 @@ class HoloFrame:
     predicted_load: Dict[str, float]
     sync_delta: Dict[str, float]
     tokens: List[EnergyToken] = field(default_factory=list)
-    def allocate(self, kind: str, amount: float) -> float:
+    confidence: Dict[str, float] = field(default_factory=dict)
+    def allocate(self, kind: str, amount: float, now: float = None) -> float:
         need = amount; granted = 0.0
         for t in self.tokens:
-            if t.kind == kind and t.alive() and t.budget > 0:
+            if t.kind == kind and t.alive(now) and t.budget > 0:
                 take = min(need, t.budget)
                 t.budget -= take
                 granted += take
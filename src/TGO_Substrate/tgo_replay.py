@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+import argparse, json, os
+from tgo_core.config import load_config
+from tgo_core.replay import load_trace, chaos_trace, record_trace, replay
+
+CHAOS_CFG = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'configs', 'chaos_levels.json')
+
+def main():
+    ap = argparse.ArgumentParser(description='Replay telemetry traces through the TGO scheduler under a virtual clock.')
+    src = ap.add_mutually_exclusive_group(required=True)
+    src.add_argument('--trace', help='recorded trace (.ndjson/.json/.csv)')
+    src.add_argument('--chaos', help='synthetic trace from a chaos level (low/mid/high)')
+    src.add_argument('--record', type=float, metavar='SECONDS', help='record a live trace instead of replaying')
+    ap.add_argument('--config', default='tgo_config.yaml')
+    ap.add_argument('--chaos-config', default=CHAOS_CFG)
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--out', help='report (or recorded trace) path')
+    args = ap.parse_args()
+    cfg = load_config(args.config)
+    outdir = os.environ.get('TGO_OUTDIR', '.')
+    if args.record:
+        from tgo_core.telemetry import Telemetry
+        path = args.out or os.path.join(outdir, 'tgo_trace.ndjson')
+        n = record_trace(Telemetry(cfg), args.record, cfg['loop']['tick_s'], path)
+        print(f'[TGO Replay] recorded {n} samples -> {path}')
+        return
+    if args.chaos:
+        with open(args.chaos_config, encoding='utf-8-sig') as f:
+            trace = chaos_trace(json.load(f)[args.chaos], cfg['loop']['tick_s'])
+        name = f'chaos_{args.chaos}'
+    else:
+        trace = load_trace(args.trace)
+        name = os.path.splitext(os.path.basename(args.trace))[0]
+    report = replay(cfg, trace, seed=args.seed)
+    report['trace'] = name
+    path = args.out or os.path.join(outdir, f'tgo_replay_{name}.json')
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(json.dumps(report, indent=4))
+    print(f'[TGO Replay] report -> {path}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+import time
+import numpy as np
+from trinity_gpu.clock import resolve
+
+# Interleaved A/B comparison with a sequential test. Instead of running all of
+# A and then all of B (where ambient drift between the phases reads as an
+# effect), ABCompare runs short blocks in pairs, each pair in random order
+# (AB or BA), and takes one difference of block means per pair. After each
+# pair from min_pairs on it computes a bootstrap-t confidence interval of the
+# mean difference and stops when the interval excludes 0 ("significant") or
+# lies inside ±margin ("null": no effect worth having), else at max_s
+# ("inconclusive"). Repeated looks spend alpha along alpha·(k/K)², k pairs of
+# at most K, so the overall false-positive rate stays at or below alpha while
+# clear results stop after a few pairs. The studentized bootstrap holds that
+# rate with as few as five pairs, where a percentile bootstrap is far too narrow.
+#
+# An arm is any object with step(sample) -> {metric: value}; the sample is
+# {"t", "cpu", "mem"}, read once per period from the shared source. An
+# optional arm.enter() runs at the start of each of its blocks (switch the
+# configuration there); the first settle_s of a block is stepped but not scored.
+
+class ABCompare:
+    def __init__(self, arms: dict, metric: str = "temp", block_s: float = 10.0, period_s: float = 0.5,
+                 settle_s: float = 1.0, max_s: float = 240.0, min_pairs: int = 5, alpha: float = 0.05,
+                 margin: float = 0.5, n_boot: int = 2000, seed: int | None = None, clock=None, source=None):
+        if len(arms) != 2:
+            raise ValueError("ABCompare needs exactly two arms (A, B); the effect is B - A")
+        self.names = list(arms)
+        self.arms = arms
+        self.metric = metric
+        self.period_s = period_s
+        self.block_n = max(1, round(block_s / period_s))
+        self.settle_n = min(self.block_n - 1, max(0, round(settle_s / period_s)))
+        self.max_pairs = max(min_pairs, int(max_s // (2 * self.block_n * period_s)))
+        self.min_pairs = min_pairs
+        self.alpha = alpha
+        self.margin = margin
+        self.n_boot = n_boot
+        self.rng = np.random.default_rng(seed)
+        self.clock, self.source = resolve(clock, source)
+        self.trace = {n: {} for n in self.names}   # arm -> metric -> samples in run order
+        self.blocks = []
+
+    def _spent(self, k: int) -> float:
+        return self.alpha * min(1.0, k / self.max_pairs) ** 2
+
+    def ci(self, d, alpha: float) -> tuple:
+        """Studentized (bootstrap-t) interval of mean(d) at level 1 - alpha."""
+        d = np.asarray(d, dtype=float)
+        n, mean = len(d), float(d.mean())
+        se = float(d.std(ddof=1)) / np.sqrt(n)
+        if se == 0: return mean, mean
+        res = d[self.rng.integers(0, n, (self.n_boot, n))]
+        sd = res.std(axis=1, ddof=1)
+        ok = sd > 0   # resamples of one repeated value carry no spread
+        t = (res.mean(axis=1)[ok] - mean) / (sd[ok] / np.sqrt(n))
+        q_lo, q_hi = np.quantile(t, [alpha / 2, 1 - alpha / 2])
+        return float(mean - q_hi * se), float(mean - q_lo * se)
+
+    def _block(self, name: str, pair: int) -> dict:
+        arm = self.arms[name]
+        if hasattr(arm, "enter"): arm.enter()
+        scored, t0 = {}, self.clock.time()
+        for i in range(self.block_n):
+            s = {"cpu": self.source.cpu_percent(self.period_s), "mem": self.source.mem_percent(), "t": self.clock.time()}
+            m = {"cpu": s["cpu"], **arm.step(s)}
+            for key, v in m.items():
+                self.trace[name].setdefault(key, []).append(float(v))
+                if i >= self.settle_n: scored.setdefault(key, []).append(float(v))
+        block = {"pair": pair, "arm": name, "t0": t0, **{k: float(np.mean(v)) for k, v in scored.items()}}
+        self.blocks.append(block)
+        return block
+
+    def run(self) -> dict:
+        """Run pairs until the sequential test decides or max_s is used up."""
+        t_start = time.perf_counter()
+        a, b = self.names
+        diffs, looks, decision = {}, [], "inconclusive"
+        for k in range(1, self.max_pairs + 1):
+            order = self.names if self.rng.random() < 0.5 else self.names[::-1]
+            got = {n: self._block(n, k) for n in order}
+            for key in got[a].keys() & got[b].keys() - {"pair", "arm", "t0"}:
+                diffs.setdefault(key, []).append(got[b][key] - got[a][key])
+            if k < self.min_pairs: continue
+            level = self._spent(k) - (self._spent(looks[-1]["pair"]) if looks else 0.0)
+            lo, hi = self.ci(diffs[self.metric], level)
+            looks.append({"pair": k, "alpha": level, "delta": float(np.mean(diffs[self.metric])), "ci": [lo, hi]})
+            if lo > 0 or hi < 0: decision = "significant"
+            elif -self.margin <= lo and hi <= self.margin: decision = "null"
+            if decision != "inconclusive": break
+
+        effect = {}
+        for key, d in diffs.items():
+            lo, hi = (looks[-1]["ci"] if key == self.metric and looks else self.ci(d, self.alpha))
+            effect[key] = {"delta": float(np.mean(d)), "ci": [lo, hi]}
+        arms = {n: {"samples": len(self.trace[n].get("cpu", [])),
+                    "mean": {key: float(np.mean(v)) for key, v in self.trace[n].items()},
+                    "peak": {key: float(np.max(v)) for key, v in self.trace[n].items()},
+                    "trace": self.trace[n]} for n in self.names}
+        return {"metric": self.metric, "decision": decision, "pairs": len(diffs.get(self.metric, [])),
+                "max_pairs": self.max_pairs, "block_s": self.block_n * self.period_s,
+                "settle_s": self.settle_n * self.period_s, "alpha": self.alpha, "margin": self.margin,
+                "sampled_s": len(self.blocks) * self.block_n * self.period_s,
+                "elapsed_s": time.perf_counter() - t_start,
+                "effect": effect, "looks": looks, "arms": arms, "blocks": self.blocks}
@@ -0,0 +1,180 @@
+import time, inspect, threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+@dataclass
+class TaskResult:
+    task_id: str
+    device: str
+    status: str          # "done" | "yielded" (budget used up, resumes next budget) | "error" | "unbound"
+    allow_ms: float
+    wall_ms: float       # this slice
+    cpu_ms: float        # this slice (thread CPU time; child CPU time on process pools)
+    total_wall_ms: float = 0.0
+    total_cpu_ms: float = 0.0
+    value: Any = None
+    error: str | None = None
+    token: Any = field(default=None, repr=False)
+    joules: float | None = None        # measured this slice (EnergyMeter)
+    total_joules: float | None = None
+
+class _Work:
+    def __init__(self, fn, args, kwargs):
+        self.fn, self.args, self.kwargs = fn, args, kwargs
+        self.gen = fn if inspect.isgenerator(fn) else None
+        self.wall_ms = 0.0
+        self.cpu_ms = 0.0
+        self.joules = None
+
+def _timed_call(fn, args, kwargs):
+    # runs inside a pool process: report the child's own CPU time
+    c0 = time.process_time()
+    value = fn(*args, **kwargs)
+    return value, (time.process_time() - c0) * 1000.0
+
+def scaled_energy(tok, total_wall_ms:float, total_cpu_ms:float) -> float:
+    """Fallback actual-joules estimate: predicted energy scaled by measured / predicted time."""
+    return tok.predicted_joules * (max(total_cpu_ms, 1e-3) / max(tok.predicted_ms, 1e-3))
+
+class BudgetExecutor:
+    """
+    Executes EnergyRouter budgets on bound callables.
+
+    bind(task_id, fn, *args) attaches work to a token. Plain callables run to
+    completion on the budget's device pool. Generator functions (or generator
+    objects) are advanced one step at a time and stop at the first yield after
+    allow_ms has elapsed; the suspended generator resumes on the token's next
+    budget (collect() reports it as "yielded" so the caller can re-queue it).
+    Devices listed in process_devices use a process pool (plain, picklable
+    callables only).
+
+    collect() gathers finished slices and, when a task completes, settles it
+    into the allocator with the joules measured by `meter` (an EnergyMeter:
+    package energy apportioned by CPU-time share), or energy_fn(tok,
+    total_wall_ms, total_cpu_ms) without one. Settling happens on the
+    caller's thread only.
+    """
+    def __init__(self, alloc, workers:Dict[str, int]|None=None, default_workers:int=1,
+                 process_devices=(), energy_fn:Callable=scaled_energy, meter=None):
+        self.alloc = alloc
+        self.meter = meter
+        self.workers = workers or {}
+        self.default_workers = default_workers
+        self.process_devices = set(process_devices)
+        self.energy_fn = energy_fn
+        self._pools: Dict[str, Any] = {}
+        self._work: Dict[str, _Work] = {}
+        self._inflight: List[Future] = []
+        self._lock = threading.Lock()
+
+    def bind(self, task_id:str, fn, *args, **kwargs):
+        self._work[task_id] = _Work(fn, args, kwargs)
+
+    def _pool(self, device:str):
+        pool = self._pools.get(device)
+        if pool is None:
+            n = self.workers.get(device, self.default_workers)
+            if device in self.process_devices:
+                pool = ProcessPoolExecutor(max_workers=n)
+            else:
+                pool = ThreadPoolExecutor(max_workers=n, thread_name_prefix=f"tgo-{device}")
+            self._pools[device] = pool
+        return pool
+
+    def _run_slice(self, work:_Work, budget, tok) -> TaskResult:
+        probe = self.meter.start() if self.meter else None
+        t0, c0 = time.perf_counter(), time.thread_time()
+        status, value, error = "done", None, None
+        try:
+            if work.gen is None and inspect.isgeneratorfunction(work.fn):
+                work.gen = work.fn(*work.args, **work.kwargs)
+            if work.gen is not None:
+                deadline = t0 + budget.allow_ms / 1000.0
+                try:
+                    while True:
+                        next(work.gen)
+                        if time.perf_counter() >= deadline:
+                            status = "yielded"
+                            break
+                except StopIteration as stop:
+                    value = stop.value
+            else:
+                value = work.fn(*work.args, **work.kwargs)
+        except Exception as e:
+            status, error = "error", repr(e)
+        wall = (time.perf_counter() - t0) * 1000.0
+        cpu = (time.thread_time() - c0) * 1000.0
+        joules = self.meter.stop(probe, cpu / 1000.0).joules if probe else None
+        return self._account(work, budget, tok, status, wall, cpu, value, error, joules)
+
+    def _account(self, work, budget, tok, status, wall, cpu, value=None, error=None, joules=None) -> TaskResult:
+        work.wall_ms += wall
+        work.cpu_ms += cpu
+        if joules is not None:
+            work.joules = (work.joules or 0.0) + joules
+        return TaskResult(budget.task_id, budget.device, status, budget.allow_ms, wall, cpu,
+                          work.wall_ms, work.cpu_ms, value, error, tok, joules, work.joules)
+
+    def submit(self, budget, tok) -> Future:
+        work = self._work.get(budget.task_id)
+        if work is None:
+            fut = Future()
+            fut.set_result(TaskResult(budget.task_id, budget.device, "unbound", budget.allow_ms, 0.0, 0.0, token=tok))
+        elif budget.device in self.process_devices and work.gen is None and not inspect.isgeneratorfunction(work.fn):
+            probe = self.meter.start() if self.meter else None
+            t0 = time.perf_counter()
+            inner = self._pool(budget.device).submit(_timed_call, work.fn, work.args, work.kwargs)
+            fut = Future()
+            def done(f, work=work, budget=budget, tok=tok, t0=t0, probe=probe):
+                wall = (time.perf_counter() - t0) * 1000.0
+                try:
+                    value, cpu = f.result()
+                    # the child's CPU time stands in for this window's task CPU
+                    joules = self.meter.stop(probe, cpu / 1000.0).joules if probe else None
+                    fut.set_result(self._account(work, budget, tok, "done", wall, cpu, value, joules=joules))
+                except Exception as e:
+                    fut.set_result(self._account(work, budget, tok, "error", wall, 0.0, error=repr(e)))
+            inner.add_done_callback(done)
+        else:
+            fut = self._pool(budget.device).submit(self._run_slice, work, budget, tok)
+        with self._lock:
+            self._inflight.append(fut)
+        return fut
+
+    def execute(self, budgets, tokens) -> List[Future]:
+        by_id = {t.task_id: t for t in tokens}
+        return [self.submit(b, by_id.get(b.task_id)) for b in budgets]
+
+    def collect(self, timeout:float|None=0.0) -> List[TaskResult]:
+        """Harvest finished slices (waiting up to `timeout` s for all in flight; None waits forever)."""
+        if timeout is None or timeout > 0:
+            end = None if timeout is None else time.perf_counter() + timeout
+            for f in list(self._inflight):
+                left = None if end is None else max(0.0, end - time.perf_counter())
+                try:
+                    f.result(timeout=left)
+                except Exception:
+                    break
+        with self._lock:
+            finished = [f for f in self._inflight if f.done()]
+            self._inflight = [f for f in self._inflight if not f.done()]
+        results = [f.result() for f in finished]
+        for r in results:
+            if r.status in ("done", "error"):
+                self._work.pop(r.task_id, None)
+                if r.token is not None and r.status == "done":
+                    joules = r.total_joules
+                    if joules is None:
+                        joules = self.energy_fn(r.token, r.total_wall_ms, r.total_cpu_ms)
+                    self.alloc.settle(r.token, joules, r.total_wall_ms)
+        return results
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._inflight)
+
+    def shutdown(self, wait:bool=True):
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+        self._pools.clear()
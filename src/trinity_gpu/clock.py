@@ -0,0 +1,86 @@
+import json, math, random, time
+
+# Clock + sample source for the tgo_* controllers. Live runs use SystemClock and
+# PsutilSource (real sleeps, real sampling); trace runs use a TraceSource, whose
+# cpu_percent(interval) returns the next recorded sample and advances a
+# VirtualClock by `interval`, so a 180 s controller run completes in milliseconds.
+
+class SystemClock:
+    def time(self) -> float:
+        return time.time()
+    def sleep(self, s: float):
+        if s > 0: time.sleep(s)
+
+class VirtualClock:
+    def __init__(self, start: float = 0.0):
+        self.now = float(start)
+    def time(self) -> float:
+        return self.now
+    def sleep(self, s: float):
+        self.now += max(0.0, s)
+    advance = sleep
+
+class PsutilSource:
+    """Live samples; cpu_percent(interval) blocks for `interval` like psutil does."""
+    def __init__(self):
+        import psutil
+        self.psutil = psutil
+        self.clock = SystemClock()
+    def cpu_percent(self, interval: float = 0.5) -> float:
+        return float(self.psutil.cpu_percent(interval=interval))
+    def mem_percent(self) -> float:
+        return float(self.psutil.virtual_memory().percent)
+
+class TraceSource:
+    """
+    Replays recorded cpu/mem samples (wrapping around at the end) on a
+    VirtualClock. from_file() reads the controllers' own result JSON
+    ("trace": {"cpu", "mem"} or "cpu_trace"/"mem_trace") or NDJSON samples.
+    """
+    def __init__(self, cpu, mem=None, clock=None):
+        if not cpu: raise ValueError("empty trace")
+        self.cpu = [float(x) for x in cpu]
+        self.mem = [float(x) for x in mem] if mem else [50.0]
+        self.clock = clock or VirtualClock()
+        self.i = 0
+    def cpu_percent(self, interval: float = 0.5) -> float:
+        self.clock.sleep(interval or 0.0)
+        v = self.cpu[self.i % len(self.cpu)]
+        self.i += 1
+        return v
+    def mem_percent(self) -> float:
+        return self.mem[max(0, self.i - 1) % len(self.mem)]
+
+    @classmethod
+    def from_file(cls, path: str, clock=None) -> "TraceSource":
+        with open(path, encoding="utf-8-sig") as f:
+            text = f.read()
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            # NDJSON: ControllerRuntime and observer logs write cpu/mem, older agent logs cpu_percent/mem_percent
+            rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+            rows = [r for r in rows if "cpu" in r or "cpu_percent" in r]
+            return cls([r.get("cpu_percent", r.get("cpu")) for r in rows],
+                       [r.get("mem_percent", r.get("ram_percent", r.get("mem", 50.0))) for r in rows], clock)
+        tr = data.get("trace", {})
+        return cls(tr.get("cpu") or data.get("cpu_trace"), tr.get("mem") or data.get("mem_trace"), clock)
+
+    @classmethod
+    def synthetic(cls, n: int = 360, base: float = 5.0, amp: float = 3.0, noise: float = 1.0,
+                  period: int = 60, seed: int = 0, clock=None) -> "TraceSource":
+        rng = random.Random(seed)
+        cpu = [max(0.0, min(100.0, base + amp * math.sin(2 * math.pi * i / period) + rng.gauss(0, noise)))
+               for i in range(n)]
+        mem = [max(0.0, min(100.0, 60.0 + rng.gauss(0, 0.5))) for _ in range(n)]
+        return cls(cpu, mem, clock)
+
+def resolve(clock=None, source=None):
+    """(clock, source) for a controller run: live psutil on the wall clock unless a source is given."""
+    if source is None:
+        source = PsutilSource()
+    if clock is None:
+        clock = source.clock
+    else:
+        source.clock = clock  # trace sources advance the controller's clock
+    return clock, source
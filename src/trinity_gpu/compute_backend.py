@@ -0,0 +1,130 @@
+import os, time
+import numpy as np
+
+# Compute backends for the GPU benchmarks. OpenCLBackend builds each program
+# once per (source, device) and keeps device buffers in a pool keyed by name,
+# so steady-state runs only enqueue work; launches are asynchronous and return
+# profiled events. NumpyBackend offers the same interface on the host and is
+# used when pyopencl or an OpenCL device is unavailable.
+
+VECTOR_ADD_SRC = """
+__kernel void add(__global const float *a, __global const float *b, __global float *c) {
+    int gid = get_global_id(0);
+    c[gid] = a[gid] + b[gid];
+}"""
+
+# host implementations of the kernels the benchmarks launch, by kernel name
+NUMPY_KERNELS = {
+    "add": lambda a, b, c: np.add(a, b, out=c),
+}
+
+class KernelEvent:
+    """Launch handle: wait() blocks until done; duration_ms is device time when profiling is available."""
+    def __init__(self, cl_event=None, t0=None, t1=None):
+        self.cl_event, self.t0, self.t1 = cl_event, t0, t1
+    def wait(self):
+        if self.cl_event is not None: self.cl_event.wait()
+        return self
+    @property
+    def duration_ms(self) -> float | None:
+        if self.cl_event is not None:
+            try:
+                return (self.cl_event.profile.end - self.cl_event.profile.start) / 1e6
+            except Exception:
+                return None
+        return None if self.t1 is None else (self.t1 - self.t0) * 1000.0
+
+class NumpyBackend:
+    name = "numpy"
+    def __init__(self):
+        self.device_name = "CPU: NumPy"
+        self.buffers = {}
+        self.builds = 0
+
+    def program(self, source):
+        return source   # nothing to compile; kernels resolve by name in NUMPY_KERNELS
+
+    def buffer(self, key, nbytes, dtype=np.float32, readonly=False):
+        buf = self.buffers.get(key)
+        n = nbytes // np.dtype(dtype).itemsize
+        if buf is None or buf.size < n or buf.dtype != dtype:
+            buf = self.buffers[key] = np.empty(n, dtype=dtype)
+        return buf
+
+    def write(self, key, host, readonly=True) -> KernelEvent:
+        buf = self.buffer(key, host.nbytes, host.dtype, readonly)
+        buf[:host.size] = host.ravel()
+        return KernelEvent()
+
+    def read(self, key, host) -> KernelEvent:
+        host.ravel()[:] = self.buffers[key][:host.size]
+        return KernelEvent()
+
+    def launch(self, source, kernel, global_size, *keys) -> KernelEvent:
+        fn = NUMPY_KERNELS[kernel]
+        n = int(np.prod(global_size))
+        t0 = time.perf_counter()
+        fn(*(self.buffers[k][:n] for k in keys))
+        return KernelEvent(t0=t0, t1=time.perf_counter())
+
+    def finish(self):
+        pass
+
+class OpenCLBackend:
+    name = "opencl"
+    def __init__(self, ctx=None):
+        import pyopencl as cl
+        self.cl = cl
+        self.ctx = ctx or cl.create_some_context(interactive=False)
+        self.device = self.ctx.devices[0]
+        self.device_name = f"OpenCL: {self.device.name}"
+        self.queue = cl.CommandQueue(self.ctx, properties=cl.command_queue_properties.PROFILING_ENABLE)
+        self.programs = {}    # (source, device) -> built program
+        self.buffers = {}     # key -> (Buffer, nbytes)
+        self.builds = 0
+
+    def program(self, source):
+        key = (source, self.device.int_ptr)
+        prg = self.programs.get(key)
+        if prg is None:
+            prg = self.programs[key] = self.cl.Program(self.ctx, source).build()
+            self.builds += 1
+        return prg
+
+    def buffer(self, key, nbytes, dtype=np.float32, readonly=False):
+        entry = self.buffers.get(key)
+        if entry is None or entry[1] < nbytes:
+            mf = self.cl.mem_flags
+            entry = self.buffers[key] = (self.cl.Buffer(self.ctx, mf.READ_ONLY if readonly else mf.READ_WRITE, nbytes), nbytes)
+        return entry[0]
+
+    def write(self, key, host, readonly=True) -> KernelEvent:
+        buf = self.buffer(key, host.nbytes, host.dtype, readonly)
+        return KernelEvent(self.cl.enqueue_copy(self.queue, buf, host, is_blocking=False))
+
+    def read(self, key, host) -> KernelEvent:
+        return KernelEvent(self.cl.enqueue_copy(self.queue, host, self.buffers[key][0], is_blocking=False))
+
+    def launch(self, source, kernel, global_size, *keys) -> KernelEvent:
+        k = getattr(self.program(source), kernel)
+        return KernelEvent(k(self.queue, tuple(global_size), None, *(self.buffers[key][0] for key in keys)))
+
+    def finish(self):
+        self.queue.finish()
+
+_BACKEND = None
+
+def get_backend(prefer: str | None = None):
+    """Shared backend: OpenCL when a device is available, else NumPy (TGO_COMPUTE_BACKEND=numpy|opencl forces one)."""
+    global _BACKEND
+    prefer = prefer or os.environ.get("TGO_COMPUTE_BACKEND", "auto")
+    if _BACKEND is not None and prefer in ("auto", _BACKEND.name):
+        return _BACKEND
+    if prefer in ("auto", "opencl"):
+        try:
+            _BACKEND = OpenCLBackend()
+            return _BACKEND
+        except Exception:
+            if prefer == "opencl": raise
+    _BACKEND = NumpyBackend()
+    return _BACKEND
@@ -0,0 +1,129 @@
+import json, os, importlib, threading
+from datetime import datetime
+from trinity_gpu.clock import resolve
+from trinity_gpu.ndjson_log import NDJSONWriter
+
+# One sampler, many controllers. The runtime takes one cpu/mem sample per
+# period and hands the same sample to every registered controller's
+# step(sample) -> duty. At most one controller is "active" (its duty goes to
+# the actuator); the rest run in "shadow" mode on the same stream, so comparing
+# N controllers live costs one sampler. Each sample (with every controller's
+# duty) can be streamed as one NDJSON line (rotating, see ndjson_log).
+
+BUILTIN = {
+    "adaptive": "trinity_gpu.tgo_adaptive:AdaptiveController",
+    "predictive": "trinity_gpu.tgo_predictive:PredictiveController",
+    "refinement": "trinity_gpu.tgo_refinement:RefinementController",
+    "power": "trinity_gpu.tgo_power:PowerController",
+    "thermal": "trinity_gpu.tgo_thermal:ThermalController",
+    "thermo_adaptive": "trinity_gpu.tgo_thermo_adaptive:ThermoAdaptiveController",
+    "thermo_adaptive_tuned": "trinity_gpu.tgo_thermo_adaptive_tuned:TunedThermoAdaptiveController",
+}
+
+class Controller:
+    """Plugin interface: step(sample) -> duty in [0, 1]; result() -> summary dict."""
+    name = "controller"
+    def step(self, sample: dict) -> float:
+        raise NotImplementedError
+    def result(self) -> dict:
+        return {}
+
+def load_controller(spec: str, **params) -> Controller:
+    """Controller from a builtin name or a "package.module:Class" path."""
+    path = BUILTIN.get(spec, spec)
+    mod, _, cls = path.partition(":")
+    if not cls:
+        raise ValueError(f"unknown controller '{spec}' (builtin: {', '.join(BUILTIN)})")
+    return getattr(importlib.import_module(mod), cls)(**params)
+
+class ControllerRuntime:
+    def __init__(self, controllers=(), period_s: float = 0.5, clock=None, source=None,
+                 out_path: str | None = None, actuator=None):
+        self.clock, self.source = resolve(clock, source)
+        self.period_s = period_s
+        self.out_path = out_path
+        self.actuator = actuator      # called with the active controller's duty each sample
+        self.controllers = {}         # name -> controller
+        self.modes = {}               # name -> "active" | "shadow"
+        self.samples = 0
+        self._stop = threading.Event()
+        for i, c in enumerate(controllers):
+            self.add(c, mode="active" if i == 0 else "shadow")
+
+    def add(self, controller: Controller, mode: str = "shadow", name: str | None = None):
+        if mode not in ("active", "shadow"):
+            raise ValueError(f"mode must be 'active' or 'shadow', not {mode!r}")
+        name = name or controller.name
+        if name in self.controllers:
+            raise ValueError(f"controller '{name}' already registered")
+        if mode == "active" and self.active:
+            raise ValueError(f"'{self.active}' is already the active controller")
+        self.controllers[name] = controller
+        self.modes[name] = mode
+        return controller
+
+    def remove(self, name: str) -> Controller:
+        self.modes.pop(name, None)
+        return self.controllers.pop(name)
+
+    @property
+    def active(self) -> str | None:
+        return next((n for n, m in self.modes.items() if m == "active"), None)
+
+    def sample(self) -> dict:
+        cpu = self.source.cpu_percent(self.period_s)
+        return {"t": self.clock.time(), "cpu": cpu, "mem": self.source.mem_percent()}
+
+    def stop(self):
+        """Ask run() (possibly in another thread) to return after the current sample."""
+        self._stop.set()
+
+    def run(self, duration: float | None = None) -> dict:
+        """Sample until `duration` has elapsed (None: until stop(), idling while no controllers are registered)."""
+        out = NDJSONWriter(self.out_path) if self.out_path else None
+        start = self.clock.time()
+        self._stop.clear()
+        try:
+            while not self._stop.is_set() and (duration is None or self.clock.time() - start < duration):
+                if duration is None and not self.controllers:
+                    self._stop.wait(self.period_s)   # nothing to feed; wait for add() or stop()
+                    continue
+                s = self.sample()
+                # snapshot: controllers may be added or removed from another thread
+                duties = {n: float(c.step(s)) for n, c in list(self.controllers.items())}
+                self.samples += 1
+                active = self.active
+                if out:
+                    out.write({**s, "duty": duties, "active": active})
+                if self.actuator and active in duties:
+                    self.actuator(duties[active])
+        finally:
+            if out: out.close()
+        return self.summary()
+
+    def summary(self) -> dict:
+        return {"timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "samples": self.samples,
+                "active": self.active,
+                "controllers": {n: {"mode": self.modes.get(n), **{k: v for k, v in c.result().items() if k != "trace"}}
+                                for n, c in list(self.controllers.items())}}
+
+if __name__ == "__main__":
+    import argparse
+    from trinity_gpu.clock import TraceSource
+    ap = argparse.ArgumentParser(description="Run several duty controllers on one shared sampler.")
+    ap.add_argument("--controllers", default="adaptive,predictive,refinement",
+                    help=f"comma-separated names ({', '.join(BUILTIN)}) or module:Class paths")
+    ap.add_argument("--active", help="controller whose duty is applied (default: the first)")
+    ap.add_argument("--duration", type=float, default=60)
+    ap.add_argument("--period", type=float, default=0.5)
+    ap.add_argument("--trace", help="replay a recorded trace instead of sampling live")
+    ap.add_argument("--out", help="NDJSON stream (default $TGO_OUTDIR/tgo_runtime.ndjson)")
+    args = ap.parse_args()
+    names = [n.strip() for n in args.controllers.split(",") if n.strip()]
+    active = args.active or names[0]
+    rt = ControllerRuntime(period_s=args.period, source=TraceSource.from_file(args.trace) if args.trace else None,
+                           out_path=args.out or os.path.join(os.environ.get("TGO_OUTDIR", "."), "tgo_runtime.ndjson"))
+    for n in names:
+        rt.add(load_controller(n), mode="active" if n == active else "shadow", name=n)
+    print(f"[TGO Runtime] {len(names)} controllers on one sampler, active={active} -> {rt.out_path}")
+    print(json.dumps(rt.run(args.duration), indent=4, default=float))
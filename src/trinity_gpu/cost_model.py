@@ -0,0 +1,115 @@
+import json, math, os, threading
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+DEFAULT_UNIT_JOULES = 0.00005
+DEFAULT_UNIT_MS = 0.05
+
+class _Rate:
+    """Exponentially weighted mean/variance of a per-work-unit cost."""
+    __slots__ = ("mean", "var", "n")
+    def __init__(self, mean:float, var:float=0.0, n:int=0):
+        self.mean, self.var, self.n = mean, var, n
+    def update(self, x:float, alpha:float):
+        if self.n == 0:
+            self.mean, self.var = x, 0.0
+        else:
+            d = x - self.mean
+            self.mean += alpha * d
+            self.var = (1 - alpha) * (self.var + alpha * d * d)
+        self.n += 1
+
+class CostModel:
+    """
+    Learned unit_joules / unit_ms per task class, updated online from settled
+    actuals (EWMA of the per-unit cost with an exponentially weighted variance).
+    Unknown classes use the static defaults. The table persists as JSON.
+    """
+    def __init__(self, alpha:float=0.2, unit_joules:float=DEFAULT_UNIT_JOULES,
+                 unit_ms:float=DEFAULT_UNIT_MS, z:float=1.96, path:str|None=None):
+        self.alpha = alpha
+        self.default = (unit_joules, unit_ms)
+        self.z = z
+        self.path = path
+        self.table: dict[str, tuple[_Rate, _Rate]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, task_class:str, work_units:float, actual_joules:float|None, actual_ms:float|None=None):
+        if work_units <= 0:
+            return
+        with self._lock:
+            rates = self.table.get(task_class)
+            if rates is None:
+                rates = self.table[task_class] = (_Rate(self.default[0]), _Rate(self.default[1]))
+            if actual_joules is not None:
+                rates[0].update(actual_joules / work_units, self.alpha)
+            if actual_ms is not None:
+                rates[1].update(actual_ms / work_units, self.alpha)
+
+    def unit_costs(self, task_class:str) -> tuple[float, float]:
+        rates = self.table.get(task_class)
+        if rates is None:
+            return self.default
+        return (rates[0].mean if rates[0].n else self.default[0],
+                rates[1].mean if rates[1].n else self.default[1])
+
+    def predict(self, task_class:str, work_units:float) -> tuple[float, float]:
+        uj, ums = self.unit_costs(task_class)
+        return work_units * uj, work_units * ums
+
+    def interval(self, task_class:str, work_units:float) -> dict:
+        """z-sigma interval of joules and ms for one task; unlearned sides span 0..2x the default."""
+        out = {}
+        rates = self.table.get(task_class)
+        for key, i in (("joules", 0), ("ms", 1)):
+            r = rates[i] if rates else None
+            if r is None or r.n < 2:
+                mid = work_units * (r.mean if r and r.n else self.default[i])
+                out[key] = (0.0, 2.0 * mid)
+            else:
+                half = self.z * math.sqrt(r.var) * work_units
+                out[key] = (max(0.0, r.mean * work_units - half), r.mean * work_units + half)
+        return out
+
+    def predict_batch(self, task_classes, work_units):
+        """(joules, ms) arrays for many tokens: one table lookup per distinct class."""
+        classes = list(task_classes)
+        uniq = {c: self.unit_costs(c) for c in set(classes)}
+        if np is None:
+            return ([u * uniq[c][0] for c, u in zip(classes, work_units)],
+                    [u * uniq[c][1] for c, u in zip(classes, work_units)])
+        units = np.asarray(work_units, dtype=float)
+        uj = np.fromiter((uniq[c][0] for c in classes), float, len(classes))
+        ums = np.fromiter((uniq[c][1] for c in classes), float, len(classes))
+        return units * uj, units * ums
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {"alpha": self.alpha, "default": list(self.default),
+                    "classes": {c: {"unit_joules": j.mean, "unit_joules_var": j.var, "n_joules": j.n,
+                                    "unit_ms": m.mean, "unit_ms_var": m.var, "n_ms": m.n}
+                                for c, (j, m) in self.table.items()}}
+
+    def save(self, path:str|None=None) -> str:
+        path = path or self.path
+        if not path:
+            raise ValueError("no path to save to")
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.to_dict(), f, indent=4)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path:str, **kwargs) -> "CostModel":
+        """Table from `path` if it exists, else an empty model that will save there."""
+        model = cls(path=path, **kwargs)
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            for c, e in data.get("classes", {}).items():
+                model.table[c] = (_Rate(e["unit_joules"], e["unit_joules_var"], e["n_joules"]),
+                                  _Rate(e["unit_ms"], e["unit_ms_var"], e["n_ms"]))
+        return model
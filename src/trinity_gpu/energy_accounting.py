@@ -0,0 +1,108 @@
+import os, time, threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from tgo_core.adapters.power_adapter import discover_counters
+
+# Measured per-task energy. Package energy (RAPL) over a task's window is
+# apportioned to the task by its share of all CPU time spent on the machine in
+# that window: joules = ΔE_package * task_cpu / Δcpu_busy(all cores).
+# Without readable counters, or when the window is too short for /proc/stat to
+# show any busy time, the task is charged task_cpu * watts_per_core.
+
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+class PackageEnergyCounter:
+    """Package energy as a monotonic µJ total, read through tgo_core's RAPL/amd_energy counters."""
+    def __init__(self, sysfs_root:str="/sys"):
+        counters = list(discover_counters(sysfs_root).values())
+        # per-core (and dram) zones are already inside the package counter; core only when no package zone exists
+        self.counters = [c for c in counters if c.kind == "package"] or [c for c in counters if c.kind == "core"]
+        self._lock = threading.Lock()
+        now = time.time()
+        for c in self.counters: c.update(now)
+
+    @property
+    def available(self) -> bool:
+        return bool(self.counters)
+
+    def total_uj(self) -> int|None:
+        if not self.counters:
+            return None
+        with self._lock:
+            now = time.time()
+            for c in self.counters: c.update(now)
+            return sum(c.energy_uj for c in self.counters)
+
+def system_busy_cpu_s(proc_root:str="/proc") -> float|None:
+    """CPU seconds spent non-idle by all cores since boot (from /proc/stat)."""
+    try:
+        with open(os.path.join(proc_root, "stat")) as f:
+            fields = [int(x) for x in f.readline().split()[1:]]
+    except (OSError, ValueError):
+        try:
+            import psutil
+            t = psutil.cpu_times()
+            return sum(t) - t.idle - getattr(t, "iowait", 0.0)
+        except Exception:
+            return None
+    idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+    busy = sum(fields[:8]) - idle   # user nice system idle iowait irq softirq steal
+    return busy / _CLK_TCK
+
+@dataclass
+class Probe:
+    ts: float
+    energy_uj: int|None
+    busy_cpu_s: float|None
+    thread_cpu_s: float
+
+@dataclass
+class EnergyReading:
+    joules: float
+    task_cpu_s: float
+    wall_s: float
+    share: float          # task CPU / all busy CPU in the window
+    package_joules: float|None
+    source: str           # "rapl" | "model"
+
+class EnergyMeter:
+    def __init__(self, sysfs_root:str="/sys", proc_root:str="/proc", watts_per_core:float|None=None):
+        self.proc_root = proc_root
+        self.counter = PackageEnergyCounter(sysfs_root)
+        self.watts_per_core = watts_per_core or 28.0 / (os.cpu_count() or 1)
+
+    @property
+    def source(self) -> str:
+        return "rapl" if self.counter.available else "model"
+
+    def start(self) -> Probe:
+        """Snapshot taken on the thread that will run the task."""
+        return Probe(time.perf_counter(), self.counter.total_uj(),
+                     system_busy_cpu_s(self.proc_root) if self.counter.available else None,
+                     time.thread_time())
+
+    def stop(self, probe:Probe, task_cpu_s:float|None=None) -> EnergyReading:
+        """task_cpu_s defaults to this thread's CPU time since start(); pass it for work run elsewhere."""
+        wall = time.perf_counter() - probe.ts
+        cpu = (time.thread_time() - probe.thread_cpu_s) if task_cpu_s is None else task_cpu_s
+        e1 = self.counter.total_uj()
+        busy1 = system_busy_cpu_s(self.proc_root) if e1 is not None else None
+        busy = (busy1 - probe.busy_cpu_s) if (busy1 is not None and probe.busy_cpu_s is not None) else None
+        if probe.energy_uj is None or e1 is None or not busy:
+            # no counters, or a window shorter than a /proc/stat tick: charging the whole
+            # package would count the same joules once per concurrent task
+            return EnergyReading(cpu * self.watts_per_core, cpu, wall, 1.0, None, "model")
+        pkg = (e1 - probe.energy_uj) / 1e6
+        # ticks are coarse: a short window may still show less busy time than the task itself
+        share = 1.0 if busy <= cpu else cpu / busy
+        return EnergyReading(pkg * share, cpu, wall, share, pkg, "rapl")
+
+    @contextmanager
+    def measure(self):
+        """with meter.measure() as out: ...  -> out[0] is the EnergyReading afterwards."""
+        out = []
+        probe = self.start()
+        try:
+            yield out
+        finally:
+            out.append(self.stop(probe))
@@ -1,6 +1,7 @@
 ﻿from __future__ import annotations
 from typing import Callable, Dict, List
 from dataclasses import dataclass
+from time import time
 
 @dataclass
 class Budget:
@@ -13,14 +14,36 @@ class EnergyRouter:
     """
     Converts ranked tokens into per-backend time budgets.
     Works even if telemetry funcs return None (estimation mode).
+
+    mode="rr"  : round-robin over backends, every token gets a budget.
+    mode="drr" : deficit-weighted. Each backend earns its capacity share of the
+                 frame as credit; unused credit carries over (up to carry_frames
+                 extra frames). Deadline tokens go to the backend with the most
+                 credit among those that can finish them within their slack (else
+                 the one that finishes soonest), other tokens to the backend with
+                 the most credit left. Tokens that fit nowhere are left in
+                 self.deferred for the caller to re-queue. A token costing more
+                 than any backend can ever hold (its full-frame share plus the
+                 carry) gets a slice of that size instead, so it cannot be
+                 deferred forever (preemptible work yields there and is re-queued).
+    route(tokens, elapsed_ms) credits only the time since the previous call when
+    the caller routes more often than once per frame.
+    self.last_report holds planned vs assigned ms per backend for the last frame.
     """
     def __init__(self,
                  backends: Dict[str, dict],
                  get_telemetry: Dict[str, Callable[[], dict]]|None = None,
-                 frame_ms: float = 100.0):
+                 frame_ms: float = 100.0,
+                 mode: str = "rr",
+                 carry_frames: float = 1.0):
         self.backends = backends or {}
         self.get_telemetry = get_telemetry or {}
         self.frame_ms = frame_ms
+        self.mode = mode
+        self.carry_frames = carry_frames
+        self.deficit: Dict[str, float] = {}   # unused ms carried into the next frame
+        self.deferred: list = []
+        self.last_report: Dict[str, dict] = {}
 
     def _capacity(self, name:str) -> float:
         """
@@ -39,11 +62,14 @@ class EnergyRouter:
         except Exception:
             return 0.5
 
-    def route(self, ranked_tokens) -> List[Budget]:
-        # compute weights per backend
+    def route(self, ranked_tokens, elapsed_ms: float|None = None) -> List[Budget]:
+        # compute weights per backend over the time being credited (a whole frame by default)
+        frame = self.frame_ms if elapsed_ms is None else max(0.0, elapsed_ms)
         caps = {k: self._capacity(k) for k in self.backends.keys()}
         total_cap = sum(caps.values()) or 1.0
-        shares = {k: self.frame_ms * (v/total_cap) for k,v in caps.items()}
+        shares = {k: frame * (v/total_cap) for k,v in caps.items()}
+        if self.mode == "drr":
+            return self._route_drr(ranked_tokens, shares)
 
         budgets: List[Budget] = []
         # simple round-robin by backend share
@@ -58,4 +84,40 @@ class EnergyRouter:
             budgets.append(Budget(task_id=tok.task_id, device=dev, allow_ms=float(allow), hint_watts=0.0))
             cur[dev] += allow
             i += 1
+        self.last_report = {k: {"planned_ms": shares[k], "assigned_ms": cur.get(k, 0.0), "carry_ms": 0.0}
+                            for k in shares}
+        return budgets
+
+    def _route_drr(self, ranked_tokens, shares: Dict[str, float]) -> List[Budget]:
+        planned = {k: shares[k] + self.deficit.get(k, 0.0) for k in shares}
+        # most credit a backend can accumulate: a full frame's share plus the carry cap
+        total = sum(shares.values())
+        ceiling = max((self.frame_ms * v / total * (1.0 + self.carry_frames) for v in shares.values()), default=0.0) \
+            if total > 0 else 0.0
+        credit = dict(planned)
+        used = {k: 0.0 for k in shares}
+        budgets: List[Budget] = []
+        self.deferred = []
+        now = time()
+        for tok in ranked_tokens:
+            cost = max(2.0, tok.predicted_ms)
+            if ceiling > 0: cost = min(cost, ceiling)
+            fits = [k for k in credit if credit[k] >= cost]
+            if not fits:
+                self.deferred.append(tok)
+                continue
+            if tok.deadline_ms > 0:
+                slack = tok.deadline_ms - (now - tok.created_ts) * 1000.0
+                # budgets on one backend run back to back: finish = already assigned + cost
+                meet = [k for k in fits if used[k] + cost <= slack]
+                dev = max(meet, key=lambda k: credit[k]) if meet else min(fits, key=lambda k: used[k])
+            else:
+                dev = max(fits, key=lambda k: credit[k])
+            budgets.append(Budget(task_id=tok.task_id, device=dev, allow_ms=float(cost), hint_watts=0.0))
+            credit[dev] -= cost
+            used[dev] += cost
+        # carry unused credit, bounded so an idle backend cannot hoard a burst
+        self.deficit = {k: min(credit[k], shares[k] * self.carry_frames) for k in shares}
+        self.last_report = {k: {"planned_ms": planned[k], "assigned_ms": used[k], "carry_ms": self.deficit[k]}
+                            for k in shares}
         return budgets
@@ -1,6 +1,15 @@
 ﻿from dataclasses import dataclass
+from collections import OrderedDict
 from time import time
-import math
+import math, heapq, re
+from trinity_gpu.cost_model import DEFAULT_UNIT_JOULES, DEFAULT_UNIT_MS
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# below this many tokens the plain sorted() path is faster than building arrays
+VECTOR_MIN = 32
 
 @dataclass
 class EnergyToken:
@@ -10,20 +19,114 @@ class EnergyToken:
     predicted_joules: float # forecasted energy for this microtask
     predicted_ms: float     # forecasted wall time for this microtask
     created_ts: float       # epoch seconds
+    task_class: str = ""    # grouping key (debt / cost model per class); the allocator fills it from the id
+    work_units: float = 0.0 # forecast input, lets settle() refine the cost model
+
+_INSTANCE_SUFFIX = re.compile(r"[-_:#]?\d+$")
+
+def task_class_of(task_id:str) -> str:
+    """Default class of an instance id: 'task-17' -> 'task', 'decode#3' -> 'decode'."""
+    return _INSTANCE_SUFFIX.sub("", task_id) or task_id
+
+class DebtTable:
+    """
+    Bounded energy-debt table: key -> (+/-) joules error.
+    Debt decays toward zero with `half_life_s`, applied lazily from the time of
+    the last update instead of on every settle. Entries are kept in update order:
+    the least recently settled key is evicted beyond `max_entries`, and keys not
+    settled for `ttl_s` are dropped, so memory stays flat on long runs.
+    """
+    def __init__(self, max_entries:int=4096, half_life_s:float=5.0, ttl_s:float=300.0):
+        self.max_entries = max_entries
+        self.half_life_s = half_life_s
+        self.ttl_s       = ttl_s
+        self._d: OrderedDict = OrderedDict()  # key -> (debt at ts, ts)
+
+    def __len__(self) -> int:
+        return len(self._d)
+
+    def __contains__(self, key) -> bool:
+        return key in self._d
+
+    def _decayed(self, val:float, ts:float, now:float) -> float:
+        return val * 0.5 ** (max(0.0, now - ts) / self.half_life_s)
+
+    def get(self, key, default:float=0.0, now:float|None = None) -> float:
+        e = self._d.get(key)
+        if e is None: return default
+        now = time() if now is None else now
+        if now - e[1] > self.ttl_s: return default
+        return self._decayed(e[0], e[1], now)
+
+    def add(self, key, err:float, now:float|None = None) -> float:
+        now = time() if now is None else now
+        val = self.get(key, 0.0, now) + err
+        self._d[key] = (val, now)
+        self._d.move_to_end(key)
+        self._expire(now)
+        return val
+
+    def _expire(self, now:float):
+        d = self._d
+        while d and (len(d) > self.max_entries or now - next(iter(d.values()))[1] > self.ttl_s):
+            d.popitem(last=False)
+
+    def items(self, now:float|None = None):
+        now = time() if now is None else now
+        return [(k, self._decayed(v, ts, now)) for k, (v, ts) in self._d.items() if now - ts <= self.ttl_s]
+
+    def snapshot(self, now:float|None = None) -> dict:
+        """key -> decayed debt for every live entry (at most max_entries lookups, whatever the backlog)."""
+        return dict(self.items(now))
 
 class TokenAllocator:
-    def __init__(self, max_quanta_j=5.0, min_quanta_ms=2.0, horizon_ms=250.0):
+    def __init__(self, max_quanta_j=5.0, min_quanta_ms=2.0, horizon_ms=250.0,
+                 debt_by_class=False, debt_max_entries=4096, debt_half_life_s=5.0, debt_ttl_s=300.0,
+                 cost_model=None):
         self.max_quanta_j   = max_quanta_j
         self.min_quanta_ms  = min_quanta_ms
         self.horizon_ms     = horizon_ms
-        self.debt = {}  # task_id -> (+/-) joules error
+        self.debt_by_class  = debt_by_class
+        # debt key (task_id, or task class) -> (+/-) joules error
+        self.debt = DebtTable(debt_max_entries, debt_half_life_s, debt_ttl_s)
+        self.cost_model     = cost_model  # CostModel: learned unit costs per task class
 
     def forecast_to_token(self, task_id:str, importance:float, work_units:int,
-                          unit_joules:float=0.00005, unit_ms:float=0.05,
-                          deadline_ms:float=0.0) -> EnergyToken:
+                          unit_joules:float|None=None, unit_ms:float|None=None,
+                          deadline_ms:float=0.0, task_class:str="") -> EnergyToken:
+        # resolved once here so debt/cost lookups never re-derive it per token
+        task_class = task_class or task_class_of(task_id)
+        # explicit unit costs win; otherwise the learned per-class costs, else the static defaults
+        if unit_joules is None or unit_ms is None:
+            learned = (self.cost_model.unit_costs(task_class)
+                       if self.cost_model else (DEFAULT_UNIT_JOULES, DEFAULT_UNIT_MS))
+            unit_joules = learned[0] if unit_joules is None else unit_joules
+            unit_ms = learned[1] if unit_ms is None else unit_ms
         pj = max(1e-6, work_units * unit_joules)
         pm = max(self.min_quanta_ms, work_units * unit_ms)
-        return EnergyToken(task_id, float(importance), float(deadline_ms), float(pj), float(pm), time())
+        return EnergyToken(task_id, float(importance), float(deadline_ms), float(pj), float(pm), time(),
+                           task_class, float(work_units))
+
+    def forecast_batch(self, task_ids:list[str], importances, work_units, deadlines_ms=None,
+                       task_classes=None) -> list[EnergyToken]:
+        """forecast_to_token for many tokens with one batched cost-model prediction."""
+        n = len(task_ids)
+        deadlines_ms = deadlines_ms if deadlines_ms is not None else [0.0] * n
+        task_classes = task_classes if task_classes is not None else [""] * n
+        keys = [c or task_class_of(t) for t, c in zip(task_ids, task_classes)]
+        if self.cost_model:
+            pj, pm = self.cost_model.predict_batch(keys, work_units)
+        else:
+            pj = [u * DEFAULT_UNIT_JOULES for u in work_units]; pm = [u * DEFAULT_UNIT_MS for u in work_units]
+        now = time()
+        return [EnergyToken(tid, float(imp), float(ddl), max(1e-6, float(j)), max(self.min_quanta_ms, float(m)),
+                            now, cls, float(u))
+                for tid, imp, ddl, j, m, cls, u in zip(task_ids, importances, deadlines_ms, pj, pm,
+                                                       keys, work_units)]
+
+    def debt_key(self, tok:EnergyToken) -> str:
+        if not self.debt_by_class: return tok.task_id
+        return tok.task_class or task_class_of(tok.task_id)
 
     def _priority(self, tok:EnergyToken, now:float) -> float:
         age_ms = (now - tok.created_ts) * 1000.0
@@ -33,16 +136,174 @@ class TokenAllocator:
             deadline_term = 1.0 / math.sqrt(slack)  # sooner deadline -> bigger term
         need_term = min(1.0, tok.predicted_joules / self.max_quanta_j)
         imp_term  = tok.importance
-        debt_term = min(0.5, max(-0.5, self.debt.get(tok.task_id, 0.0) / self.max_quanta_j))
+        debt_term = min(0.5, max(-0.5, self.debt.get(self.debt_key(tok), 0.0, now) / self.max_quanta_j))
         # priority ∈ [0, ~2.5]
         return imp_term*1.2 + deadline_term*0.9 + need_term*0.6 + debt_term*0.4
 
-    def settle(self, tok:EnergyToken, actual_joules:float):
+    def settle(self, tok:EnergyToken, actual_joules:float, actual_ms:float|None=None):
         err = actual_joules - tok.predicted_joules
-        self.debt[tok.task_id] = self.debt.get(tok.task_id, 0.0) + err
-        # light decay toward zero to avoid bias accumulation
-        self.debt[tok.task_id] *= 0.9
+        # decay toward zero (half-life) keeps bias from accumulating
+        self.debt.add(self.debt_key(tok), err)
+        if self.cost_model and tok.work_units > 0:
+            self.cost_model.update(tok.task_class or task_class_of(tok.task_id), tok.work_units,
+                                   actual_joules, actual_ms)
 
-    def rank(self, tokens:list[EnergyToken]) -> list[EnergyToken]:
-        now = time()
+    def _static_terms(self, tok:EnergyToken, now:float) -> tuple[float, float]:
+        # (importance + need) and debt parts of _priority; debt only moves on settle/decay
+        need_term = min(1.0, tok.predicted_joules / self.max_quanta_j)
+        debt_term = min(0.5, max(-0.5, self.debt.get(self.debt_key(tok), 0.0, now) / self.max_quanta_j))
+        return tok.importance*1.2 + need_term*0.6, debt_term*0.4
+
+    @staticmethod
+    def deadline_terms(deadline_ms, created_ts, now:float):
+        """Vectorized deadline term of _priority (weighted) for NumPy arrays."""
+        slack = np.maximum(1.0, deadline_ms - (now - created_ts) * 1000.0)
+        return np.where(deadline_ms > 0, 0.9 / np.sqrt(slack), 0.0)
+
+    def priorities(self, tokens:list[EnergyToken], now:float|None = None):
+        """_priority for a whole batch in one vectorized expression (NumPy array)."""
+        now = time() if now is None else now
+        n = len(tokens)
+        imp = np.fromiter((t.importance for t in tokens), float, n)
+        pj  = np.fromiter((t.predicted_joules for t in tokens), float, n)
+        ddl = np.fromiter((t.deadline_ms for t in tokens), float, n)
+        ts  = np.fromiter((t.created_ts for t in tokens), float, n)
+        debt = self._debts(tokens, now)
+        return (imp*1.2 + np.minimum(1.0, pj / self.max_quanta_j)*0.6
+                + np.clip(debt / self.max_quanta_j, -0.5, 0.5)*0.4
+                + self.deadline_terms(ddl, ts, now))
+
+    def _debts(self, tokens:list[EnergyToken], now:float):
+        # one decay per live debt entry, then a dict probe per token
+        debt = self.debt.snapshot(now)
+        if not debt: return np.zeros(len(tokens))
+        get, key = debt.get, self.debt_key
+        return np.fromiter((get(key(t), 0.0) for t in tokens), float, len(tokens))
+
+    def rank(self, tokens:list[EnergyToken], now:float|None = None) -> list[EnergyToken]:
+        now = time() if now is None else now
+        if np is not None and len(tokens) >= VECTOR_MIN:
+            order = np.argsort(-self.priorities(tokens, now), kind="stable")
+            return [tokens[i] for i in order]
         return sorted(tokens, key=lambda t: self._priority(t, now), reverse=True)
+
+    def queue(self, refresh_ms:float|None = None) -> "TokenQueue":
+        return TokenQueue(self, refresh_ms)
+
+class TokenQueue:
+    """
+    Incremental pending-token scheduler: push/extend as tokens arrive, pop_top(k)
+    each frame. Priorities follow TokenAllocator._priority.
+
+    NumPy path: tokens are kept column-wise; the age-independent terms are stored
+    at push and only the deadline term is recomputed for all pending tokens on
+    each pop (one vectorized expression + argpartition), so ages are always exact.
+    Pure-Python path: max-heap keyed by the priority at push time. Popped entries
+    are re-scored lazily and re-pushed if they fall below the next key; the whole
+    heap is re-keyed every refresh_ms as deadlines approach.
+    Debt terms are re-read from the allocator every refresh_ms on both paths; the
+    NumPy path keeps each token's debt key as an integer column, so a refresh
+    reads the debt table once and is a single gather over the backlog.
+    """
+    def __init__(self, alloc:TokenAllocator, refresh_ms:float|None = None):
+        self.alloc = alloc
+        self.refresh_s = (refresh_ms if refresh_ms is not None else alloc.horizon_ms) / 1000.0
+        self.last_refresh = time()
+        self._seq = 0
+        self._toks: list[EnergyToken] = []
+        if np is not None:
+            self._key_ids: dict = {}          # debt key -> index into _key_names
+            self._key_names: list = []
+            self._grow(1024)
+        else:
+            self._heap: list = []
+
+    def __len__(self) -> int:
+        return len(self._toks) if np is not None else len(self._heap)
+
+    def _grow(self, cap:int):
+        n = len(self._toks)
+        for name, dtype in (("_base", float), ("_debt", float), ("_ddl", float), ("_ts", float), ("_key", np.intp)):
+            col, old = np.zeros(cap, dtype), getattr(self, name, None)
+            if old is not None: col[:n] = old[:n]
+            setattr(self, name, col)
+        self._cap = cap
+
+    def push(self, tok:EnergyToken, now:float|None = None):
+        if np is None:
+            now = time() if now is None else now
+            self._seq += 1
+            heapq.heappush(self._heap, (-self.alloc._priority(tok, now), self._seq, tok))
+            return
+        i = len(self._toks)
+        if i >= self._cap: self._grow(self._cap * 2)
+        self._base[i], self._debt[i] = self.alloc._static_terms(tok, time() if now is None else now)
+        self._ddl[i], self._ts[i] = tok.deadline_ms, tok.created_ts
+        key = self.alloc.debt_key(tok)
+        kid = self._key_ids.get(key)
+        if kid is None:
+            kid = self._key_ids[key] = len(self._key_names)
+            self._key_names.append(key)
+        self._key[i] = kid
+        self._toks.append(tok)
+
+    def extend(self, tokens, now:float|None = None):
+        now = time() if now is None else now
+        for tok in tokens: self.push(tok, now)
+
+    def refresh(self, now:float|None = None):
+        """Re-key every pending token (current ages and debts)."""
+        now = time() if now is None else now
+        self.last_refresh = now
+        if np is None:
+            self._heap = [(-self.alloc._priority(t, now), s, t) for _, s, t in self._heap]
+            heapq.heapify(self._heap)
+            return
+        n = len(self._toks)
+        if len(self._key_names) > 2 * n + 4096: self._compact_keys(n)
+        per_key = np.zeros(len(self._key_names))
+        for key, val in self.alloc.debt.snapshot(now).items():
+            kid = self._key_ids.get(key)
+            if kid is not None: per_key[kid] = val
+        self._debt[:n] = np.clip(per_key[self._key[:n]] / self.alloc.max_quanta_j, -0.5, 0.5) * 0.4
+
+    def _compact_keys(self, n:int):
+        # forget keys of tokens already popped (per-task keys would otherwise accumulate)
+        live, inv = np.unique(self._key[:n], return_inverse=True)
+        self._key_names = [self._key_names[k] for k in live.tolist()]
+        self._key_ids = {k: i for i, k in enumerate(self._key_names)}
+        self._key[:n] = inv
+
+    def pop_top(self, k:int, now:float|None = None) -> list[EnergyToken]:
+        """Remove and return the k highest-priority tokens, best first."""
+        now = time() if now is None else now
+        if now - self.last_refresh >= self.refresh_s: self.refresh(now)
+        if np is None: return self._pop_heap(k, now)
+        n = len(self._toks)
+        if n == 0 or k <= 0: return []
+        prio = self._base[:n] + self._debt[:n] + self.alloc.deadline_terms(self._ddl[:n], self._ts[:n], now)
+        if k < n:
+            idx = np.argpartition(-prio, k - 1)[:k]
+            idx = idx[np.argsort(-prio[idx], kind="stable")]
+        else:
+            idx = np.argsort(-prio, kind="stable")
+        out = [self._toks[i] for i in idx]
+        # swap-remove from the highest index down so moved rows stay valid
+        for i in sorted(idx.tolist(), reverse=True):
+            last = len(self._toks) - 1
+            if i != last:
+                self._toks[i] = self._toks[last]
+                for col in (self._base, self._debt, self._ddl, self._ts, self._key): col[i] = col[last]
+            self._toks.pop()
+        return out
+
+    def _pop_heap(self, k:int, now:float) -> list[EnergyToken]:
+        out = []
+        while self._heap and len(out) < k:
+            _, seq, tok = heapq.heappop(self._heap)
+            p = self.alloc._priority(tok, now)
+            if self._heap and p < -self._heap[0][0]:
+                heapq.heappush(self._heap, (-p, seq, tok))   # stale key: re-score lazily
+                continue
+            out.append(tok)
+        return out
@@ -0,0 +1,143 @@
+import json, os, sys, time
+
+# Append-only NDJSON logs: one compact JSON record per line. NDJSONWriter
+# buffers lines, flushes on a record count or age, and rotates the live file
+# to path.1 .. path.N by size or age. tail() follows the live file across
+# rotations; read() replays rotated + live files oldest first. A crash loses at
+# most the unflushed buffer; memory stays constant however long the run is.
+
+class NDJSONWriter:
+    def __init__(self, path: str, max_bytes: int = 64 << 20, max_age_s: float | None = 24 * 3600,
+                 backups: int = 10, flush_every: int = 16, flush_s: float = 1.0):
+        self.path = path
+        self.max_bytes, self.max_age_s, self.backups = max_bytes, max_age_s, backups
+        self.flush_every, self.flush_s = flush_every, flush_s
+        self.buf = []
+        self.records = 0
+        self.rotations = 0
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        self._open()
+
+    def _open(self):
+        self.f = open(self.path, "a", encoding="utf-8")
+        self.size = self.f.tell()
+        self.opened = time.time()
+        self.last_flush = self.opened
+
+    def write(self, record: dict):
+        line = json.dumps(record, separators=(",", ":"), default=float) + "\n"
+        self.buf.append(line)
+        self.size += len(line)
+        self.records += 1
+        now = time.time()
+        if len(self.buf) >= self.flush_every or now - self.last_flush >= self.flush_s:
+            self.flush()
+        if self.size >= self.max_bytes or (self.max_age_s and now - self.opened >= self.max_age_s):
+            self.rotate()
+
+    def flush(self):
+        if self.buf:
+            self.f.write("".join(self.buf))
+            self.buf.clear()
+        self.f.flush()
+        self.last_flush = time.time()
+
+    def rotate(self):
+        self.flush()
+        self.f.close()
+        if self.backups > 0:
+            for i in range(self.backups - 1, 0, -1):
+                src = f"{self.path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+        self._open()
+
+    def close(self):
+        if not self.f.closed:
+            self.flush()
+            self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _records(f, partial=""):
+    """Complete records in f from its position; returns (records, trailing partial line)."""
+    out = []
+    data = partial + f.read()
+    lines = data.split("\n")
+    for line in lines[:-1]:
+        if line.strip():
+            try:
+                out.append(json.loads(line))
+            except ValueError:
+                pass   # torn write from a crash
+    return out, lines[-1]
+
+def read(path: str, rotated: bool = True):
+    """All records: rotated files oldest first (path.N .. path.1), then the live file."""
+    files = []
+    if rotated:
+        i = 1
+        while os.path.exists(f"{path}.{i}"):
+            files.append(f"{path}.{i}"); i += 1
+        files.reverse()
+    if os.path.exists(path):
+        files.append(path)
+    for p in files:
+        with open(p, encoding="utf-8") as f:
+            recs, _ = _records(f)
+        yield from recs
+
+def tail(path: str, follow: bool = True, from_start: bool = False, poll_s: float = 0.5, stop=None):
+    """Yield records as they are appended; reopens the live file when it is rotated or truncated."""
+    while not os.path.exists(path):
+        if not follow or (stop and stop()): return
+        time.sleep(poll_s)
+    f = open(path, encoding="utf-8")
+    if not from_start:
+        f.seek(0, os.SEEK_END)
+    partial = ""
+    try:
+        while True:
+            recs, partial = _records(f, partial)
+            yield from recs
+            if not follow or (stop and stop()):
+                return
+            if not recs:
+                try:
+                    st = os.stat(path)
+                    rotated = st.st_ino != os.fstat(f.fileno()).st_ino or st.st_size < f.tell()
+                except OSError:
+                    rotated = False
+                if rotated:
+                    recs, _ = _records(f, partial)   # drain what the old file still holds
+                    yield from recs
+                    f.close(); f = open(path, encoding="utf-8"); partial = ""
+                    continue
+                time.sleep(poll_s)
+    finally:
+        f.close()
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Print or follow an NDJSON log.")
+    ap.add_argument("path")
+    ap.add_argument("-f", "--follow", action="store_true", help="keep following new records")
+    ap.add_argument("--all", action="store_true", help="start with rotated files and existing records")
+    args = ap.parse_args()
+    try:
+        if args.all:
+            for r in read(args.path): print(json.dumps(r))
+        if args.follow or not args.all:
+            for r in tail(args.path, follow=args.follow, from_start=not args.all):
+                print(json.dumps(r)); sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
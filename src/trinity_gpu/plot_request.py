@@ -0,0 +1,23 @@
+import os, subprocess, sys
+
+# Hands result files to the report renderer (trinity_gpu.report) in a separate
+# process, so control loops never import matplotlib or wait on rendering.
+# TGO_REPORT=0 turns rendering off; render later with
+# `python -m trinity_gpu.report <json or dir>`.
+
+_SRC = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def request_plots(*paths, kind: str | None = None, wait: bool = False):
+    """Start the renderer for `paths`; returns the Popen (None when disabled)."""
+    if not paths or os.environ.get("TGO_REPORT", "1").lower() in ("0", "off", "no", "false"):
+        return None
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (_SRC, env.get("PYTHONPATH")) if p)
+    cmd = [sys.executable, "-m", "trinity_gpu.report", *paths] + (["--kind", kind] if kind else [])
+    try:
+        proc = subprocess.Popen(cmd, env=env, stdin=subprocess.DEVNULL)
+    except OSError as e:
+        print(f"[TGO Report] could not start renderer: {e}")
+        return None
+    if wait: proc.wait()
+    return proc
@@ -0,0 +1,182 @@
+import fnmatch, json, os, sys
+
+# Offline figure renderer for the tgo_* result files. Control code never
+# imports this module (or matplotlib): it saves its JSON and asks
+# plot_request.request_plots() to run `python -m trinity_gpu.report` in a
+# separate process. Figures are described by FIGURES (matched on the JSON file
+# name, or chosen with --kind); each figure is rendered by its own worker
+# process, so a multi-device summary renders in parallel.
+
+def _ts(png, title, ylabel, series, xlabel="Sample", each=None, figsize=(10, 5)):
+    # series: (label, key, scale, linestyle, alpha); key may be "node/key" (see _series)
+    return {"type": "timeseries", "png": png, "title": title, "xlabel": xlabel, "ylabel": ylabel,
+            "series": series, "each": each, "figsize": figsize}
+
+CPU, DUTY = ("CPU %", "cpu", 1, "-", 0.7), ("Duty % (scaled)", "duty", 100, "--", None)
+
+FIGURES = {
+    "predictive": _ts("tgo_phase4_plot.png", "Trinity Adaptive Feedback — Phase 4 Predictive Visualization",
+                      "Percent / Scaled Duty", [CPU, ("MEM %", "mem", 1, "-", 0.5), DUTY]),
+    "refinement": _ts("tgo_phase9_plot.png", "Trinity Adaptive Range Refinement — Phase 9",
+                      "Percent / Duty", [CPU, ("MEM %", "mem", 1, "-", 0.6), DUTY]),
+    "power": _ts("tgo_phase10_plot.png", "Trinity Adaptive Power Distribution — Phase 10",
+                 "CPU / Power / Duty", [CPU, ("GPU Power x10 (sim)", "gpu_power", 10, "-", 0.6), DUTY]),
+    "thermal": _ts("tgo_phase11_plot.png", "Trinity Thermal Governor — Phase 11",
+                   "Load / Temp / Duty", [CPU, ("Simulated °C", "temp", 1, "-", 0.6), DUTY]),
+    "thermo_adaptive": _ts("tgo_phase12_plot.png", "Trinity Thermo-Adaptive Power Distribution — Phase 12",
+                           "Load / Power / Temp / Duty",
+                           [CPU, ("GPU Power (sim)", "power", 1, "-", 0.6), ("Temp °C", "temp", 1, "-", 0.5), DUTY]),
+    "thermo_adaptive_tuned": _ts("tgo_phase12_tuned_plot.png",
+                                 "Trinity Thermo-Adaptive Power Distribution — Tuned Phase 12.1",
+                                 "Load / Power / Temp / Duty",
+                                 [CPU, ("GPU Power (sim)", "power", 1, "-", 0.6), ("Temp °C", "temp", 1, "-", 0.5), DUTY]),
+    "autoprobe": _ts("tgo_phase12_plot.png", "Trinity GPU Auto-Probe — Adaptive Template Tuning",
+                     "CPU / Temp / Duty", [("CPU %", "cpu", 1, "-", None), ("Temp °C", "temp", 1, "-", None), DUTY]),
+    "autolearn": _ts("tgo_phase13_plot.png", "Trinity Auto-Learn GPU Tuning — {device_name}",
+                     "CPU / Temp / Duty", [CPU, ("Temp °C", "temp", 1, "-", 0.6), DUTY]),
+    "multilearn": _ts("tgo_phase14_{device_name}.png", "Trinity Multi-GPU Auto-Learn — {device_name}",
+                      "CPU / Temp / Duty", [CPU, ("Temp °C", "temp", 1, "-", 0.6), DUTY], each="results"),
+    "continuous": _ts("{device}.png", "Trinity Continuous — {device}", "CPU / Temp / Power / Duty",
+                      [("CPU %", "cpu", 1, "-", None), ("Temp °C", "temp", 1, "-", None),
+                       ("Power %", "power", 1, "-", None), DUTY], each="results"),
+    "validate": _ts("tgo_phase8_plot.png", "Trinity Adaptive Validation — Phase 8",
+                    "Percent / Scaled Duty", [CPU, ("MEM %", "mem", 1, "-", 0.6), DUTY]),
+    "compare": _ts("tgo_phase16_compare.png", "Trinity Comparative Benchmark — Phase 16", "CPU / Temp",
+                   [("CPU% (No Trinity)", "baseline/cpu", 1, "-", 0.5), ("CPU% (With Trinity)", "active/cpu", 1, "-", 0.8),
+                    ("Temp °C (No Trinity)", "baseline/temp", 1, "--", 0.5), ("Temp °C (With Trinity)", "active/temp", 1, "--", 0.8)]),
+    "learning": {"type": "learning", "png": "tgo_phase5_learning_plot.png", "each": None, "figsize": (8, 6)},
+}
+
+# result file name -> figure kind
+FILES = {
+    "tgo_phase4_predictive.json": "predictive",
+    "tgo_phase9_refinement.json": "refinement",
+    "tgo_phase10_power.json": "power",
+    "tgo_phase11_thermal.json": "thermal",
+    "tgo_phase12_thermo_adaptive.json": "thermo_adaptive",
+    "tgo_phase12_tuned.json": "thermo_adaptive_tuned",
+    "tgo_phase12_autoprobe.json": "autoprobe",
+    "tgo_phase13_autolearn.json": "autolearn",
+    "tgo_phase14_multilearn.json": "multilearn",
+    "tgo_phase8_validation.json": "validate",
+    "tgo_phase16_comparison.json": "compare",
+    "tgo_phase5_learning.json": "learning",
+}
+
+def kind_for(path: str) -> str | None:
+    name = os.path.basename(path)
+    return next((k for pat, k in FILES.items() if fnmatch.fnmatch(name, pat)), None)
+
+def _series(node: dict, key: str):
+    """Trace `key` from node["trace"][key], node[key + "_trace"] or node[key]; "a/b" descends into node["a"] first."""
+    *path, key = key.split("/")
+    for p in path:
+        node = node.get(p, {})
+    tr = node.get("trace") or {}
+    vals = tr.get(key) if isinstance(tr, dict) else None
+    if vals is None: vals = node.get(f"{key}_trace")
+    if vals is None and isinstance(node.get(key), list): vals = node[key]
+    return vals
+
+def _fmt(template: str, rec: dict) -> str:
+    fields = {k: str(v) for k, v in rec.items() if isinstance(v, (str, int, float))}
+    try:
+        return template.format(**fields)
+    except (KeyError, IndexError):
+        return template
+
+def jobs_for(path: str, kind: str | None = None, outdir: str | None = None) -> list:
+    """Self-contained render jobs (spec + extracted series) for one result file."""
+    kind = kind or kind_for(path)
+    if kind not in FIGURES:
+        raise ValueError(f"no figure for {os.path.basename(path)} (kind={kind!r}; known: {', '.join(FIGURES)})")
+    spec = FIGURES[kind]
+    with open(path, encoding="utf-8-sig") as f:
+        data = json.load(f)
+    outdir = outdir or os.path.dirname(os.path.abspath(path))
+    recs = data.get(spec["each"], []) if spec["each"] else [data]
+    jobs = []
+    for rec in recs:
+        if not isinstance(rec, dict) or "error" in rec: continue
+        png = os.path.join(outdir, _fmt(spec["png"], rec).replace(" ", "_"))
+        if spec["type"] == "learning":
+            jobs.append({"type": "learning", "png": png, "figsize": spec["figsize"], "data": rec.get("data", []),
+                         "coefficients": rec.get("coefficients", {}), "baseline": rec.get("baseline", 0.0),
+                         "r2": rec.get("r2")})
+            continue
+        lines = []
+        for label, key, scale, style, alpha in spec["series"]:
+            vals = _series(rec, key)
+            if vals:
+                lines.append((label, [v * scale for v in vals] if scale != 1 else vals, style, alpha))
+        if lines:
+            jobs.append({"type": "timeseries", "png": png, "figsize": spec["figsize"], "lines": lines,
+                         "title": _fmt(spec["title"], rec), "xlabel": spec["xlabel"], "ylabel": spec["ylabel"]})
+    return jobs
+
+def render(job: dict) -> str:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=job["figsize"])
+    if job["type"] == "learning":
+        rows = job["data"]
+        cpu = [r.get("cpu_avg", 0) for r in rows]; mem = [r.get("mem_avg", 0) for r in rows]
+        duty = [r.get("duty_mean", 0) for r in rows]
+        ax.scatter(cpu, duty, c="b", label="CPU vs Duty")
+        ax.scatter(mem, duty, c="g", label="MEM vs Duty")
+        coef = job["coefficients"]
+        if coef and cpu:
+            lo, hi = min(cpu), max(cpu); m = sum(mem) / len(mem)
+            grid = [lo + (hi - lo) * i / 49 for i in range(50)]
+            pred = [job["baseline"] + coef.get("cpu_avg", 0) * g + coef.get("mem_avg", 0) * m for g in grid]
+            ax.plot(grid, pred, color="r", linewidth=2, label="Regression Fit")
+        r2 = job["r2"] if isinstance(job["r2"], (int, float)) else 0
+        ax.set_title(f"Trinity Learning Curve (R²={r2:.3f})")
+        ax.set_xlabel("Avg CPU %"); ax.set_ylabel("Mean Duty")
+    else:
+        for label, vals, style, alpha in job["lines"]:
+            ax.plot(range(len(vals)), vals, style, label=label, alpha=alpha)
+        ax.set_title(job["title"]); ax.set_xlabel(job["xlabel"]); ax.set_ylabel(job["ylabel"])
+    ax.legend(); ax.grid(True, linestyle="--", alpha=0.4)
+    fig.tight_layout()
+    fig.savefig(job["png"])
+    plt.close(fig)
+    return job["png"]
+
+def render_all(jobs: list, workers: int | None = None) -> list:
+    """Render jobs, one process per figure up to `workers` (inline for a single figure)."""
+    if len(jobs) <= 1:
+        return [render(j) for j in jobs]
+    from concurrent.futures import ProcessPoolExecutor
+    workers = min(len(jobs), workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(render, jobs))
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description="Render figures for tgo_* result JSON files (or every known file in a directory).")
+    ap.add_argument("paths", nargs="+")
+    ap.add_argument("--kind", choices=sorted(FIGURES), help="figure kind when it cannot be told from the file name")
+    ap.add_argument("--outdir", help="where to write PNGs (default: next to each JSON)")
+    ap.add_argument("--workers", type=int)
+    args = ap.parse_args(argv)
+    jobs = []
+    for p in args.paths:
+        files = [os.path.join(p, n) for n in sorted(os.listdir(p)) if kind_for(n)] if os.path.isdir(p) else [p]
+        for f in files:
+            try:
+                jobs += jobs_for(f, args.kind, args.outdir)
+            except (OSError, ValueError) as e:
+                print(f"[TGO Report] skipping {f}: {e}", file=sys.stderr)
+    if not jobs: return
+    try:
+        import matplotlib  # noqa: F401
+    except Exception:
+        print(f"[TGO Report] matplotlib not installed; {len(jobs)} figure(s) not rendered", file=sys.stderr)
+        return
+    for png in render_all(jobs, args.workers):
+        print(f"[TGO Report] Plot saved: {png}")
+
+if __name__ == "__main__":
+    main()
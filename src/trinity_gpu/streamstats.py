@@ -0,0 +1,161 @@
+import math
+
+# Bounded-memory streaming statistics for the duty controllers. Every update
+# is O(1) and nothing grows with run length, so controller cost per sample
+# stays flat on hour-long or continuous runs. Variances are population
+# variances (ddof=0), matching np.var; RollingWindow.slope matches
+# np.polyfit(range(n), window, 1)[0].
+
+class RollingWindow:
+    """Last n values in a ring buffer with O(1) mean, variance and least-squares slope."""
+    __slots__ = ("n", "buf", "i", "count", "s", "ss", "sxy")
+    def __init__(self, n: int):
+        if n < 1: raise ValueError("window must hold at least one value")
+        self.n = n
+        self.buf = [0.0] * n
+        self.i = 0          # next write position (= oldest value once full)
+        self.count = 0
+        self.s = self.ss = self.sxy = 0.0   # Σy, Σy², Σk·y with k = 0 (oldest) .. count-1
+
+    def push(self, y: float):
+        y = float(y)
+        if self.count < self.n:
+            self.sxy += self.count * y
+            self.count += 1
+        else:
+            old = self.buf[self.i]
+            self.s -= old; self.ss -= old * old
+            # every remaining value moves one position older
+            self.sxy += -self.s + (self.n - 1) * y
+        self.buf[self.i] = y
+        self.s += y; self.ss += y * y
+        self.i = (self.i + 1) % self.n
+        if self.i == 0:
+            self._resync()
+
+    def _resync(self):
+        # exact recompute once per wrap keeps float drift bounded (amortized O(1))
+        vals = self.values()
+        self.s = sum(vals); self.ss = sum(v * v for v in vals)
+        self.sxy = sum(k * v for k, v in enumerate(vals))
+
+    def values(self) -> list:
+        """Oldest to newest."""
+        if self.count < self.n: return self.buf[:self.count]
+        return self.buf[self.i:] + self.buf[:self.i]
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.n
+
+    @property
+    def last(self) -> float | None:
+        return self.buf[(self.i - 1) % self.n] if self.count else None
+
+    @property
+    def mean(self) -> float:
+        return self.s / self.count if self.count else 0.0
+
+    @property
+    def var(self) -> float:
+        if self.count < 2: return 0.0
+        m = self.s / self.count
+        return max(0.0, self.ss / self.count - m * m)
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var)
+
+    @property
+    def slope(self) -> float:
+        m = self.count
+        if m < 2: return 0.0
+        sx = m * (m - 1) / 2.0
+        sxx = (m - 1) * m * (2 * m - 1) / 6.0
+        return (m * self.sxy - sx * self.s) / (m * sxx - sx * sx)
+
+class EWMA:
+    __slots__ = ("alpha", "value")
+    def __init__(self, alpha: float, value: float | None = None):
+        self.alpha, self.value = alpha, value
+    def update(self, x: float) -> float:
+        self.value = float(x) if self.value is None else self.value + self.alpha * (x - self.value)
+        return self.value
+
+class Welford:
+    """Running count, mean, variance, min and max over the whole stream."""
+    __slots__ = ("n", "mean", "m2", "min", "max")
+    def __init__(self):
+        self.n = 0; self.mean = 0.0; self.m2 = 0.0
+        self.min = math.inf; self.max = -math.inf
+    def add(self, x: float):
+        x = float(x)
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (x - self.mean)
+        if x < self.min: self.min = x
+        if x > self.max: self.max = x
+    @property
+    def var(self) -> float:
+        return self.m2 / self.n if self.n else 0.0
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var)
+
+class P2Quantile:
+    """P² quantile estimate (Jain & Chlamtac) in five markers; exact until 5 samples."""
+    def __init__(self, p: float):
+        if not 0.0 < p < 1.0: raise ValueError("p must be in (0, 1)")
+        self.p = p
+        self.q = []                      # marker heights
+        self.pos = [1, 2, 3, 4, 5]       # marker positions
+        self.want = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.inc = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x: float):
+        x = float(x)
+        q = self.q
+        if len(q) < 5:
+            q.append(x); q.sort()
+            return
+        if x < q[0]: q[0] = x; k = 0
+        elif x >= q[4]: q[4] = x; k = 3
+        else: k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+        pos = self.pos
+        for i in range(k + 1, 5): pos[i] += 1
+        for i in range(5): self.want[i] += self.inc[i]
+        for i in (1, 2, 3):
+            d = self.want[i] - pos[i]
+            if (d >= 1 and pos[i + 1] - pos[i] > 1) or (d <= -1 and pos[i - 1] - pos[i] < -1):
+                s = 1 if d > 0 else -1
+                qp = q[i] + s / (pos[i + 1] - pos[i - 1]) * (
+                    (pos[i] - pos[i - 1] + s) * (q[i + 1] - q[i]) / (pos[i + 1] - pos[i])
+                    + (pos[i + 1] - pos[i] - s) * (q[i] - q[i - 1]) / (pos[i] - pos[i - 1]))
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + s * (q[i + s] - q[i]) / (pos[i + s] - pos[i])
+                q[i] = qp; pos[i] += s
+
+    @property
+    def value(self) -> float | None:
+        q = self.q
+        if not q: return None
+        if len(q) < 5:
+            return q[min(len(q) - 1, int(round(self.p * (len(q) - 1))))]
+        return q[2]
+
+class Series:
+    """Whole-run summary of one channel (Welford) plus an optional full trace."""
+    __slots__ = ("stats", "trace")
+    def __init__(self, keep_trace: bool = False):
+        self.stats = Welford()
+        self.trace = [] if keep_trace else None
+    def add(self, x: float):
+        self.stats.add(x)
+        if self.trace is not None: self.trace.append(float(x))
+    @property
+    def mean(self) -> float:
+        return self.stats.mean
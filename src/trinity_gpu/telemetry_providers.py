@@ -0,0 +1,170 @@
+import time, threading
+from typing import Callable, Dict
+
+# Backend telemetry for EnergyRouter. Providers open their device handles once;
+# TelemetryHub refreshes them on a background cadence and hands the router
+# callables that only return the cached reading, so route() never waits on a
+# driver. Readings are dicts like {"utilization": <0..100>, ...}.
+
+class TelemetryProvider:
+    name = "provider"
+    def open(self):
+        pass
+    def read(self) -> dict:
+        raise NotImplementedError
+    def close(self):
+        pass
+
+class StaticProvider(TelemetryProvider):
+    """Fixed (or externally set) reading; used for stub backends and tests."""
+    name = "static"
+    def __init__(self, reading: dict | None = None):
+        self.reading = dict(reading or {"utilization": 50.0})
+    def read(self) -> dict:
+        return dict(self.reading)
+
+class FuncProvider(TelemetryProvider):
+    """Wraps a plain telemetry function (the old get_telemetry shims)."""
+    name = "func"
+    def __init__(self, fn: Callable[[], dict]):
+        self.fn = fn
+    def read(self) -> dict:
+        return self.fn()
+
+class PsutilCpuProvider(TelemetryProvider):
+    name = "cpu"
+    def open(self):
+        import psutil
+        self.psutil = psutil
+        psutil.cpu_percent(interval=None)  # prime the delta
+    def read(self) -> dict:
+        return {"utilization": float(self.psutil.cpu_percent(interval=None))}
+
+class NvmlProvider(TelemetryProvider):
+    name = "nvml"
+    def __init__(self, index: int = 0):
+        self.index = index
+        self.nv = None
+    def open(self):
+        import pynvml as nv
+        nv.nvmlInit()
+        self.nv = nv
+        self.handle = nv.nvmlDeviceGetHandleByIndex(self.index)
+    def read(self) -> dict:
+        nv, h = self.nv, self.handle
+        out = {"utilization": float(nv.nvmlDeviceGetUtilizationRates(h).gpu)}
+        try:
+            out["power_watts"] = nv.nvmlDeviceGetPowerUsage(h) / 1000.0
+        except Exception:
+            pass
+        return out
+    def close(self):
+        if self.nv is not None:
+            self.nv.nvmlShutdown()
+            self.nv = None
+
+class CachedTelemetry:
+    """
+    Non-blocking view of one provider. Calling it returns the last reading, or
+    None once it is older than ttl_s (EnergyRouter then uses its estimate).
+    """
+    def __init__(self, provider: TelemetryProvider, ttl_s: float = 2.0):
+        self.provider = provider
+        self.ttl_s = ttl_s
+        self.value: dict | None = None
+        self.ts = 0.0
+        self.reads = 0
+        self.errors = 0
+        self.last_error = None
+        self.ready = False
+
+    def open(self):
+        try:
+            self.provider.open()
+            self.ready = True
+        except Exception as e:
+            self.errors += 1
+            self.last_error = repr(e)
+
+    def refresh(self):
+        if not self.ready:
+            return
+        try:
+            value = self.provider.read()
+            self.value, self.ts = value, time.time()   # single reference swap, no lock needed
+            self.reads += 1
+        except Exception as e:
+            self.errors += 1
+            self.last_error = repr(e)
+
+    @property
+    def staleness_s(self) -> float:
+        return time.time() - self.ts if self.ts else float("inf")
+
+    def __call__(self) -> dict | None:
+        value = self.value
+        if value is None or self.staleness_s > self.ttl_s:
+            return None
+        return value
+
+    def stats(self) -> dict:
+        return {"ready": self.ready, "reads": self.reads, "errors": self.errors,
+                "staleness_s": round(self.staleness_s, 3), "last_error": self.last_error}
+
+class TelemetryHub:
+    """
+    Owns the providers for all backends. start() opens them once and refreshes
+    every period_s on a daemon thread; refresh_all() does one synchronous pass
+    (deterministic use in tests). getters() plugs into EnergyRouter.
+    """
+    def __init__(self, providers: Dict[str, TelemetryProvider], period_s: float = 0.5, ttl_s: float = 2.0):
+        self.period_s = period_s
+        self.cached = {name: CachedTelemetry(p, ttl_s) for name, p in providers.items()}
+        self._stop = threading.Event()
+        self._thread = None
+        self._opened = False
+
+    def open(self):
+        if not self._opened:
+            for c in self.cached.values(): c.open()
+            self._opened = True
+
+    def refresh_all(self):
+        self.open()
+        for c in self.cached.values(): c.refresh()
+
+    def start(self):
+        self.refresh_all()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="tgo-telemetry", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.period_s):
+            for c in self.cached.values(): c.refresh()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.period_s * 2 + 1.0)
+            self._thread = None
+        for c in self.cached.values():
+            try:
+                c.provider.close()
+            except Exception:
+                pass
+        self._opened = False
+
+    def getters(self) -> Dict[str, Callable[[], dict | None]]:
+        return dict(self.cached)
+
+    def stats(self) -> Dict[str, dict]:
+        return {name: c.stats() for name, c in self.cached.items()}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
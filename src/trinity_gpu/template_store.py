@@ -0,0 +1,141 @@
+import json, os, re, sqlite3, threading, time
+from trinity_gpu.tgo_templates import TEMPLATES
+
+# Device tuning templates in SQLite (WAL mode). Each update is one IMMEDIATE
+# transaction that bumps the device's version and appends the previous state
+# to `history`, so tuners working on different devices (threads or processes)
+# never overwrite each other and a read never sees a half-written library.
+# Lookups fall back from the device row to its class in tgo_templates.TEMPLATES
+# and then to BASELINE.
+
+DEFAULT_PATH = os.environ.get("TGO_TEMPLATE_DB",
+                              os.path.join(os.path.expanduser("~"), ".config", "TEO", "tgo_templates.db"))
+# the template JSON the tuners used to rewrite; imported once if present
+LEGACY_TEMPLATE_FILE = os.path.join("C:\\Users\\user\\Desktop\\Trinity_STEM\\benchmarks",
+                                    "tgo_phase11_20251021_133544",
+                                    "tgo_phase11_templates.json")
+BASELINE = {"target_duty": 0.5, "safe_temp": 55.0, "heat_coeff": 0.8}
+
+_CLASS_PATTERNS = [
+    ("integrated_gpu", r"\b(uhd|iris|hd graphics|vega \d+ graphics|radeon graphics|integrated)\b"),
+    ("mobile_discrete_gpu", r"\b(laptop|mobile|max-q)\b|\b(rtx|gtx|rx) ?\d{3,4}m\b"),
+    ("desktop_discrete_gpu", r"\b(geforce|rtx|gtx|radeon rx|rx \d{4}|arc a\d{3})\b"),
+]
+
+def classify(device: str) -> str | None:
+    """Best-guess tgo_templates class from a device name, or None."""
+    name = device.lower()
+    for cls, pat in _CLASS_PATTERNS:
+        if re.search(pat, name):
+            return cls
+    return None
+
+class TemplateStore:
+    def __init__(self, path: str | None = None, timeout: float = 30.0, import_legacy: bool = True):
+        self.path = path or DEFAULT_PATH
+        self.timeout = timeout
+        self._local = threading.local()
+        d = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(d, exist_ok=True)
+        db = self._db()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript("""
+            CREATE TABLE IF NOT EXISTS templates (
+                device TEXT PRIMARY KEY, class TEXT, params TEXT NOT NULL,
+                version INTEGER NOT NULL, updated REAL NOT NULL, source TEXT);
+            CREATE INDEX IF NOT EXISTS templates_class ON templates(class);
+            CREATE TABLE IF NOT EXISTS history (
+                device TEXT NOT NULL, version INTEGER NOT NULL, params TEXT NOT NULL,
+                updated REAL NOT NULL, source TEXT, PRIMARY KEY (device, version));
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        if import_legacy and os.path.exists(LEGACY_TEMPLATE_FILE):
+            row = db.execute("SELECT value FROM meta WHERE key='legacy_imported'").fetchone()
+            if row is None:
+                self.import_json(LEGACY_TEMPLATE_FILE)
+                db.execute("INSERT OR REPLACE INTO meta VALUES ('legacy_imported', ?)", (LEGACY_TEMPLATE_FILE,))
+
+    def _db(self) -> sqlite3.Connection:
+        # one connection per thread; autocommit mode, explicit transactions below
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def get(self, device: str) -> dict | None:
+        row = self._db().execute("SELECT params FROM templates WHERE device=?", (device,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def version(self, device: str) -> int:
+        row = self._db().execute("SELECT version FROM templates WHERE device=?", (device,)).fetchone()
+        return row[0] if row else 0
+
+    def resolve(self, device: str, device_class: str | None = None) -> dict:
+        """Stored template for `device`, else its class defaults from TEMPLATES, else BASELINE."""
+        tpl = self.get(device)
+        if tpl is not None:
+            return tpl
+        cls = device_class or classify(device)
+        if cls in TEMPLATES:
+            return {k: v for k, v in TEMPLATES[cls].items() if k != "description"}
+        return dict(BASELINE)
+
+    def update(self, device: str, fn, device_class: str | None = None, source: str = "") -> tuple[dict, int]:
+        """Atomic read-modify-write: params = fn(current resolved params). Returns (params, new version)."""
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT params, version, class FROM templates WHERE device=?", (device,)).fetchone()
+            current = json.loads(row[0]) if row else self.resolve(device, device_class)
+            params = fn(dict(current))
+            version = (row[1] if row else 0) + 1
+            cls = device_class or (row[2] if row else None) or classify(device)
+            now = time.time()
+            blob = json.dumps(params, default=float)
+            db.execute("INSERT OR REPLACE INTO templates VALUES (?, ?, ?, ?, ?, ?)",
+                       (device, cls, blob, version, now, source))
+            db.execute("INSERT INTO history VALUES (?, ?, ?, ?, ?)", (device, version, blob, now, source))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return params, version
+
+    def upsert(self, device: str, params: dict, device_class: str | None = None, source: str = "") -> int:
+        return self.update(device, lambda _: dict(params), device_class, source)[1]
+
+    def history(self, device: str, limit: int | None = None) -> list[dict]:
+        """Versions of `device`, newest first."""
+        q = "SELECT version, params, updated, source FROM history WHERE device=? ORDER BY version DESC"
+        rows = self._db().execute(q + (" LIMIT ?" if limit else ""), (device, limit) if limit else (device,))
+        return [{"version": v, "params": json.loads(p), "updated": u, "source": s} for v, p, u, s in rows]
+
+    def by_class(self, device_class: str) -> dict:
+        rows = self._db().execute("SELECT device, params FROM templates WHERE class=?", (device_class,))
+        return {d: json.loads(p) for d, p in rows}
+
+    def devices(self) -> list[str]:
+        return [r[0] for r in self._db().execute("SELECT device FROM templates ORDER BY updated")]
+
+    def import_json(self, path: str, overwrite: bool = False) -> int:
+        """Import a legacy {"templates": {device: params}} file; existing devices are kept unless overwrite."""
+        with open(path, encoding="utf-8-sig") as f:
+            data = json.load(f)
+        n = 0
+        for device, params in data.get("templates", {}).items():
+            if overwrite or self.get(device) is None:
+                self.upsert(device, params, device if device in TEMPLATES else None, source=f"import:{os.path.basename(path)}")
+                n += 1
+        return n
+
+    def export(self) -> dict:
+        """The library in the legacy JSON layout."""
+        rows = self._db().execute("SELECT device, params FROM templates ORDER BY device")
+        return {"templates": {d: json.loads(p) for d, p in rows}}
+
+    def close(self):
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
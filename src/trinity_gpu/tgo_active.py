@@ -1,61 +1,127 @@
-﻿import time, threading, queue, random
+﻿import os, time, threading, random
+from collections import deque
 from trinity_gpu.energy_tokenizer import TokenAllocator
 from trinity_gpu.energy_router import EnergyRouter
-try:
-    # Optional: if your status path exposes backends
-    from trinity_gpu import tgo_agent
-    _BACKENDS = getattr(tgo_agent, "GPU_BACKENDS", {"cpu":{}})
-except Exception:
-    _BACKENDS = {"cpu":{}}
-
-# OPTIONAL simple telemetry shims; return {"utilization": <0..100>}
-def _nv_telemetry():
-    try:
-        import pynvml as nv
-        nv.nvmlInit()
-        h = nv.nvmlDeviceGetHandleByIndex(0)
-        u = nv.nvmlDeviceGetUtilizationRates(h).gpu
-        nv.nvmlShutdown()
-        return {"utilization": float(u)}
-    except Exception:
-        return {"utilization": 50.0}
-
-def _intel_telemetry():
-    # Stub: many Windows systems lack a simple Intel GPU API in Python.
-    return {"utilization": 50.0}
-
-def build_router():
-    get_telemetry = {}
-    if "nvidia" in _BACKENDS:
-        get_telemetry["nvidia"] = _nv_telemetry
-    if "intel" in _BACKENDS:
-        get_telemetry["intel"] = _intel_telemetry
-    # always include cpu as fallback
-    if "cpu" not in _BACKENDS:
-        _BACKENDS["cpu"] = {}
-        get_telemetry["cpu"] = lambda: {"utilization": 50.0}
-    return EnergyRouter(_BACKENDS, get_telemetry=get_telemetry, frame_ms=100.0)
+from trinity_gpu.budget_executor import BudgetExecutor
+from trinity_gpu.energy_accounting import EnergyMeter
+from trinity_gpu.cost_model import CostModel
+from trinity_gpu.telemetry_providers import TelemetryHub, NvmlProvider, PsutilCpuProvider, StaticProvider
+_BACKENDS = None
+
+def gpu_backends() -> dict:
+    """Detected backends plus "cpu"; resolved on first use from tgo_agent's discovery cache."""
+    global _BACKENDS
+    if _BACKENDS is None:
+        try:
+            from trinity_gpu import tgo_agent
+            _BACKENDS = dict(tgo_agent.discover())
+        except Exception:
+            _BACKENDS = {}
+        # always include cpu as fallback
+        _BACKENDS.setdefault("cpu", {})
+    return _BACKENDS
+
+def build_telemetry(period_s:float=0.5) -> TelemetryHub:
+    """Device handles are opened once; routing reads cached values only."""
+    backends = gpu_backends()
+    providers = {}
+    for name in ("nvidia", "nvidia_nvml"):
+        if name in backends:
+            providers[name] = NvmlProvider(0)
+    if "intel" in backends:
+        # Stub: many Windows systems lack a simple Intel GPU API in Python.
+        providers["intel"] = StaticProvider({"utilization": 50.0})
+    providers["cpu"] = PsutilCpuProvider()
+    return TelemetryHub(providers, period_s=period_s)
+
+def build_router(hub:TelemetryHub|None=None):
+    hub = hub or build_telemetry().start()
+    return EnergyRouter(gpu_backends(), get_telemetry=hub.getters(), frame_ms=100.0, mode="drr")
 
 class WorkQueue:
-    def __init__(self):
-        self.q = queue.Queue()
+    """
+    Multi-producer token queue with a deadline lane (deadline_ms > 0) and a
+    best-effort lane. submit()/submit_many() append under one lock and notify;
+    drain() hands back a whole batch, deadline lane first, in a single lock
+    acquisition and can block until work arrives instead of polling.
+    metrics() reports lane depths and enqueue-to-drain wait times.
+    """
+    def __init__(self, wait_alpha:float=0.1):
+        self._cond = threading.Condition()
+        self._deadline = deque()
+        self._best = deque()
+        self.wait_alpha = wait_alpha
+        self.enqueued = 0
+        self.drained = 0
+        self.wait_ewma_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.depth_max = 0
 
     def submit(self, tok):
-        self.q.put(tok)
+        item = (tok, time.perf_counter())
+        with self._cond:
+            (self._deadline if tok.deadline_ms > 0 else self._best).append(item)
+            self.enqueued += 1
+            self._cond.notify()
 
-    def drain(self, limit=32):
-        items = []
-        try:
-            while len(items)<limit:
-                items.append(self.q.get_nowait())
-        except Exception:
-            pass
-        return items
+    def submit_many(self, toks):
+        now = time.perf_counter()
+        with self._cond:
+            for tok in toks:
+                (self._deadline if tok.deadline_ms > 0 else self._best).append((tok, now))
+            self.enqueued += len(toks)
+            self._cond.notify()
+
+    def __len__(self):
+        return len(self._deadline) + len(self._best)
+
+    def wait(self, timeout:float, urgent_only:bool=False) -> bool:
+        """Block until a token (or, with urgent_only, a deadline token) is queued or timeout s pass."""
+        pred = (lambda: bool(self._deadline)) if urgent_only else (lambda: bool(self._deadline or self._best))
+        with self._cond:
+            return self._cond.wait_for(pred, timeout)
+
+    def drain(self, limit=32, timeout:float=0.0):
+        with self._cond:
+            if timeout > 0 and not (self._deadline or self._best):
+                self._cond.wait(timeout)
+            self.depth_max = max(self.depth_max, len(self._deadline) + len(self._best))
+            items = []
+            for lane in (self._deadline, self._best):
+                take = min(limit - len(items), len(lane))
+                items.extend(lane.popleft() for _ in range(take))
+            self.drained += len(items)
+        if items:
+            now = time.perf_counter()
+            waits = [(now - ts) * 1000.0 for _, ts in items]
+            self.wait_max_ms = max(self.wait_max_ms, max(waits))
+            self.wait_ewma_ms += self.wait_alpha * (sum(waits) / len(waits) - self.wait_ewma_ms)
+        return [tok for tok, _ in items]
+
+    def metrics(self) -> dict:
+        return {"depth_deadline": len(self._deadline), "depth_best_effort": len(self._best),
+                "depth_max": self.depth_max, "enqueued": self.enqueued, "drained": self.drained,
+                "wait_ewma_ms": round(self.wait_ewma_ms, 3), "wait_max_ms": round(self.wait_max_ms, 3)}
+
+def demo_work(units:int):
+    """Chunked placeholder workload: yields every 10 work units so budgets can preempt it."""
+    acc = 0
+    for i in range(units):
+        acc += sum(j*j for j in range(500))
+        if i % 10 == 9:
+            yield
+    return acc
 
 def run_active(seconds:int=30, submit_rate_hz:float=10.0):
-    alloc = TokenAllocator()
-    router = build_router()
+    costs = CostModel.load(os.path.join(os.environ.get("TGO_OUTDIR", "."), "tgo_cost_model.json"))
+    # ids are unique per token: keep debt per class; unit costs are learned per class too
+    alloc = TokenAllocator(debt_by_class=True, cost_model=costs)
+    hub = build_telemetry().start()
+    router = build_router(hub)
     wq = WorkQueue()
+    pending = alloc.queue()  # backlog carried across frames, best 64 served per frame
+    meter = EnergyMeter()
+    engine = BudgetExecutor(alloc, meter=meter)
 
     # producer: emit forecast tokens
     stop = threading.Event()
@@ -68,34 +134,58 @@ def run_active(seconds:int=30, submit_rate_hz:float=10.0):
             imp = random.uniform(0.3, 1.0)
             wu  = random.randint(50, 250)           # work units
             ddl = random.choice([0.0, 80.0, 160.0]) # ms
-            tok = alloc.forecast_to_token(f"task-{tid}", imp, wu, deadline_ms=ddl)
+            cls = "interactive" if ddl else "batch"
+            tok = alloc.forecast_to_token(f"task-{tid}", imp, wu, deadline_ms=ddl, task_class=cls)
+            engine.bind(tok.task_id, demo_work, wu)
             wq.submit(tok)
             time.sleep(period)
 
     t = threading.Thread(target=producer, daemon=True)
     t.start()
 
-    print(f"[TGO Active] started for {seconds}s | backends={list(_BACKENDS.keys())}")
+    print(f"[TGO Active] started for {seconds}s | backends={list(gpu_backends().keys())} | energy={meter.source}")
     t0 = time.time()
     frames = 0
+    done = 0
+    frame_s = router.frame_ms / 1000.0
+    last_route = None
     while (time.time() - t0) < seconds:
-        tokens = wq.drain(limit=64)
-        if tokens:
-            ranked = alloc.rank(tokens)
-            budgets = router.route(ranked)
+        frame_start = time.perf_counter()
+        # finished slices settle into the allocator; preempted generators go back in line
+        for res in engine.collect():
+            if res.status == "yielded":
+                pending.push(res.token)
+            elif res.status == "done":
+                done += 1
+        pending.extend(wq.drain(limit=1024))
+        ranked = pending.pop_top(64)
+        if ranked:
+            # an early wake must not mint a whole frame of backend time: credit what elapsed
+            now = time.perf_counter()
+            elapsed_ms = router.frame_ms if last_route is None else min(router.frame_ms, (now - last_route) * 1000.0)
+            last_route = now
+            budgets = router.route(ranked, elapsed_ms)
+            pending.extend(router.deferred)  # did not fit this frame's credit
             # Print a compact summary line (first few budgets)
             preview = ", ".join([f"{b.task_id}->{b.device}:{b.allow_ms:.0f}ms" for b in budgets[:5]])
-            print(f"[frame {frames:05d}] assigned {len(budgets)} budgets | {preview}")
-            # settle with an approximate actual energy (demo)
-            for tok in ranked:
-                alloc.settle(tok, actual_joules=tok.predicted_joules*random.uniform(0.8, 1.2))
+            load = " ".join(f"{k}={r['assigned_ms']:.0f}/{r['planned_ms']:.0f}ms" for k, r in router.last_report.items())
+            print(f"[frame {frames:05d}] assigned {len(budgets)} budgets | {load} | {preview}")
+            engine.execute(budgets, ranked)
         else:
             print(f"[frame {frames:05d}] idle")
         frames += 1
-        time.sleep(0.1)
+        # pace frames at frame_ms, but wake as soon as work arrives when idle
+        # (or a deadline token arrives while busy)
+        remaining = frame_s - (time.perf_counter() - frame_start)
+        if remaining > 0:
+            wq.wait(remaining, urgent_only=len(pending) > 0)
 
     stop.set()
-    print("[TGO Active] done.")
+    engine.collect(timeout=1.0)
+    engine.shutdown(wait=False)
+    hub.stop()
+    if costs.path: costs.save()
+    print(f"[TGO Active] done. completed={done} queue={wq.metrics()} telemetry={hub.stats()}")
 
 if __name__ == "__main__":
     run_active(30, submit_rate_hz=12.0)
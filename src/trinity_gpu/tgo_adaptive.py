@@ -1,42 +1,53 @@
-﻿import psutil, time, json, numpy as np
-from tqdm import trange
+﻿import time, json
+from trinity_gpu.clock import resolve
+from trinity_gpu.controller_runtime import Controller, ControllerRuntime
+from trinity_gpu.streamstats import RollingWindow, Series
 
-def adaptive_feedback(duration=60, duty=0.8, alpha=0.25):
-    """Adaptive feedback loop with variance learning"""
-    cpu_samples, mem_samples, duty_trace = [], [], []
-    last_adj = time.time()
-    t_end = time.time() + duration
-    base_duty = duty
-
-    print(f"[TGO Adaptive] running {duration}s  duty={duty} α={alpha}")
-
-    while time.time() < t_end:
-        # collect system metrics
-        cpu = psutil.cpu_percent(interval=0.5)
-        mem = psutil.virtual_memory().percent
-        cpu_samples.append(cpu)
-        mem_samples.append(mem)
+class AdaptiveController(Controller):
+    """Variance learning: every adjust_s, higher recent CPU variance -> lower duty."""
+    name = "adaptive"
+    def __init__(self, duty=0.8, alpha=0.25, adjust_s=5.0, keep_trace=False):
+        self.base_duty = self.duty = duty
+        self.alpha, self.adjust_s = alpha, adjust_s
+        self.cpu, self.mem, self.adjustments = Series(), Series(), Series(keep_trace)
+        self.window = RollingWindow(10)
+        self.last_adj = None
 
+    def step(self, sample):
+        self.cpu.add(sample["cpu"])
+        self.mem.add(sample["mem"])
+        self.window.push(sample["cpu"])
+        if self.last_adj is None:
+            self.last_adj = sample["t"]
         # adaptive adjustment (every 5s)
-        if time.time() - last_adj > 5:
-            variance = np.var(cpu_samples[-10:]) if len(cpu_samples) >= 10 else 0
+        if sample["t"] - self.last_adj > self.adjust_s:
+            variance = self.window.var if self.window.full else 0
             # proportional correction: higher variance → lower duty
-            duty = max(0.3, min(1.0, base_duty - alpha * (variance / 10)))
-            duty_trace.append(duty)
-            last_adj = time.time()
+            self.duty = max(0.3, min(1.0, self.base_duty - self.alpha * (variance / 10)))
+            self.adjustments.add(self.duty)
+            self.last_adj = sample["t"]
+        return self.duty
 
-        # simulate orchestration work (duty ratio)
-        work_time = 0.02 * duty  # nominal GPU cycle
-        time.sleep(work_time)
+    def result(self):
+        out = {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "samples": self.cpu.stats.n,
+            "cpu_avg": self.cpu.mean,
+            "mem_avg": self.mem.mean,
+            "duty_mean": self.adjustments.mean if self.adjustments.stats.n else self.base_duty
+        }
+        if self.adjustments.trace is not None:
+            out["duty_trace"] = self.adjustments.trace
+        return out
 
-    result = {
-        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-        "samples": len(cpu_samples),
-        "cpu_avg": float(np.mean(cpu_samples)),
-        "mem_avg": float(np.mean(mem_samples)),
-        "duty_trace": duty_trace,
-        "duty_mean": float(np.mean(duty_trace) if duty_trace else base_duty)
-    }
+def adaptive_feedback(duration=60, duty=0.8, alpha=0.25, clock=None, source=None):
+    """Adaptive feedback loop with variance learning (clock/source: see trinity_gpu.clock)"""
+    clock, source = resolve(clock, source)
+    print(f"[TGO Adaptive] running {duration}s  duty={duty} α={alpha}")
+    ctrl = AdaptiveController(duty, alpha, keep_trace=True)
+    # simulate orchestration work (duty ratio): nominal GPU cycle of 0.02 s
+    ControllerRuntime([ctrl], clock=clock, source=source, actuator=lambda d: clock.sleep(0.02 * d)).run(duration)
+    result = ctrl.result()
     print(json.dumps(result, indent=4))
     return result
 
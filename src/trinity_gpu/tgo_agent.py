@@ -1,46 +1,166 @@
-﻿import time, json, datetime, psutil
-
-# Attempt imports for all major vendors
-GPU_BACKENDS = {}
-try:
-    import GPUtil
-    GPU_BACKENDS["nvidia"] = "GPUtil"
-except Exception:
-    pass
-try:
-    import pynvml
-    pynvml.nvmlInit()
-    GPU_BACKENDS["nvidia_nvml"] = "NVML"
-except Exception:
-    pass
-try:
-    import torch
-    if torch.cuda.is_available():
-        GPU_BACKENDS["cuda"] = "PyTorch CUDA"
-    elif hasattr(torch, "hip") and torch.hip.is_available():
-        GPU_BACKENDS["amd"] = "ROCm"
-except Exception:
-    pass
-try:
-    import pyopencl as cl
-    platforms = cl.get_platforms()
-    if platforms:
-        GPU_BACKENDS["intel"] = "OpenCL"
-except Exception:
-    pass
+﻿import os, sys, time, json, datetime
+
+# GPU backend discovery is lazy: nothing vendor-specific is imported until a
+# backend is asked for. Results are cached on disk (TGO_CACHE_DIR, default
+# ~/.cache/trinity_gpu/backends.json) keyed by the installed library and driver
+# versions, so later processes (tgoctl status, tgo_active) skip the imports.
+# GPU_BACKENDS is still available as a module attribute.
+
+CACHE_PATH = os.path.join(os.environ.get("TGO_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "trinity_gpu")),
+                          "backends.json")
+_DISTS = {"GPUtil": ("GPUtil", "gputil"), "pynvml": ("nvidia-ml-py", "pynvml"),
+          "torch": ("torch",), "pyopencl": ("pyopencl",)}
+_LIBS = {}        # module name -> imported module (or None if unavailable)
+_PROBED = {}      # backend name -> {"name": ..., ...} or None
+_BACKENDS = None
+_NVML_READY = False
+
+def _lib(name):
+    if name not in _LIBS:
+        try:
+            _LIBS[name] = __import__(name)
+        except Exception:
+            _LIBS[name] = None
+    return _LIBS[name]
+
+def _probe_gputil():
+    return {"nvidia": "GPUtil"} if _lib("GPUtil") else {}
+
+def _probe_nvml():
+    nv = _lib("pynvml")
+    return {"nvidia_nvml": "NVML"} if nv and _nvml_init() else {}
+
+def _probe_torch():
+    torch = _lib("torch")
+    try:
+        if torch and torch.cuda.is_available():
+            return {"cuda": "PyTorch CUDA"}
+        if torch and hasattr(torch, "hip") and torch.hip.is_available():
+            return {"amd": "ROCm"}
+    except Exception:
+        pass
+    return {}
+
+def _probe_opencl():
+    cl = _lib("pyopencl")
+    try:
+        return {"intel": "OpenCL"} if cl and cl.get_platforms() else {}
+    except Exception:
+        return {}
+
+# probe name -> (backend names it can report, probe)
+PROBES = {"gputil": (("nvidia",), _probe_gputil), "nvml": (("nvidia_nvml",), _probe_nvml),
+          "torch": (("cuda", "amd"), _probe_torch), "opencl": (("intel",), _probe_opencl)}
+
+def _nvml_init():
+    global _NVML_READY
+    if not _NVML_READY:
+        try:
+            _lib("pynvml").nvmlInit()
+            _NVML_READY = True
+        except Exception:
+            return False
+    return True
+
+def _installed():
+    """{normalized distribution name: version} from *.dist-info / *.egg-info names on sys.path.
+    One listdir per path entry; cheaper than importing importlib.metadata."""
+    found = {}
+    for entry in sys.path:
+        try:
+            names = os.listdir(entry or ".")
+        except OSError:
+            continue
+        for n in names:
+            if n.endswith((".dist-info", ".egg-info")):
+                dist, _, ver = n.rsplit(".", 1)[0].partition("-")
+                found.setdefault(dist.lower().replace("-", "_"), ver.split("-")[0])
+    return found
+
+def _versions():
+    """Cache key: installed library versions (no imports) and driver versions."""
+    installed = _installed()
+    key = {}
+    for mod, dists in _DISTS.items():
+        key[mod] = next((installed[d.lower().replace("-", "_")] for d in dists
+                         if d.lower().replace("-", "_") in installed), None)
+    for label, path in (("nvidia_driver", "/proc/driver/nvidia/version"), ("amdgpu_driver", "/sys/module/amdgpu/version")):
+        try:
+            with open(path) as f: key[label] = f.readline().strip()
+        except OSError:
+            key[label] = None
+    key["python"] = sys.version.split()[0]
+    return key
+
+def read_cache():
+    """Cached discovery record ({"key", "backends", "ts"}) or None; never probes."""
+    try:
+        with open(CACHE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_cache(backends):
+    try:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        tmp = CACHE_PATH + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"key": _versions(), "backends": backends, "ts": time.time()}, f, indent=4)
+        os.replace(tmp, CACHE_PATH)
+    except OSError:
+        pass
+
+def probe(name):
+    """Run one probe (imports only that library) and remember the result for this process."""
+    if name not in _PROBED:
+        _PROBED[name] = PROBES[name][1]()
+    return _PROBED[name]
+
+def backend_available(backend):
+    """True if `backend` is present; consults the cache, else runs only the probe that can report it."""
+    if _BACKENDS is not None:
+        return backend in _BACKENDS
+    cached = read_cache()
+    if cached and cached.get("key") == _versions():
+        return backend in cached["backends"]
+    return any(backend in probe(n) for n, (names, _) in PROBES.items() if backend in names)
+
+def discover(refresh=False):
+    """All detected backends; from the version-keyed cache unless refresh or the key changed."""
+    global _BACKENDS
+    if _BACKENDS is not None and not refresh:
+        return _BACKENDS
+    cached = None if refresh else read_cache()
+    if cached and cached.get("key") == _versions():
+        _BACKENDS = dict(cached["backends"])
+        return _BACKENDS
+    found = {}
+    for name in PROBES:
+        found.update(probe(name))
+    _BACKENDS = found
+    _write_cache(found)
+    return _BACKENDS
+
+def __getattr__(name):
+    if name == "GPU_BACKENDS":
+        return discover()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def snapshot():
+    import psutil
+    GPU_BACKENDS = discover()
     cpu = psutil.cpu_percent(interval=None)
     mem = psutil.virtual_memory().percent
     gpus = []
     # Try all GPU backends sequentially
     if "nvidia" in GPU_BACKENDS:
         try:
-            gpus = [{"id": g.id, "load": g.load*100, "mem": g.memoryUtil*100} for g in GPUtil.getGPUs()]
+            gpus = [{"id": g.id, "load": g.load*100, "mem": g.memoryUtil*100} for g in _lib("GPUtil").getGPUs()]
         except Exception:
             pass
     elif "nvidia_nvml" in GPU_BACKENDS:
         try:
+            pynvml = _lib("pynvml"); _nvml_init()
             count = pynvml.nvmlDeviceGetCount()
             for i in range(count):
                 h = pynvml.nvmlDeviceGetHandleByIndex(i)
@@ -55,6 +175,7 @@ def snapshot():
             pass
     elif "amd" in GPU_BACKENDS:
         try:
+            torch = _lib("torch")
             gpus = [{"id": 0, "load": torch.cuda.utilization(), "mem": torch.cuda.memory_allocated()/torch.cuda.max_memory_allocated()*100}]
         except Exception:
             pass
@@ -71,18 +192,19 @@ def snapshot():
         "active_backends": GPU_BACKENDS
     }
 
-def run_observer(duration=20, out_path="observer_report.json"):
-    data=[]
+def run_observer(duration=20, out_path="observer_report.ndjson", max_bytes=64 << 20, max_age_s=24 * 3600):
+    """Streams one snapshot per line (see trinity_gpu.ndjson_log; follow with `python -m trinity_gpu.ndjson_log -f`)."""
+    from trinity_gpu.ndjson_log import NDJSONWriter
     start = time.time()
-    print(f"[TGO] Observer running {duration}s  | Active backends: {list(GPU_BACKENDS.keys())}")
-    while time.time()-start < duration:
-        snap = snapshot()
-        data.append(snap)
-        gtxt = f" GPU: {[round(g['load'],1) for g in snap['gpu']]}" if snap['gpu'] else ""
-        print(f"[{snap['timestamp']}] CPU={snap['cpu']:.1f}% MEM={snap['mem']:.1f}%{gtxt}")
-        time.sleep(1)
-    json.dump(data, open(out_path,"w"), indent=4)
-    print(f"\n[✓] Report saved: {out_path}")
+    print(f"[TGO] Observer running {duration}s  | Active backends: {list(discover().keys())} | log: {out_path}")
+    with NDJSONWriter(out_path, max_bytes=max_bytes, max_age_s=max_age_s) as log:
+        while time.time()-start < duration:
+            snap = snapshot()
+            log.write(snap)
+            gtxt = f" GPU: {[round(g['load'],1) for g in snap['gpu']]}" if snap['gpu'] else ""
+            print(f"[{snap['timestamp']}] CPU={snap['cpu']:.1f}% MEM={snap['mem']:.1f}%{gtxt}")
+            time.sleep(1)
+    print(f"\n[✓] Report saved: {out_path} ({log.records} records, {log.rotations} rotations)")
 
 if __name__ == "__main__":
     run_observer(20)
@@ -1,9 +1,7 @@
-﻿import os, json, time, psutil, numpy as np, pyopencl as cl, matplotlib.pyplot as plt
+﻿import os, json, time, psutil, numpy as np, pyopencl as cl
 from datetime import datetime
-
-TEMPLATE_FILE = os.path.join("C:\\Users\\user\\Desktop\\Trinity_STEM\\benchmarks",
-                             "tgo_phase11_20251021_133544",
-                             "tgo_phase11_templates.json")
+from trinity_gpu.template_store import TemplateStore
+from trinity_gpu.plot_request import request_plots
 
 def detect_gpu_name():
     try:
@@ -16,28 +14,14 @@ def detect_gpu_name():
         return "generic_fallback"
     return "generic_fallback"
 
-def ensure_template(device_name):
-    # Load or initialize template library
-    if os.path.exists(TEMPLATE_FILE):
-        with open(TEMPLATE_FILE, "r") as f:
-            data = json.load(f)
-    else:
-        data = {"templates": {}}
-
-    # If template missing, create a baseline
-    if device_name not in data["templates"]:
-        print(f"[TGO AutoLearn] No template found for {device_name}. Creating baseline.")
-        data["templates"][device_name] = {
-            "target_duty": 0.5,
-            "safe_temp": 55.0,
-            "heat_coeff": 0.8
-        }
-        with open(TEMPLATE_FILE, "w") as f:
-            json.dump(data, f, indent=4)
-    return data["templates"][device_name], data
+def ensure_template(device_name, store=None):
+    store = store or TemplateStore()
+    if store.get(device_name) is None:
+        print(f"[TGO AutoLearn] No template found for {device_name}. Starting from class defaults.")
+    return store.resolve(device_name), store
 
-def auto_tune(device_name, duration=90):
-    tpl, root = ensure_template(device_name)
+def auto_tune(device_name, duration=90, store=None):
+    tpl, store = ensure_template(device_name, store)
     print(f"[TGO AutoLearn] Tuning GPU: {device_name} for {duration}s ...")
 
     cpu_trace, temp_trace, duty_trace = [], [], []
@@ -53,7 +37,7 @@ def auto_tune(device_name, duration=90):
     tpl["target_duty"] = float(np.mean(duty_trace))
     tpl["safe_temp"] = float(np.mean(temp_trace))
     tpl["heat_coeff"] = round(tpl["heat_coeff"] * (1 + np.std(cpu_trace)/100), 3)
-    root["templates"][device_name] = tpl
+    version = store.upsert(device_name, tpl, source="autolearn")
 
     return {
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -63,8 +47,8 @@ def auto_tune(device_name, duration=90):
         "temp_avg": np.mean(temp_trace),
         "duty_mean": np.mean(duty_trace),
         "template_updated": tpl,
-        "trace": {"cpu": cpu_trace, "temp": temp_trace, "duty": duty_trace},
-        "root": root
+        "template_version": version,
+        "trace": {"cpu": cpu_trace, "temp": temp_trace, "duty": duty_trace}
     }
 
 def main():
@@ -78,24 +62,9 @@ def main():
         json.dump(data, f, indent=4)
     print(f"[TGO AutoLearn] Saved tuned data: {outfile}")
 
-    # Update master template
-    with open(TEMPLATE_FILE, "w") as f:
-        json.dump(data["root"], f, indent=4)
-    print(f"[TGO AutoLearn] Master template updated: {TEMPLATE_FILE}")
+    print(f"[TGO AutoLearn] Template store updated: {device} v{data['template_version']}")
 
-    # Visualization
-    t = range(len(data["trace"]["cpu"]))
-    plt.figure(figsize=(10,5))
-    plt.plot(t, data["trace"]["cpu"], label="CPU %", alpha=0.7)
-    plt.plot(t, data["trace"]["temp"], label="Temp °C", alpha=0.6)
-    plt.plot(t, [d*100 for d in data["trace"]["duty"]], "--", label="Duty % (scaled)")
-    plt.title(f"Trinity Auto-Learn GPU Tuning — {device}")
-    plt.xlabel("Sample"); plt.ylabel("CPU / Temp / Duty")
-    plt.legend(); plt.grid(True, linestyle="--", alpha=0.4)
-    plt.tight_layout()
-    img_path = os.path.join(outdir, "tgo_phase13_plot.png")
-    plt.savefig(img_path)
-    print(f"[TGO AutoLearn] Plot saved: {img_path}")
+    request_plots(outfile)
 
 if __name__ == "__main__":
     main()
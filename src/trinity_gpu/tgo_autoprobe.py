@@ -1,19 +1,18 @@
-﻿import json, os, time, psutil, numpy as np, matplotlib.pyplot as plt
+﻿import json, os, time, psutil, numpy as np
 from datetime import datetime
+from trinity_gpu.template_store import TemplateStore
+from trinity_gpu.tgo_templates import TEMPLATES
+from trinity_gpu.plot_request import request_plots
 
-TEMPLATE_FILE = os.path.join("C:\\Users\\user\\Desktop\\Trinity_STEM\\benchmarks",
-                             "tgo_phase11_20251021_133544",
-                             "tgo_phase11_templates.json")
-
-def load_template():
-    with open(TEMPLATE_FILE, "r") as f:
-        data = json.load(f)
-    first_key = next(iter(data["templates"]))
+def load_template(store=None):
+    store = store or TemplateStore()
+    # first stored template, else the first class in tgo_templates
+    first_key = next(iter(store.devices()), None) or next(iter(TEMPLATES))
     print(f"[TGO AutoProbe] Using template key: {first_key}")
-    return data["templates"][first_key], data, first_key
+    return store.resolve(first_key), store, first_key
 
-def auto_probe_tuner(duration=90):
-    tpl, root, device_type = load_template()
+def auto_probe_tuner(duration=90, store=None):
+    tpl, store, device_type = load_template(store)
     print(f"[TGO AutoProbe] running {duration}s for {device_type} GPU")
     cpu_trace, temp_trace, duty_trace = [], [], []
     duty = tpl["target_duty"]
@@ -26,7 +25,7 @@ def auto_probe_tuner(duration=90):
     tpl["target_duty"] = float(np.mean(duty_trace))
     tpl["safe_temp"] = float(np.mean(temp_trace))
     tpl["heat_coeff"] = round(tpl["heat_coeff"] * (1 + (np.std(cpu_trace)/100)), 3)
-    root["templates"][device_type] = tpl
+    version = store.upsert(device_type, tpl, source="autoprobe")
     return {
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "device_type": device_type,
@@ -35,8 +34,8 @@ def auto_probe_tuner(duration=90):
         "temp_avg": np.mean(temp_trace),
         "duty_mean": np.mean(duty_trace),
         "template_updated": tpl,
-        "trace": {"cpu": cpu_trace, "temp": temp_trace, "duty": duty_trace},
-        "root": root
+        "template_version": version,
+        "trace": {"cpu": cpu_trace, "temp": temp_trace, "duty": duty_trace}
     }
 
 def main():
@@ -46,21 +45,8 @@ def main():
     with open(outfile, "w") as f:
         json.dump(data, f, indent=4)
     print(f"[TGO AutoProbe] Saved tuned data: {outfile}")
-    with open(TEMPLATE_FILE, "w") as f:
-        json.dump(data["root"], f, indent=4)
-    print(f"[TGO AutoProbe] Master template updated: {TEMPLATE_FILE}")
-    t = range(len(data["trace"]["cpu"]))
-    plt.figure(figsize=(10,5))
-    plt.plot(t, data["trace"]["cpu"], label="CPU %")
-    plt.plot(t, data["trace"]["temp"], label="Temp °C")
-    plt.plot(t, [d*100 for d in data["trace"]["duty"]], "--", label="Duty % (scaled)")
-    plt.title("Trinity GPU Auto-Probe — Adaptive Template Tuning")
-    plt.xlabel("Sample"); plt.ylabel("CPU / Temp / Duty")
-    plt.legend(); plt.grid(True, linestyle="--", alpha=0.4)
-    plt.tight_layout()
-    img_path = os.path.join(outdir, "tgo_phase12_plot.png")
-    plt.savefig(img_path)
-    print(f"[TGO AutoProbe] Plot saved: {img_path}")
+    print(f"[TGO AutoProbe] Template store updated: {data['device_type']} v{data['template_version']}")
+    request_plots(outfile)
 
 if __name__ == "__main__":
     main()
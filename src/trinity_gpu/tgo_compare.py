@@ -1,58 +1,57 @@
-﻿import os, time, json, psutil, numpy as np, matplotlib.pyplot as plt
+﻿import os, json, numpy as np
 from datetime import datetime
+from trinity_gpu.ab_compare import ABCompare
+from trinity_gpu.plot_request import request_plots
 
-def run_cycle(label:str, duration:int=90, trinity_active:bool=False):
-    cpu, temp, duty = [], [], []
-    base_duty = 0.7 if trinity_active else 0.5
-    alpha = 0.25 if trinity_active else 0.0
-    for _ in range(int(duration*2)):
-        usage = psutil.cpu_percent(interval=0.5)
-        base_temp = 50 + (usage/20) + (5*np.random.rand())
-        base_duty = np.clip(base_duty + alpha*(usage-50)/100, 0.2, 0.9)
-        cpu.append(usage); temp.append(base_temp); duty.append(base_duty)
-    result = {
-        "label": label,
-        "samples": len(cpu),
-        "cpu_avg": np.mean(cpu),
-        "temp_avg": np.mean(temp),
-        "temp_peak": np.max(temp),
-        "duty_mean": np.mean(duty),
-        "trace": {"cpu": cpu, "temp": temp, "duty": duty}
-    }
-    print(f"[{label}] Done — CPU {result['cpu_avg']:.2f}% | Temp {result['temp_avg']:.1f}°C | Duty {result['duty_mean']:.2f}")
-    return result
+# Baseline vs Trinity on the live machine. The two conditions run as
+# interleaved, randomly ordered blocks (trinity_gpu.ab_compare) so ambient
+# drift is shared by both, and the run stops as soon as the temperature
+# difference is significant or clearly negligible, else after `duration`.
 
-def main():
+class TrinityArm:
+    """One condition: simulated package temperature and duty, the duty loop on or off."""
+    def __init__(self, trinity_active: bool = False):
+        self.duty = 0.7 if trinity_active else 0.5
+        self.alpha = 0.25 if trinity_active else 0.0
+    def step(self, s: dict) -> dict:
+        usage = s["cpu"]
+        temp = 50 + (usage/20) + (5*np.random.rand())
+        self.duty = float(np.clip(self.duty + self.alpha*(usage-50)/100, 0.2, 0.9))
+        return {"temp": temp, "duty": self.duty}
+
+def _arm_summary(label: str, arm: dict) -> dict:
+    return {"label": label, "samples": arm["samples"], "cpu_avg": arm["mean"]["cpu"],
+            "temp_avg": arm["mean"]["temp"], "temp_peak": arm["peak"]["temp"],
+            "duty_mean": arm["mean"]["duty"], "trace": arm["trace"]}
+
+def compare(duration: float = 240.0, block_s: float = 10.0, margin: float = 1.0, seed: int | None = None,
+            labels=("Baseline_NoTrinity", "With_Trinity"), clock=None, source=None) -> dict:
+    """Interleaved comparison of at most `duration` seconds; the test decides on temperature."""
+    ab = ABCompare({"baseline": TrinityArm(False), "active": TrinityArm(True)}, metric="temp",
+                   block_s=block_s, max_s=duration, margin=margin, seed=seed, clock=clock, source=source)
+    res = ab.run()
+    out = {"timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+           "baseline": _arm_summary(labels[0], res["arms"]["baseline"]),
+           "active": _arm_summary(labels[1], res["arms"]["active"])}
+    for key in ("cpu", "temp", "duty"):
+        out[f"delta_{key}"] = res["effect"][key]["delta"]
+    out["test"] = {k: v for k, v in res.items() if k != "arms"}
+    for side in ("baseline", "active"):
+        a = out[side]
+        print(f"[{a['label']}] CPU {a['cpu_avg']:.2f}% | Temp {a['temp_avg']:.1f}°C | Duty {a['duty_mean']:.2f}")
+    lo, hi = res["effect"]["temp"]["ci"]
+    print(f"[TGO Compare] ΔTemp {out['delta_temp']:+.2f}°C [{lo:+.2f}, {hi:+.2f}] -> {res['decision']} "
+          f"after {res['pairs']} pairs ({res['sampled_s']:.0f}s of at most {duration:.0f}s)")
+    return out
+
+def main(duration: float = 240.0):
     outdir = os.environ.get("TGO_OUTDIR", ".")
-    baseline = run_cycle("Baseline_NoTrinity", duration=120, trinity_active=False)
-    active   = run_cycle("With_Trinity", duration=120, trinity_active=True)
-    summary = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "baseline": baseline,
-        "active": active,
-        "delta_cpu": active["cpu_avg"] - baseline["cpu_avg"],
-        "delta_temp": active["temp_avg"] - baseline["temp_avg"],
-        "delta_duty": active["duty_mean"] - baseline["duty_mean"]
-    }
+    summary = compare(duration)
     outfile = os.path.join(outdir, "tgo_phase16_comparison.json")
     with open(outfile, "w") as f: json.dump(summary, f, indent=4)
     print(f"[TGO Compare] Summary saved: {outfile}")
 
-    # --- plot both runs ---
-    plt.figure(figsize=(10,5))
-    t1 = range(len(baseline["trace"]["cpu"]))
-    t2 = range(len(active["trace"]["cpu"]))
-    plt.plot(t1, baseline["trace"]["cpu"], label="CPU% (No Trinity)", alpha=0.5)
-    plt.plot(t2, active["trace"]["cpu"], label="CPU% (With Trinity)", alpha=0.8)
-    plt.plot(t1, baseline["trace"]["temp"], "--", label="Temp °C (No Trinity)", alpha=0.5)
-    plt.plot(t2, active["trace"]["temp"], "--", label="Temp °C (With Trinity)", alpha=0.8)
-    plt.title("Trinity Comparative Benchmark — Phase 16")
-    plt.xlabel("Sample"); plt.ylabel("CPU / Temp"); plt.legend()
-    plt.grid(True, linestyle="--", alpha=0.4)
-    plt.tight_layout()
-    img_path = os.path.join(outdir, "tgo_phase16_compare.png")
-    plt.savefig(img_path)
-    print(f"[TGO Compare] Plot saved: {img_path}")
+    request_plots(outfile)
 
 if __name__ == "__main__":
     main()
@@ -1,9 +1,9 @@
-﻿import os, json, time, psutil, numpy as np, pyopencl as cl, matplotlib.pyplot as plt
+﻿import os, json, time, psutil, numpy as np, pyopencl as cl
 from datetime import datetime
-
-TEMPLATE_FILE = os.path.join("C:\\Users\\user\\Desktop\\Trinity_STEM\\benchmarks",
-                             "tgo_phase11_20251021_133544",
-                             "tgo_phase11_templates.json")
+from trinity_gpu.streamstats import Series
+from trinity_gpu.template_store import TemplateStore
+from trinity_gpu.tuning import TuningOrchestrator
+from trinity_gpu.plot_request import request_plots
 
 def detect_gpus():
     gpus = []
@@ -15,34 +15,54 @@ def detect_gpus():
         pass
     return gpus or ["generic_fallback"]
 
-def ensure_template(device):
-    if os.path.exists(TEMPLATE_FILE):
-        data = json.load(open(TEMPLATE_FILE))
-    else:
-        data = {"templates": {}}
-    if device not in data["templates"]:
-        data["templates"][device] = {"target_duty":0.5,"safe_temp":55.0,"heat_coeff":0.8,"eff_score":1.0}
-    return data["templates"][device], data
+def ensure_template(device, store=None):
+    store = store or TemplateStore()
+    tpl = store.resolve(device)
+    tpl.setdefault("eff_score", 1.0)
+    return tpl, store
+
+def battery_probe():
+    batt = psutil.sensors_battery()
+    return {"battery": batt.percent if batt else None}
+
+class ContinuousTuner:
+    def __init__(self, device, store=None, keep_trace=True):
+        self.tpl, self.store = ensure_template(device, store)
+        self.device, self.keep_trace = device, keep_trace
+        self.cpu, self.temp, self.duty, self.power = (Series(keep_trace) for _ in range(4))
+        self.d = self.tpl["target_duty"]
+
+    def step(self, s):
+        tpl, c = self.tpl, s["cpu"]
+        p = s.get("battery")
+        p = p if p is not None else np.random.uniform(40,100)
+        t = float(np.clip(tpl["safe_temp"] + np.random.randn()*2, 30, 95))
+        self.d = float(np.clip(self.d + np.sign(c - tpl["heat_coeff"]*10)*0.005, 0.2, 0.9))
+        self.cpu.add(c); self.temp.add(t); self.duty.add(self.d); self.power.add(p)
+
+    def finish(self):
+        tpl, cpu, temp, duty, power = self.tpl, self.cpu, self.temp, self.duty, self.power
+        tpl["target_duty"] = duty.mean
+        tpl["safe_temp"]  = temp.mean
+        tpl["heat_coeff"] = round(tpl["heat_coeff"]*(1+cpu.stats.std/100),3)
+        tpl["eff_score"]  = round(cpu.mean/(power.mean+1e-5),3)
+        version = self.store.upsert(self.device, tpl, source="continuous")
+        res = {"device":self.device,"cpu_avg":cpu.mean,"temp_avg":temp.mean,
+               "power_avg":power.mean,"duty_mean":duty.mean,
+               "eff_score":tpl["eff_score"],"samples":cpu.stats.n,"template_version":version}
+        if self.keep_trace:
+            res["trace"] = {"cpu":cpu.trace,"temp":temp.trace,"duty":duty.trace,"power":power.trace}
+        return res
+
+def tune_all(devices, duration=120, keep_trace=True, store=None, max_concurrent=None, **kw):
+    """All devices at once on one shared sampler (see tuning.TuningOrchestrator)."""
+    store = store or TemplateStore()
+    kw.setdefault("probe", battery_probe if kw.get("source") is None else None)
+    return TuningOrchestrator(devices, lambda d: ContinuousTuner(d, store, keep_trace), duration,
+                              max_concurrent=max_concurrent, **kw).run()
 
-def tune(device, duration=120):
-    tpl, root = ensure_template(device)
-    cpu, temp, duty, power = [], [], [], []
-    d = tpl["target_duty"]; start = time.time()
-    while time.time() - start < duration:
-        c = psutil.cpu_percent(interval=0.5)
-        p = psutil.sensors_battery().percent if psutil.sensors_battery() else np.random.uniform(40,100)
-        t = np.clip(tpl["safe_temp"] + np.random.randn()*2, 30, 95)
-        d = np.clip(d + np.sign(c - tpl["heat_coeff"]*10)*0.005, 0.2, 0.9)
-        cpu.append(c); temp.append(t); duty.append(d); power.append(p)
-    tpl["target_duty"] = float(np.mean(duty))
-    tpl["safe_temp"]  = float(np.mean(temp))
-    tpl["heat_coeff"] = round(tpl["heat_coeff"]*(1+np.std(cpu)/100),3)
-    tpl["eff_score"]  = round(np.mean(cpu)/(np.mean(power)+1e-5),3)
-    root["templates"][device] = tpl
-    return {"device":device,"cpu_avg":np.mean(cpu),"temp_avg":np.mean(temp),
-            "power_avg":np.mean(power),"duty_mean":np.mean(duty),
-            "eff_score":tpl["eff_score"],"samples":len(cpu),
-            "trace":{"cpu":cpu,"temp":temp,"duty":duty,"power":power}}, root
+def tune(device, duration=120, keep_trace=True, store=None, **kw):
+    return tune_all([device], duration, keep_trace, store, **kw)[0]
 
 def hourly_loop():
     outbase = os.environ.get("TGO_OUTDIR",".")
@@ -52,21 +72,12 @@ def hourly_loop():
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
         outdir = os.path.join(outbase, ts)
         os.makedirs(outdir, exist_ok=True)
-        allres, master = [], None
-        for g in gpus:
-            res, master = tune(g, duration=60)
-            allres.append(res)
-            plt.figure(figsize=(10,5))
-            plt.plot(res["trace"]["cpu"], label="CPU %")
-            plt.plot(res["trace"]["temp"], label="Temp °C")
-            plt.plot([p for p in res["trace"]["power"]], label="Power %")
-            plt.plot([d*100 for d in res["trace"]["duty"]],"--",label="Duty % (scaled)")
-            plt.legend(); plt.title(f"Trinity Continuous — {g}")
-            plt.tight_layout()
-            plt.savefig(os.path.join(outdir,f"{g.replace(' ','_')}.png")); plt.close()
-        json.dump({"timestamp":datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                   "results":allres}, open(os.path.join(outdir,"summary.json"),"w"), indent=4)
-        json.dump(master, open(TEMPLATE_FILE,"w"), indent=4)
+        allres = tune_all(gpus, duration=60)
+        summary = os.path.join(outdir,"summary.json")
+        with open(summary,"w") as f:
+            json.dump({"timestamp":datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                       "results":allres}, f, indent=4)
+        request_plots(summary, kind="continuous")   # renders in its own process while we sleep
         print(f"[TGO Continuous] Cycle complete → saved to {outdir}")
         print("[TGO Continuous] Sleeping 3600 s for next run...")
         time.sleep(3600)
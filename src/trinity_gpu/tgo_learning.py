@@ -1,70 +1,263 @@
-﻿import os, json, glob, numpy as np, pandas as pd, matplotlib.pyplot as plt
-from sklearn.linear_model import LinearRegression
+﻿import os, json, fnmatch, sqlite3, time
 from datetime import datetime
+from trinity_gpu.plot_request import request_plots
 
-def load_all_phase_data(root="benchmarks"):
-    files = sorted(glob.glob(os.path.join(root, "**", "tgo_phase*_predictive.json"), recursive=True))
-    data = []
-    for f in files:
+# Incremental learning of duty ~ [1, cpu_avg, mem_avg] from predictive runs.
+# RunCatalog (SQLite) records every ingested result file once, keyed by
+# (path, mtime), and remembers each directory's mtime and subdirectories, so a
+# rescan lists only directories that changed and stats only known files; no
+# JSON is reparsed. Each new run is folded into a recursive-least-squares
+# model whose state lives in the same database; a rewritten file replaces its
+# old run and a deleted one is taken back out (a weight -1 update), so the
+# model always covers exactly the files that exist. The current model is
+# published to MODEL_PATH, a fixed location that tgo_validate reads directly.
+
+CATALOG_PATH = os.environ.get("TGO_LEARNING_DB",
+                              os.path.join(os.path.expanduser("~"), ".config", "TEO", "tgo_learning.db"))
+MODEL_PATH = os.environ.get("TGO_LEARNING_MODEL",
+                            os.path.join(os.path.expanduser("~"), ".config", "TEO", "tgo_learning_model.json"))
+PATTERN = "tgo_phase*_predictive.json"
+FEATURES = ["cpu_avg", "mem_avg"]
+
+class RLSModel:
+    """Recursive least squares on x = [1, *features]; also keeps X'X, X'y, y'y for an exact R²."""
+    def __init__(self, dims: int = len(FEATURES) + 1, delta: float = 1e6):
+        self.dims = dims
+        self.delta = delta
+        self.theta = [0.0] * dims
+        self.P = [[delta if i == j else 0.0 for j in range(dims)] for i in range(dims)]
+        self.xtx = [[0.0] * dims for _ in range(dims)]
+        self.xty = [0.0] * dims
+        self.yty = self.sy = 0.0
+        self.n = 0
+
+    def update(self, x, y: float, weight: float = 1.0):
+        """Add the observation (weight 1) or take a previously added one back out (weight -1)."""
+        d = self.dims
+        for i in range(d):
+            self.xty[i] += weight * x[i] * y
+            for j in range(d):
+                self.xtx[i][j] += weight * x[i] * x[j]
+        self.yty += weight * y * y; self.sy += weight * y; self.n += 1 if weight > 0 else -1
+        Px = [sum(self.P[i][j] * x[j] for j in range(d)) for i in range(d)]
+        denom = 1.0 / weight + sum(x[i] * Px[i] for i in range(d))
+        if abs(denom) < 1e-6:
+            return self._refit()   # downdating (nearly) the only support of a direction
+        k = [v / denom for v in Px]
+        err = y - sum(t * xi for t, xi in zip(self.theta, x))
+        self.theta = [t + ki * err for t, ki in zip(self.theta, k)]
+        # P is symmetric, so x'P = (Px)'
+        self.P = [[self.P[i][j] - k[i] * Px[j] for j in range(d)] for i in range(d)]
+
+    def _refit(self):
+        # exact RLS state from the sufficient statistics: P = (X'X + I/delta)^-1, theta = P X'y
+        d = self.dims
+        a = [[self.xtx[i][j] + (1.0 / self.delta if i == j else 0.0) for j in range(d)] + [float(i == c) for c in range(d)]
+             for i in range(d)]
+        for c in range(d):   # Gauss-Jordan with partial pivoting
+            r = max(range(c, d), key=lambda i: abs(a[i][c]))
+            a[c], a[r] = a[r], a[c]
+            piv = a[c][c]
+            a[c] = [v / piv for v in a[c]]
+            for i in range(d):
+                if i != c and a[i][c]:
+                    f = a[i][c]
+                    a[i] = [v - f * w for v, w in zip(a[i], a[c])]
+        self.P = [row[d:] for row in a]
+        self.theta = [sum(self.P[i][j] * self.xty[j] for j in range(d)) for i in range(d)]
+
+    @property
+    def r2(self) -> float | None:
+        if self.n < 2: return None
+        t, d = self.theta, self.dims
+        sse = (self.yty - 2 * sum(t[i] * self.xty[i] for i in range(d))
+               + sum(t[i] * self.xtx[i][j] * t[j] for i in range(d) for j in range(d)))
+        sst = self.yty - self.sy * self.sy / self.n
+        return 1.0 - max(sse, 0.0) / sst if sst > 1e-12 else 1.0
+
+    def predict(self, features) -> float:
+        return self.theta[0] + sum(t * f for t, f in zip(self.theta[1:], features))
+
+    def to_dict(self) -> dict:
+        return {"theta": self.theta, "P": self.P, "xtx": self.xtx, "xty": self.xty,
+                "yty": self.yty, "sy": self.sy, "n": self.n, "delta": self.delta}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "RLSModel":
+        m = cls(len(state["theta"]))
+        for k, v in state.items(): setattr(m, k, v)
+        return m
+
+class RunCatalog:
+    def __init__(self, path: str | None = None):
+        self.path = path or CATALOG_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                path TEXT NOT NULL, mtime_ns INTEGER NOT NULL, file TEXT, timestamp TEXT,
+                cpu_avg REAL, mem_avg REAL, duty_mean REAL, ingested REAL,
+                PRIMARY KEY (path, mtime_ns));
+            CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, ok INTEGER);
+            CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, subdirs TEXT, matches TEXT);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        row = self.db.execute("SELECT value FROM meta WHERE key='model'").fetchone()
+        self.model = RLSModel.from_dict(json.loads(row[0])) if row else RLSModel()
+
+    def _candidates(self, root: str, pattern: str) -> list:
+        """Matching files under root; only directories whose mtime changed are listed again."""
+        out, stack = [], [os.path.abspath(root)]
+        while stack:
+            d = stack.pop()
+            try:
+                mt = os.stat(d).st_mtime_ns
+            except OSError:
+                continue
+            row = self.db.execute("SELECT mtime_ns, subdirs, matches FROM dirs WHERE path=?", (d,)).fetchone()
+            if row and row[0] == mt:
+                subdirs, matches = json.loads(row[1]), json.loads(row[2])
+            else:
+                subdirs, matches = [], []
+                try:
+                    with os.scandir(d) as it:
+                        for e in it:
+                            if e.is_dir(follow_symlinks=False): subdirs.append(e.name)
+                            elif fnmatch.fnmatch(e.name, pattern): matches.append(e.name)
+                except OSError:
+                    continue
+                self.db.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?)",
+                                (d, mt, json.dumps(subdirs), json.dumps(matches)))
+            out += [os.path.join(d, m) for m in matches]
+            stack += [os.path.join(d, s) for s in subdirs]
+        return out
+
+    def _forget(self, path: str):
+        """Take every catalogued run of `path` back out of the model and the catalog."""
+        for row in self.db.execute("SELECT cpu_avg, mem_avg, duty_mean FROM runs WHERE path=?", (path,)).fetchall():
+            self.model.update([1.0, *row[:-1]], row[-1], weight=-1.0)
+        self.db.execute("DELETE FROM runs WHERE path=?", (path,))
+
+    def scan(self, root: str, pattern: str = PATTERN) -> list:
+        """
+        Bring the catalog and the model in line with the result files under
+        root: ingest new files, replace rewritten ones, drop deleted ones.
+        Returns the newly ingested runs.
+        """
+        root = os.path.abspath(root)
+        self.db.execute("BEGIN IMMEDIATE")
         try:
-            with open(f, "r") as fh:
-                j = json.load(fh)
-            data.append({
-                "file": os.path.basename(f),
-                "timestamp": j.get("timestamp"),
-                "cpu_avg": j.get("cpu_avg", 0),
-                "mem_avg": j.get("mem_avg", 0),
-                "duty_mean": j.get("duty_mean", 0)
-            })
-        except Exception as e:
-            print(f"[warn] skipping {f}: {e}")
-    return pd.DataFrame(data)
-
-def learn_curve(df):
-    if len(df) < 2:
-        return None, None
-    X = df[["cpu_avg","mem_avg"]].values
-    y = df["duty_mean"].values
-    model = LinearRegression().fit(X, y)
-    return model, model.score(X, y)
+            fresh, seen = [], set()
+            for p in self._candidates(root, pattern):
+                try:
+                    mt = os.stat(p).st_mtime_ns
+                except OSError:
+                    continue
+                seen.add(p)
+                row = self.db.execute("SELECT mtime_ns FROM files WHERE path=?", (p,)).fetchone()
+                if not row or row[0] != mt:
+                    fresh.append((mt, p))
+            prefix = os.path.join(root, "")
+            under = [p for (p,) in self.db.execute("SELECT path FROM files WHERE substr(path, 1, ?) = ?",
+                                                   (len(prefix), prefix))]
+            for p in under:
+                if p not in seen and fnmatch.fnmatch(os.path.basename(p), pattern):
+                    self._forget(p)
+                    self.db.execute("DELETE FROM files WHERE path=?", (p,))
+            new = []
+            for mt, p in sorted(fresh):
+                self._forget(p)   # a rewritten file replaces its earlier run
+                try:
+                    with open(p, encoding="utf-8-sig") as fh:
+                        j = json.load(fh)
+                    rec = {"path": p, "mtime_ns": mt, "file": os.path.basename(p), "timestamp": j.get("timestamp"),
+                           "cpu_avg": float(j.get("cpu_avg", 0)), "mem_avg": float(j.get("mem_avg", 0)),
+                           "duty_mean": float(j.get("duty_mean", 0))}
+                except Exception as e:
+                    print(f"[warn] skipping {p}: {e}")
+                    self.db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, 0)", (p, mt))
+                    continue
+                cur = self.db.execute("INSERT OR IGNORE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                      (p, mt, rec["file"], rec["timestamp"], rec["cpu_avg"], rec["mem_avg"],
+                                       rec["duty_mean"], time.time()))
+                self.db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, 1)", (p, mt))
+                if cur.rowcount:
+                    self.model.update([1.0] + [rec[k] for k in FEATURES], rec["duty_mean"])
+                    new.append(rec)
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('model', ?)", (json.dumps(self.model.to_dict()),))
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            self.model = self._stored_model()
+            raise
+        return new
 
-if __name__ == "__main__":
-    root = os.path.join(os.getcwd(), "benchmarks")
-    outdir = os.environ.get("TGO_OUTDIR", ".")
-    df = load_all_phase_data(root)
-    if df.empty:
-        print("[TGO Learning] No predictive data found.")
-        exit()
+    def _stored_model(self) -> RLSModel:
+        row = self.db.execute("SELECT value FROM meta WHERE key='model'").fetchone()
+        return RLSModel.from_dict(json.loads(row[0])) if row else RLSModel()
+
+    def runs(self) -> list:
+        cols = ["file", "timestamp", "cpu_avg", "mem_avg", "duty_mean"]
+        rows = self.db.execute(f"SELECT {', '.join(cols)} FROM runs ORDER BY mtime_ns")
+        return [dict(zip(cols, r)) for r in rows]
+
+    def last_duty(self) -> float | None:
+        row = self.db.execute("SELECT duty_mean FROM runs ORDER BY mtime_ns DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def summary(self) -> dict:
+        """Current model in the tgo_phase5_learning layout (without the per-run data)."""
+        m = self.model
+        fitted = m.n >= 2
+        return {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "samples": m.n,
+            "r2": m.r2 if fitted else "n/a",
+            "coefficients": dict(zip(FEATURES, m.theta[1:])) if fitted else {},
+            "baseline": m.theta[0] if fitted else 0.0,
+            "last_duty": self.last_duty(),
+            "catalog": self.path,
+        }
 
-    model, r2 = learn_curve(df)
-    coeffs = dict(zip(["cpu_avg","mem_avg"], model.coef_)) if model else {}
-    baseline = float(model.intercept_) if model else 0.0
+    def publish(self, path: str | None = None) -> str:
+        """Write the current model to the fixed model path (atomic replace)."""
+        path = path or MODEL_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f: json.dump(self.summary(), f, indent=4)
+        os.replace(tmp, path)
+        return path
 
-    result = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "samples": len(df),
-        "r2": r2 if r2 is not None else "n/a",
-        "coefficients": coeffs,
-        "baseline": baseline,
-        "data": df.to_dict(orient="records")
-    }
+    def close(self):
+        self.db.close()
 
+def load_all_phase_data(root="benchmarks", catalog=None):
+    """Catalogued predictive runs (ingesting anything new under root first)."""
+    catalog = catalog or RunCatalog()
+    catalog.scan(root)
+    return catalog.runs()
+
+def main(root=None):
+    root = root or os.path.join(os.getcwd(), "benchmarks")
+    outdir = os.environ.get("TGO_OUTDIR", ".")
+    catalog = RunCatalog()
+    new = catalog.scan(root)
+    print(f"[TGO Learning] {len(new)} new run(s) ingested, {catalog.model.n} total")
+    if catalog.model.n == 0:
+        print("[TGO Learning] No predictive data found.")
+        return
+    model_path = catalog.publish()
+    print(f"[TGO Learning] Model published: {model_path}")
+
+    result = {**catalog.summary(), "data": catalog.runs()}
     os.makedirs(outdir, exist_ok=True)
     outfile = os.path.join(outdir, "tgo_phase5_learning.json")
     with open(outfile, "w") as f: json.dump(result, f, indent=4)
     print(f"[TGO Learning] Model saved: {outfile}")
 
-    plt.figure(figsize=(8,6))
-    plt.scatter(df["cpu_avg"], df["duty_mean"], c='b', label="CPU vs Duty")
-    plt.scatter(df["mem_avg"], df["duty_mean"], c='g', label="MEM vs Duty")
-    if model:
-        grid = np.linspace(df["cpu_avg"].min(), df["cpu_avg"].max(), 50)
-        pred = model.predict(np.column_stack([grid, np.full_like(grid, df["mem_avg"].mean())]))
-        plt.plot(grid, pred, color='r', linewidth=2, label="Regression Fit")
-    plt.title(f"Trinity Learning Curve (R²={r2 if r2 is not None else 0:.3f})")
-    plt.xlabel("Avg CPU %")
-    plt.ylabel("Mean Duty")
-    plt.legend(); plt.grid(True, linestyle="--", alpha=0.4)
-    img_path = os.path.join(outdir, "tgo_phase5_learning_plot.png")
-    plt.tight_layout(); plt.savefig(img_path)
-    print(f"[TGO Learning] Plot saved: {img_path}")
+    request_plots(outfile)
+
+if __name__ == "__main__":
+    import sys
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
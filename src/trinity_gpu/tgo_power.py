@@ -1,59 +1,70 @@
-﻿import json, time, psutil, numpy as np, matplotlib.pyplot as plt, os
+﻿import json, numpy as np, os
 from datetime import datetime
+from trinity_gpu.controller_runtime import Controller, ControllerRuntime
+from trinity_gpu.streamstats import RollingWindow, Series
+from trinity_gpu.plot_request import request_plots
 
-def run_power_distribution(duration=120, alpha=0.25, window=10):
-    print(f"[TGO Power] running {duration}s, alpha={alpha}, window={window}")
-    cpu_trace, gpu_trace, duty_trace, pwr_trace = [], [], [], []
-    duty = 0.7
-    start = time.time()
+def fake_gpu_power(duty):
+    # Simulated GPU watt usage (for integrated GPU)
+    base = 6.5 + (duty * 4.0)
+    jitter = np.random.uniform(-0.3, 0.3)
+    return base + jitter
 
-    def fake_gpu_power(duty):
-        # Simulated GPU watt usage (for integrated GPU)
-        base = 6.5 + (duty * 4.0)
-        jitter = np.random.uniform(-0.3, 0.3)
-        return base + jitter
+class PowerController(Controller):
+    """Range control weighted by CPU stability, tracking simulated GPU + CPU power."""
+    name = "power"
+    def __init__(self, alpha=0.25, window=10, duty=0.7, keep_trace=False):
+        self.duty, self.alpha = duty, alpha
+        self.window = RollingWindow(window)
+        self.cpu, self.gpu, self.duties, self.pwr = (Series(keep_trace), Series(keep_trace),
+                                                     Series(keep_trace), Series(keep_trace))
 
-    while time.time() - start < duration:
-        cpu = psutil.cpu_percent(interval=0.5)
-        mem = psutil.virtual_memory().percent
-        gpu_power = fake_gpu_power(duty)
+    def step(self, sample):
+        cpu = sample["cpu"]
+        gpu_power = fake_gpu_power(self.duty)
         total_power = gpu_power + (cpu / 10)
-        cpu_trace.append(cpu)
-        gpu_trace.append(gpu_power)
-        pwr_trace.append(total_power)
+        self.cpu.add(cpu)
+        self.gpu.add(gpu_power)
+        self.pwr.add(total_power)
+        self.window.push(cpu)
 
-        if len(cpu_trace) >= window:
-            avg_cpu = np.mean(cpu_trace[-window:])
-            var_cpu = np.var(cpu_trace[-window:])
-            avg_pwr = np.mean(pwr_trace[-window:])
+        if self.window.full:
+            avg_cpu = self.window.mean
+            var_cpu = self.window.var
 
             # adaptive feedback: combine efficiency + variance
             stability = max(0.1, 1 - var_cpu / 20)
             target = np.clip(0.6 + (0.1 * (avg_cpu - 5) / 5), 0.4, 0.9)
             if avg_cpu > 6:
-                duty -= alpha * (avg_cpu - 5) / 10
+                self.duty -= self.alpha * (avg_cpu - 5) / 10
             elif avg_cpu < 4:
-                duty += alpha * (5 - avg_cpu) / 10
-            duty += (target - duty) * 0.05 * stability
-            duty = np.clip(duty, 0.3, 0.9)
+                self.duty += self.alpha * (5 - avg_cpu) / 10
+            self.duty += (target - self.duty) * 0.05 * stability
+            self.duty = float(np.clip(self.duty, 0.3, 0.9))
 
-        duty_trace.append(duty)
+        self.duties.add(self.duty)
+        return self.duty
 
-    result = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "samples": len(cpu_trace),
-        "cpu_avg": np.mean(cpu_trace),
-        "gpu_power_avg": np.mean(gpu_trace),
-        "total_power_avg": np.mean(pwr_trace),
-        "cpu_var": float(np.var(cpu_trace)),
-        "duty_mean": np.mean(duty_trace),
-        "trace": {
-            "cpu": cpu_trace,
-            "gpu_power": gpu_trace,
-            "duty": duty_trace,
-            "total_power": pwr_trace
+    def result(self):
+        out = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "samples": self.cpu.stats.n,
+            "cpu_avg": self.cpu.mean,
+            "gpu_power_avg": self.gpu.mean,
+            "total_power_avg": self.pwr.mean,
+            "cpu_var": self.cpu.stats.var,
+            "duty_mean": self.duties.mean
         }
-    }
+        if self.cpu.trace is not None:
+            out["trace"] = {"cpu": self.cpu.trace, "gpu_power": self.gpu.trace,
+                            "duty": self.duties.trace, "total_power": self.pwr.trace}
+        return out
+
+def run_power_distribution(duration=120, alpha=0.25, window=10, clock=None, source=None):
+    print(f"[TGO Power] running {duration}s, alpha={alpha}, window={window}")
+    ctrl = PowerController(alpha, window, keep_trace=True)
+    ControllerRuntime([ctrl], clock=clock, source=source).run(duration)
+    result = ctrl.result()
 
     outdir = os.environ.get("TGO_OUTDIR", ".")
     outfile = os.path.join(outdir, "tgo_phase10_power.json")
@@ -61,20 +72,8 @@ def run_power_distribution(duration=120, alpha=0.25, window=10):
         json.dump(result, f, indent=4)
     print(f"[TGO Power] Results saved: {outfile}")
 
-    # Visualization
-    t = range(len(cpu_trace))
-    plt.figure(figsize=(10,5))
-    plt.plot(t, cpu_trace, label="CPU %", alpha=0.7)
-    plt.plot(t, [p*10 for p in gpu_trace], label="GPU Power x10 (sim)", alpha=0.6)
-    plt.plot(t, [d*100 for d in duty_trace], "--", label="Duty % (scaled)")
-    plt.xlabel("Sample")
-    plt.ylabel("CPU / Power / Duty")
-    plt.title("Trinity Adaptive Power Distribution — Phase 10")
-    plt.legend(); plt.grid(True, linestyle="--", alpha=0.4)
-    plt.tight_layout()
-    img_path = os.path.join(outdir, "tgo_phase10_plot.png")
-    plt.savefig(img_path)
-    print(f"[TGO Power] Plot saved: {img_path}")
+    request_plots(outfile)
+    return result
 
 if __name__ == "__main__":
     run_power_distribution()
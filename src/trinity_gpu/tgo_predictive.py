@@ -1,33 +1,47 @@
-﻿import json, time, psutil, numpy as np, matplotlib.pyplot as plt, os
+﻿import json, os
 from datetime import datetime
+from trinity_gpu.controller_runtime import Controller, ControllerRuntime
+from trinity_gpu.streamstats import RollingWindow, Series
+from trinity_gpu.plot_request import request_plots
 
-def run_predictive_feedback(duration=90, duty_init=0.7, alpha=0.3):
-    print(f"[TGO Predictive] running {duration}s, initial duty={duty_init}, alpha={alpha}")
-    cpu_trace, mem_trace, duty_trace = [], [], []
-    duty = duty_init
-    start = time.time()
-    while time.time() - start < duration:
-        cpu = psutil.cpu_percent(interval=0.5)
-        mem = psutil.virtual_memory().percent
-        cpu_trace.append(cpu)
-        mem_trace.append(mem)
-        duty_trace.append(duty)
-        if len(cpu_trace) > 5:
-            trend = np.polyfit(range(len(cpu_trace[-5:])), cpu_trace[-5:], 1)[0]
+class PredictiveController(Controller):
+    """Trend feedback: a rising CPU slope over the last 5 samples lowers duty, a falling one raises it."""
+    name = "predictive"
+    def __init__(self, duty_init=0.7, alpha=0.3, keep_trace=False):
+        self.duty, self.alpha = duty_init, alpha
+        self.cpu, self.mem, self.duties = Series(keep_trace), Series(keep_trace), Series(keep_trace)
+        self.window = RollingWindow(5)
+
+    def step(self, sample):
+        self.cpu.add(sample["cpu"])
+        self.mem.add(sample["mem"])
+        self.duties.add(self.duty)
+        self.window.push(sample["cpu"])
+        if self.cpu.stats.n > 5:
+            trend = self.window.slope
             if trend > 0.3:
-                duty = max(0.3, duty - alpha * 0.1)
+                self.duty = max(0.3, self.duty - self.alpha * 0.1)
             elif trend < -0.3:
-                duty = min(0.9, duty + alpha * 0.1)
-    return {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "samples": len(cpu_trace),
-        "cpu_avg": np.mean(cpu_trace),
-        "mem_avg": np.mean(mem_trace),
-        "duty_mean": np.mean(duty_trace),
-        "duty_trace": duty_trace,
-        "cpu_trace": cpu_trace,
-        "mem_trace": mem_trace
-    }
+                self.duty = min(0.9, self.duty + self.alpha * 0.1)
+        return self.duty
+
+    def result(self):
+        out = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "samples": self.cpu.stats.n,
+            "cpu_avg": self.cpu.mean,
+            "mem_avg": self.mem.mean,
+            "duty_mean": self.duties.mean
+        }
+        if self.cpu.trace is not None:
+            out.update(duty_trace=self.duties.trace, cpu_trace=self.cpu.trace, mem_trace=self.mem.trace)
+        return out
+
+def run_predictive_feedback(duration=90, duty_init=0.7, alpha=0.3, clock=None, source=None):
+    print(f"[TGO Predictive] running {duration}s, initial duty={duty_init}, alpha={alpha}")
+    ctrl = PredictiveController(duty_init, alpha, keep_trace=True)
+    ControllerRuntime([ctrl], clock=clock, source=source).run(duration)
+    return ctrl.result()
 
 if __name__ == "__main__":
     data = run_predictive_feedback()
@@ -37,18 +51,4 @@ if __name__ == "__main__":
         json.dump(data, f, indent=4)
     print(f"[TGO Predictive] Saved JSON: {outfile}")
 
-    # Visualization
-    t = range(len(data["cpu_trace"]))
-    plt.figure(figsize=(10,5))
-    plt.plot(t, data["cpu_trace"], label="CPU %", alpha=0.7)
-    plt.plot(t, data["mem_trace"], label="MEM %", alpha=0.5)
-    plt.plot(t, [d*100 for d in data["duty_trace"]], label="Duty % (scaled)", linestyle="--")
-    plt.xlabel("Sample")
-    plt.ylabel("Percent / Scaled Duty")
-    plt.title("Trinity Adaptive Feedback — Phase 4 Predictive Visualization")
-    plt.legend()
-    plt.grid(True, linestyle="--", alpha=0.4)
-    plt.tight_layout()
-    img_path = os.path.join(outdir, "tgo_phase4_plot.png")
-    plt.savefig(img_path)
-    print(f"[TGO Predictive] Plot saved: {img_path}")
+    request_plots(outfile)
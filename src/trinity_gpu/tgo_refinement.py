@@ -1,47 +1,56 @@
-﻿import json, time, psutil, numpy as np, matplotlib.pyplot as plt, os
+﻿import json, numpy as np, os
 from datetime import datetime
+from trinity_gpu.controller_runtime import Controller, ControllerRuntime
+from trinity_gpu.streamstats import RollingWindow, Series
+from trinity_gpu.plot_request import request_plots
 
-def run_adaptive_refinement(duration=120, duty_init=0.7, alpha=0.2, window=10):
-    print(f"[TGO Adaptive Range] running {duration}s, duty_init={duty_init}, alpha={alpha}, window={window}")
-    cpu_trace, mem_trace, duty_trace = [], [], []
-    duty = duty_init
-    start = time.time()
-    while time.time() - start < duration:
-        cpu = psutil.cpu_percent(interval=0.5)
-        mem = psutil.virtual_memory().percent
-        cpu_trace.append(cpu)
-        mem_trace.append(mem)
+class RefinementController(Controller):
+    """Rolling-window range control: steer duty toward an adaptive midpoint set by recent CPU load."""
+    name = "refinement"
+    def __init__(self, duty_init=0.7, alpha=0.2, window=10, keep_trace=False):
+        self.duty, self.alpha = duty_init, alpha
+        self.window = RollingWindow(window)
+        self.cpu, self.mem, self.duties = Series(keep_trace), Series(keep_trace), Series(keep_trace)
+
+    def step(self, sample):
+        self.cpu.add(sample["cpu"])
+        self.mem.add(sample["mem"])
+        self.window.push(sample["cpu"])
 
         # rolling variance feedback
-        if len(cpu_trace) >= window:
-            recent = cpu_trace[-window:]
-            var = np.var(recent)
-            avg = np.mean(recent)
+        if self.window.full:
+            avg = self.window.mean
             # adaptive midpoint
             target = np.clip(0.6 + (0.1 * (avg - 5) / 5), 0.4, 0.8)
             if avg > 6:
-                duty -= alpha * (avg - 5) / 10
+                self.duty -= self.alpha * (avg - 5) / 10
             elif avg < 4:
-                duty += alpha * (5 - avg) / 10
+                self.duty += self.alpha * (5 - avg) / 10
             # gentle recentering toward target
-            duty += (target - duty) * 0.05
-            duty = np.clip(duty, 0.4, 0.9)
+            self.duty += (target - self.duty) * 0.05
+            self.duty = float(np.clip(self.duty, 0.4, 0.9))
 
-        duty_trace.append(duty)
+        self.duties.add(self.duty)
+        return self.duty
 
-    result = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "samples": len(cpu_trace),
-        "cpu_avg": np.mean(cpu_trace),
-        "mem_avg": np.mean(mem_trace),
-        "duty_mean": np.mean(duty_trace),
-        "cpu_var": float(np.var(cpu_trace)),
-        "trace": {
-            "cpu": cpu_trace,
-            "mem": mem_trace,
-            "duty": duty_trace
+    def result(self):
+        out = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "samples": self.cpu.stats.n,
+            "cpu_avg": self.cpu.mean,
+            "mem_avg": self.mem.mean,
+            "duty_mean": self.duties.mean,
+            "cpu_var": self.cpu.stats.var
         }
-    }
+        if self.cpu.trace is not None:
+            out["trace"] = {"cpu": self.cpu.trace, "mem": self.mem.trace, "duty": self.duties.trace}
+        return out
+
+def run_adaptive_refinement(duration=120, duty_init=0.7, alpha=0.2, window=10, clock=None, source=None):
+    print(f"[TGO Adaptive Range] running {duration}s, duty_init={duty_init}, alpha={alpha}, window={window}")
+    ctrl = RefinementController(duty_init, alpha, window, keep_trace=True)
+    ControllerRuntime([ctrl], clock=clock, source=source).run(duration)
+    result = ctrl.result()
 
     outdir = os.environ.get("TGO_OUTDIR", ".")
     outfile = os.path.join(outdir, "tgo_phase9_refinement.json")
@@ -49,20 +58,8 @@ def run_adaptive_refinement(duration=120, duty_init=0.7, alpha=0.2, window=10):
         json.dump(result, f, indent=4)
     print(f"[TGO Adaptive Range] Results saved: {outfile}")
 
-    # Visualization
-    t = range(len(cpu_trace))
-    plt.figure(figsize=(10,5))
-    plt.plot(t, cpu_trace, label="CPU %", alpha=0.7)
-    plt.plot(t, mem_trace, label="MEM %", alpha=0.6)
-    plt.plot(t, [d*100 for d in duty_trace], "--", label="Duty % (scaled)")
-    plt.xlabel("Sample")
-    plt.ylabel("Percent / Duty")
-    plt.title("Trinity Adaptive Range Refinement — Phase 9")
-    plt.legend(); plt.grid(True, linestyle="--", alpha=0.4)
-    plt.tight_layout()
-    img_path = os.path.join(outdir, "tgo_phase9_plot.png")
-    plt.savefig(img_path)
-    print(f"[TGO Adaptive Range] Plot saved: {img_path}")
+    request_plots(outfile)
+    return result
 
 if __name__ == "__main__":
     run_adaptive_refinement()
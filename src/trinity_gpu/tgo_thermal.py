@@ -1,45 +1,60 @@
-﻿import json, time, psutil, numpy as np, matplotlib.pyplot as plt, os
+﻿import json, numpy as np, os
 from datetime import datetime
+from trinity_gpu.controller_runtime import Controller, ControllerRuntime
+from trinity_gpu.streamstats import Series
+from trinity_gpu.plot_request import request_plots
 
-def run_thermal_governor(duration=150, alpha=0.3, heat_coeff=0.07, cool_coeff=0.05, temp_limit=80):
-    print(f"[TGO Thermal] running {duration}s  α={alpha}  heat_coeff={heat_coeff}  limit={temp_limit}°C")
-    cpu_trace, temp_trace, duty_trace = [], [], []
-    duty, temp = 0.7, 40.0  # starting duty & nominal core temp
-    start = time.time()
+class ThermalController(Controller):
+    """Thermal governor on a simulated core temperature: back off above temp_limit, creep up when cool."""
+    name = "thermal"
+    def __init__(self, alpha=0.3, heat_coeff=0.07, cool_coeff=0.05, temp_limit=80, keep_trace=False):
+        self.alpha, self.heat_coeff, self.cool_coeff, self.temp_limit = alpha, heat_coeff, cool_coeff, temp_limit
+        self.duty, self.temp = 0.7, 40.0  # starting duty & nominal core temp
+        self.cpu, self.temps, self.duties = Series(keep_trace), Series(keep_trace), Series(keep_trace)
 
-    def simulate_heat(cpu, duty, temp):
-        heat_in = (cpu * heat_coeff) + (duty * 10 * heat_coeff)
-        cool_out = (temp - 35) * cool_coeff
+    def simulate_heat(self, cpu, duty, temp):
+        heat_in = (cpu * self.heat_coeff) + (duty * 10 * self.heat_coeff)
+        cool_out = (temp - 35) * self.cool_coeff
         return temp + heat_in - cool_out
 
-    while time.time() - start < duration:
-        cpu = psutil.cpu_percent(interval=0.5)
-        temp = simulate_heat(cpu, duty, temp)
-        cpu_trace.append(cpu)
-        temp_trace.append(temp)
+    def step(self, sample):
+        cpu = sample["cpu"]
+        self.temp = temp = self.simulate_heat(cpu, self.duty, self.temp)
+        self.cpu.add(cpu)
+        self.temps.add(temp)
 
         # feedback: reduce duty if overheating, raise if cool
-        if temp > temp_limit:
-            duty -= alpha * (temp - temp_limit) / 50
-        elif temp < temp_limit - 10:
-            duty += alpha * 0.05
+        if temp > self.temp_limit:
+            self.duty -= self.alpha * (temp - self.temp_limit) / 50
+        elif temp < self.temp_limit - 10:
+            self.duty += self.alpha * 0.05
 
         # minor adaptive CPU correction
-        if cpu < 4: duty += 0.02
-        elif cpu > 8: duty -= 0.02
+        if cpu < 4: self.duty += 0.02
+        elif cpu > 8: self.duty -= 0.02
+
+        self.duty = float(np.clip(self.duty, 0.3, 0.9))
+        self.duties.add(self.duty)
+        return self.duty
 
-        duty = np.clip(duty, 0.3, 0.9)
-        duty_trace.append(duty)
+    def result(self):
+        out = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "samples": self.cpu.stats.n,
+            "cpu_avg": self.cpu.mean,
+            "temp_avg": self.temps.mean,
+            "temp_peak": self.temps.stats.max,
+            "duty_mean": self.duties.mean
+        }
+        if self.cpu.trace is not None:
+            out["trace"] = {"cpu": self.cpu.trace, "temp": self.temps.trace, "duty": self.duties.trace}
+        return out
 
-    result = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "samples": len(cpu_trace),
-        "cpu_avg": float(np.mean(cpu_trace)),
-        "temp_avg": float(np.mean(temp_trace)),
-        "temp_peak": float(np.max(temp_trace)),
-        "duty_mean": float(np.mean(duty_trace)),
-        "trace": {"cpu": cpu_trace, "temp": temp_trace, "duty": duty_trace}
-    }
+def run_thermal_governor(duration=150, alpha=0.3, heat_coeff=0.07, cool_coeff=0.05, temp_limit=80, clock=None, source=None):
+    print(f"[TGO Thermal] running {duration}s  α={alpha}  heat_coeff={heat_coeff}  limit={temp_limit}°C")
+    ctrl = ThermalController(alpha, heat_coeff, cool_coeff, temp_limit, keep_trace=True)
+    ControllerRuntime([ctrl], clock=clock, source=source).run(duration)
+    result = ctrl.result()
 
     outdir = os.environ.get("TGO_OUTDIR", ".")
     outfile = os.path.join(outdir, "tgo_phase11_thermal.json")
@@ -47,19 +62,8 @@ def run_thermal_governor(duration=150, alpha=0.3, heat_coeff=0.07, cool_coeff=0.
         json.dump(result, f, indent=4)
     print(f"[TGO Thermal] JSON saved: {outfile}")
 
-    # Plot visualization
-    t = range(len(cpu_trace))
-    plt.figure(figsize=(10,5))
-    plt.plot(t, cpu_trace, label="CPU %", alpha=0.7)
-    plt.plot(t, temp_trace, label="Simulated °C", alpha=0.6)
-    plt.plot(t, [d*100 for d in duty_trace], "--", label="Duty % (scaled)")
-    plt.xlabel("Sample"); plt.ylabel("Load / Temp / Duty")
-    plt.title("Trinity Thermal Governor — Phase 11")
-    plt.legend(); plt.grid(True, linestyle="--", alpha=0.4)
-    plt.tight_layout()
-    img_path = os.path.join(outdir, "tgo_phase11_plot.png")
-    plt.savefig(img_path)
-    print(f"[TGO Thermal] Plot saved: {img_path}")
+    request_plots(outfile)
+    return result
 
 if __name__ == "__main__":
     run_thermal_governor()
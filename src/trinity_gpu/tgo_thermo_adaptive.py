@@ -1,44 +1,63 @@
-﻿import json, time, psutil, numpy as np, matplotlib.pyplot as plt, os
+﻿import json, numpy as np, os
 from datetime import datetime
+from trinity_gpu.controller_runtime import Controller, ControllerRuntime
+from trinity_gpu.plot_request import request_plots
+from trinity_gpu.streamstats import Series
 
-def run_thermo_adaptive(duration=180, alpha=0.25, beta=0.15, heat_coeff=0.06, cool_coeff=0.04, temp_limit=80):
-    print(f"[TGO ThermoAdaptive] running {duration}s α={alpha} β={beta}")
-    cpu_trace, power_trace, temp_trace, duty_trace = [], [], [], []
-    duty, temp = 0.75, 40.0
-    start = time.time()
+class ThermoAdaptiveController(Controller):
+    """Heat + load feedback on a simulated temperature driven by CPU load and simulated GPU power."""
+    name = "thermo_adaptive"
+    def __init__(self, alpha=0.25, beta=0.15, heat_coeff=0.06, cool_coeff=0.04, temp_limit=80, keep_trace=False):
+        self.alpha, self.beta = alpha, beta
+        self.heat_coeff, self.cool_coeff, self.temp_limit = heat_coeff, cool_coeff, temp_limit
+        self.duty, self.temp = 0.75, 40.0
+        self.cpu, self.power, self.temps, self.duties = (Series(keep_trace), Series(keep_trace),
+                                                         Series(keep_trace), Series(keep_trace))
 
-    def simulate_heat(cpu, power, temp):
-        heat_in = (cpu + power*10) * heat_coeff
-        cool_out = (temp - 35) * cool_coeff
+    def simulate_heat(self, cpu, power, temp):
+        heat_in = (cpu + power*10) * self.heat_coeff
+        cool_out = (temp - 35) * self.cool_coeff
         return temp + heat_in - cool_out
 
-    while time.time() - start < duration:
-        cpu = psutil.cpu_percent(interval=0.5)
-        gpu_power = np.clip((duty * 10) + np.random.normal(0, 0.2), 0, 12)
-        temp = simulate_heat(cpu, gpu_power, temp)
+    def step(self, sample):
+        cpu = sample["cpu"]
+        gpu_power = float(np.clip((self.duty * 10) + np.random.normal(0, 0.2), 0, 12))
+        self.temp = temp = self.simulate_heat(cpu, gpu_power, self.temp)
 
         # adaptive feedback: combine heat + load feedback
-        if temp > temp_limit:
-            duty -= alpha * (temp - temp_limit) / 50
-        elif temp < temp_limit - 15:
-            duty += alpha * 0.05
-        duty -= beta * (cpu / 100.0 - 0.05)  # light dynamic correction
+        if temp > self.temp_limit:
+            self.duty -= self.alpha * (temp - self.temp_limit) / 50
+        elif temp < self.temp_limit - 15:
+            self.duty += self.alpha * 0.05
+        self.duty -= self.beta * (cpu / 100.0 - 0.05)  # light dynamic correction
+
+        self.duty = float(np.clip(self.duty, 0.3, 0.9))
+        self.cpu.add(cpu)
+        self.power.add(gpu_power)
+        self.temps.add(temp)
+        self.duties.add(self.duty)
+        return self.duty
 
-        duty = np.clip(duty, 0.3, 0.9)
-        cpu_trace.append(cpu)
-        power_trace.append(gpu_power)
-        temp_trace.append(temp)
-        duty_trace.append(duty)
+    def result(self):
+        out = {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "samples": self.cpu.stats.n,
+            "cpu_avg": self.cpu.mean,
+            "power_avg": self.power.mean,
+            "temp_avg": self.temps.mean,
+            "temp_peak": self.temps.stats.max,
+            "duty_mean": self.duties.mean
+        }
+        if self.cpu.trace is not None:
+            out["trace"] = {"cpu": self.cpu.trace, "power": self.power.trace,
+                            "temp": self.temps.trace, "duty": self.duties.trace}
+        return out
 
-    result = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "samples": len(cpu_trace),
-        "cpu_avg": float(np.mean(cpu_trace)),
-        "power_avg": float(np.mean(power_trace)),
-        "temp_avg": float(np.mean(temp_trace)),
-        "temp_peak": float(np.max(temp_trace)),
-        "duty_mean": float(np.mean(duty_trace))
-    }
+def run_thermo_adaptive(duration=180, alpha=0.25, beta=0.15, heat_coeff=0.06, cool_coeff=0.04, temp_limit=80, clock=None, source=None):
+    print(f"[TGO ThermoAdaptive] running {duration}s α={alpha} β={beta}")
+    ctrl = ThermoAdaptiveController(alpha, beta, heat_coeff, cool_coeff, temp_limit, keep_trace=True)
+    ControllerRuntime([ctrl], clock=clock, source=source).run(duration)
+    result = ctrl.result()
 
     outdir = os.environ.get("TGO_OUTDIR", ".")
     outfile = os.path.join(outdir, "tgo_phase12_thermo_adaptive.json")
@@ -46,19 +65,8 @@ def run_thermo_adaptive(duration=180, alpha=0.25, beta=0.15, heat_coeff=0.06, co
         json.dump(result, f, indent=4)
     print(f"[TGO ThermoAdaptive] JSON saved: {outfile}")
 
-    t = range(len(cpu_trace))
-    plt.figure(figsize=(10,5))
-    plt.plot(t, cpu_trace, label="CPU %", alpha=0.7)
-    plt.plot(t, power_trace, label="GPU Power (sim)", alpha=0.6)
-    plt.plot(t, temp_trace, label="Temp °C", alpha=0.5)
-    plt.plot(t, [d*100 for d in duty_trace], "--", label="Duty % (scaled)")
-    plt.xlabel("Sample"); plt.ylabel("Load / Power / Temp / Duty")
-    plt.title("Trinity Thermo-Adaptive Power Distribution — Phase 12")
-    plt.legend(); plt.grid(True, linestyle="--", alpha=0.4)
-    plt.tight_layout()
-    img_path = os.path.join(outdir, "tgo_phase12_plot.png")
-    plt.savefig(img_path)
-    print(f"[TGO ThermoAdaptive] Plot saved: {img_path}")
+    request_plots(outfile)
+    return result
 
 if __name__ == "__main__":
     run_thermo_adaptive()
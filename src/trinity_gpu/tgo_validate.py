@@ -1,15 +1,18 @@
-﻿import json, time, psutil, numpy as np, os, matplotlib.pyplot as plt
+﻿import json, time, psutil, numpy as np, os
 from datetime import datetime
+from trinity_gpu.plot_request import request_plots
+from trinity_gpu.tgo_learning import MODEL_PATH
 
-def load_model(model_path):
+def load_model(model_path=MODEL_PATH):
+    """The model tgo_learning publishes (a fixed path), or None."""
     try:
         with open(model_path) as f: return json.load(f)
     except Exception: return None
 
 def adaptive_validate(model, duration=90):
     coeffs = model.get("coefficients", {}) if model else {}
-    baseline = model.get("baseline", 0.0)
-    duty = model.get("data", [{}])[-1].get("duty_mean", 0.6)
+    baseline = model.get("baseline", 0.0) if model else 0.0
+    duty = (model.get("last_duty") if model else None) or 0.6
     cpu_trace, mem_trace, duty_trace = [], [], []
 
     print(f"[TGO Validate] running {duration}s | start duty={duty:.2f} | baseline={baseline:.2f}")
@@ -37,12 +40,9 @@ def adaptive_validate(model, duration=90):
     }
 
 if __name__ == "__main__":
-    model_dir = r"C:\Users\user\Desktop\Trinity_STEM\benchmarks"
-    # pick most recent Phase-5 model
-    candidates = sorted(
-        [os.path.join(dp, f) for dp,_,fs in os.walk(model_dir) for f in fs if f.startswith("tgo_phase5_") and f.endswith("learning.json")],
-        key=os.path.getmtime, reverse=True)
-    model = load_model(candidates[0]) if candidates else None
+    model = load_model()
+    if model is None:
+        print(f"[TGO Validate] No model at {MODEL_PATH}; run tgo_learning first. Validating without one.")
 
     results = adaptive_validate(model)
     outdir = os.environ.get("TGO_OUTDIR", ".")
@@ -50,15 +50,4 @@ if __name__ == "__main__":
     with open(out_json, "w") as f: json.dump(results, f, indent=4)
     print(f"[TGO Validate] Saved JSON: {out_json}")
 
-    # plot
-    t = range(len(results["trace"]["cpu"]))
-    plt.figure(figsize=(10,5))
-    plt.plot(t, results["trace"]["cpu"], label="CPU %", alpha=0.7)
-    plt.plot(t, results["trace"]["mem"], label="MEM %", alpha=0.6)
-    plt.plot(t, [d*100 for d in results["trace"]["duty"]], label="Duty % (scaled)", linestyle="--")
-    plt.title("Trinity Adaptive Validation — Phase 8")
-    plt.xlabel("Sample"); plt.ylabel("Percent / Scaled Duty")
-    plt.grid(True, linestyle="--", alpha=0.5); plt.legend(); plt.tight_layout()
-    img_path = os.path.join(outdir, "tgo_phase8_plot.png")
-    plt.savefig(img_path)
-    print(f"[TGO Validate] Plot saved: {img_path}")
+    request_plots(out_json)
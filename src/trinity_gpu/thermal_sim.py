@@ -0,0 +1,198 @@
+import json, os, time
+import numpy as np
+from datetime import datetime
+
+# Vectorized thermal plant + duty controller. simulate() advances K parameter
+# combinations in lockstep over one CPU trace (one NumPy op per sample across
+# all K), reproducing ThermalController ("thermal") and
+# ThermoAdaptiveController ("thermo_adaptive") step for step; the tuned
+# controller (tgo_thermo_adaptive_tuned) is thermo_adaptive with heat_coeff
+# 0.025 / cool_coeff 0.08, so sweep those as the plant. Duty is capped at
+# max_duty (0.9, as in the scalar controllers, or the device's). Each combination
+# is scored on peak temperature, time above its limit, mean duty and the
+# objective J = mean(L) + λ·mean(P) + β·Var(L), with per-sample latency
+# L = base_ms / duty and power P = 6.5 + 4·duty W (the tgo_power model), so J is
+# comparable across trace lengths. heat/cool coefficients describe the device,
+# the rest are controller settings: sweep() keeps, for each plant, the Pareto
+# front over (time above the safety limit, peak temperature, -mean duty) and
+# turns its best member into a template. Thousands of combinations over a
+# 3-minute trace take well under a second.
+
+MODELS = ("thermal", "thermo_adaptive")
+
+# controller starting points, as in the scalar controllers
+_INIT = {"thermal": (0.7, 40.0), "thermo_adaptive": (0.75, 40.0)}
+
+# plant coefficients of the scalar controllers; sweep them explicitly for what-if runs
+PLANT_DEFAULTS = {"thermal": {"heat_coeff": 0.07, "cool_coeff": 0.05},
+                  "thermo_adaptive": {"heat_coeff": 0.06, "cool_coeff": 0.04}}
+
+DEFAULT_AXES = {
+    "alpha": np.linspace(0.05, 0.5, 19),
+    "beta": np.linspace(0.0, 0.3, 13),         # thermo_adaptive only
+    "temp_limit": np.linspace(65.0, 90.0, 11),  # controller setpoint
+}
+
+def grid(**axes) -> dict:
+    """Full cartesian product of the given axes as flat, equal-length arrays."""
+    names = list(axes)
+    mesh = np.meshgrid(*(np.asarray(axes[n], dtype=float) for n in names), indexing="ij")
+    return {n: m.ravel() for n, m in zip(names, mesh)}
+
+def simulate(cpu, params: dict, model: str = "thermal", dt_s: float = 0.5, seed: int = 0,
+             base_ms: float = 10.0, lam: float = 1.0, var_weight: float = 0.01, limit_c: float | None = None,
+             keep: int | None = None, max_duty: float = 0.9) -> dict:
+    """
+    Metrics per combination (arrays of length K). Time above is measured
+    against limit_c (default: each combination's own temp_limit); keep=i also
+    returns the traces of combination i.
+    """
+    if model not in MODELS:
+        raise ValueError(f"unknown model {model!r} (one of {', '.join(MODELS)})")
+    cpu = np.asarray(cpu, dtype=float)
+    k = len(next(iter(params.values())))
+    p = {n: np.broadcast_to(np.asarray(params.get(n, 0.0), dtype=float), (k,))
+         for n in ("alpha", "beta", "heat_coeff", "cool_coeff", "temp_limit")}
+    alpha, beta, hc, cc, limit = p["alpha"], p["beta"], p["heat_coeff"], p["cool_coeff"], p["temp_limit"]
+    duty0, temp0 = _INIT[model]
+    safe = limit if limit_c is None else limit_c
+    duty = np.full(k, min(duty0, max_duty)); temp = np.full(k, temp0)
+    peak = np.full(k, -np.inf); above = np.zeros(k)
+    duty_sum = np.zeros(k); l_sum = np.zeros(k); l_sq = np.zeros(k)
+    rng = np.random.default_rng(seed)
+    trace = {"cpu": [], "temp": [], "duty": []} if keep is not None else None
+
+    for c in cpu:
+        if model == "thermal":
+            temp = temp + (c * hc + duty * 10 * hc) - (temp - 35) * cc
+            duty = np.where(temp > limit, duty - alpha * (temp - limit) / 50,
+                            np.where(temp < limit - 10, duty + alpha * 0.05, duty))
+            if c < 4: duty = duty + 0.02
+            elif c > 8: duty = duty - 0.02
+        else:
+            power = np.clip(duty * 10 + rng.normal(0, 0.2, k), 0, 12)
+            temp = temp + (c + power * 10) * hc - (temp - 35) * cc
+            duty = np.where(temp > limit, duty - alpha * (temp - limit) / 50,
+                            np.where(temp < limit - 15, duty + alpha * 0.05, duty))
+            duty = duty - beta * (c / 100.0 - 0.05)
+        duty = np.clip(duty, 0.3, max_duty)
+        np.maximum(peak, temp, out=peak)
+        above += temp > safe
+        duty_sum += duty
+        lat = base_ms / duty
+        l_sum += lat; l_sq += lat * lat
+        if trace is not None:
+            trace["cpu"].append(float(c)); trace["temp"].append(float(temp[keep])); trace["duty"].append(float(duty[keep]))
+
+    n = max(len(cpu), 1)
+    duty_mean = duty_sum / n
+    l_mean = l_sum / n
+    out = {"temp_peak": peak, "time_above_s": above * dt_s, "duty_mean": duty_mean,
+           "J": l_mean + lam * (6.5 + 4.0 * duty_mean) + var_weight * np.maximum(l_sq / n - l_mean ** 2, 0.0)}
+    if trace is not None: out["trace"] = trace
+    return out
+
+def pareto_front(objectives, chunk: int = 512) -> np.ndarray:
+    """Indices of non-dominated rows of a (K, M) matrix to minimize."""
+    obj = np.asarray(objectives, dtype=float)
+    keep = np.ones(len(obj), dtype=bool)
+    for s in range(0, len(obj), chunk):
+        block = obj[s:s + chunk, None, :]
+        dominated = (np.all(obj[None, :, :] <= block, axis=2) & np.any(obj[None, :, :] < block, axis=2)).any(axis=1)
+        keep[s:s + chunk] &= ~dominated
+    return np.flatnonzero(keep)
+
+def sweep(cpu, model: str = "thermal", axes: dict | None = None, limit_c: float = 80.0, dt_s: float = 0.5,
+          seed: int = 0, lam: float = 1.0, var_weight: float = 0.01, base_ms: float = 10.0,
+          max_duty: float = 0.9) -> dict:
+    """
+    Simulate every combination of `axes` (missing axes take DEFAULT_AXES /
+    PLANT_DEFAULTS). Returns, per plant (heat_coeff, cool_coeff), the Pareto
+    front, best first, and its best member; "template" is set when one plant was swept.
+    """
+    axes = {**{n: [v] for n, v in PLANT_DEFAULTS[model].items()}, **DEFAULT_AXES, **(axes or {})}
+    if model == "thermal": axes["beta"] = [0.0]   # the thermal controller has no load term
+    params = grid(**axes)
+    t0 = time.perf_counter()
+    m = simulate(cpu, params, model, dt_s, seed, base_ms, lam, var_weight, limit_c, max_duty=max_duty)
+    elapsed = time.perf_counter() - t0
+    objectives = np.column_stack([m["time_above_s"], m["temp_peak"], -m["duty_mean"]])
+    plant = np.column_stack([params["heat_coeff"], params["cool_coeff"]])
+    plants = []
+    for hc, cc in np.unique(plant, axis=0):
+        idx = np.flatnonzero((plant[:, 0] == hc) & (plant[:, 1] == cc))
+        front = idx[pareto_front(objectives[idx])]
+        # least time above the limit first (ideally none), then lowest J; the first member is the best
+        front = front[np.lexsort((m["J"][front], m["time_above_s"][front]))]
+        rows = [{**{n: float(params[n][i]) for n in params},
+                 **{n: float(m[n][i]) for n in ("temp_peak", "time_above_s", "duty_mean", "J")}} for i in front]
+        best = rows[0]
+        plants.append({"heat_coeff": float(hc), "cool_coeff": float(cc), "front": rows, "best": best,
+                       "template": to_template(best, limit_c, max_duty)})
+    return {"timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "model": model,
+            "samples": int(len(cpu)), "dt_s": dt_s, "limit_c": limit_c, "max_duty": max_duty,
+            "combinations": int(len(m["J"])), "elapsed_s": elapsed,
+            "objective": {"lambda": lam, "beta": var_weight, "base_ms": base_ms},
+            "plants": plants, "template": plants[0]["template"] if len(plants) == 1 else None}
+
+def to_template(row: dict, limit_c: float, max_duty: float = 0.9) -> dict:
+    """tgo_templates-style entry for one sweep result, plus the controller settings; max_duty is the cap simulated."""
+    return {"heat_coeff": round(row["heat_coeff"], 4), "cool_coeff": round(row["cool_coeff"], 4),
+            "target_duty": round(row["duty_mean"], 3), "max_duty": max_duty, "safe_temp": float(limit_c),
+            "alpha": round(row["alpha"], 4), "beta": round(row["beta"], 4),
+            "temp_limit": round(row["temp_limit"], 1)}
+
+def _axis(spec: str):
+    # "0.1,0.2,0.3" or "lo:hi:n"
+    if ":" in spec:
+        lo, hi, n = spec.split(":")
+        return np.linspace(float(lo), float(hi), int(n))
+    return np.array([float(v) for v in spec.split(",")])
+
+if __name__ == "__main__":
+    import argparse
+    from trinity_gpu.clock import TraceSource
+    ap = argparse.ArgumentParser(description="Sweep thermal controller settings (and optionally plant coefficients) over a CPU trace.")
+    ap.add_argument("--model", choices=MODELS, default="thermo_adaptive")
+    ap.add_argument("--trace", help="recorded controller JSON or NDJSON samples (default: synthetic)")
+    ap.add_argument("--samples", type=int, default=360, help="synthetic trace length")
+    ap.add_argument("--dt", type=float, default=0.5, help="seconds per sample")
+    for name in ("heat_coeff", "cool_coeff", *DEFAULT_AXES):
+        ap.add_argument(f"--{name.replace('_', '-')}", help="values 'a,b,c' or 'lo:hi:n'")
+    ap.add_argument("--limit", type=float, help="safety limit °C for time-above (default: device safe_temp, else 80)")
+    ap.add_argument("--max-duty", type=float, help="duty cap (default: device max_duty, else 0.9)")
+    ap.add_argument("--lambda", dest="lam", type=float, default=1.0)
+    ap.add_argument("--var-weight", type=float, default=0.01, help="β in J")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--top", type=int, default=5, help="front members to print per plant")
+    ap.add_argument("--device", help="take the plant from this device's template and store the result back")
+    ap.add_argument("--out", help="result JSON (default $TGO_OUTDIR/tgo_thermal_sweep.json)")
+    args = ap.parse_args()
+
+    store = tpl = None
+    if args.device:
+        from trinity_gpu.template_store import TemplateStore
+        store = TemplateStore(); tpl = store.resolve(args.device)
+    src = TraceSource.from_file(args.trace) if args.trace else TraceSource.synthetic(n=args.samples, seed=args.seed)
+    axes = {}
+    for name in ("heat_coeff", "cool_coeff", *DEFAULT_AXES):
+        v = getattr(args, name)
+        if v: axes[name] = _axis(v)
+        elif tpl and name in ("heat_coeff", "cool_coeff") and name in tpl: axes[name] = [tpl[name]]
+    limit = args.limit or (tpl or {}).get("safe_temp", 80.0)
+    max_duty = args.max_duty or (tpl or {}).get("max_duty", 0.9)
+    res = sweep(src.cpu, args.model, axes, limit, args.dt, args.seed, args.lam, args.var_weight, max_duty=max_duty)
+    print(f"[TGO ThermalSim] {res['combinations']} combinations x {res['samples']} samples "
+          f"in {res['elapsed_s']:.2f}s; limit {limit:g}°C, max duty {max_duty:g}")
+    for pl in res["plants"]:
+        print(f"  plant heat={pl['heat_coeff']:.3f} cool={pl['cool_coeff']:.3f}: Pareto front {len(pl['front'])}")
+        for r in pl["front"][:args.top]:
+            print(f"    α={r['alpha']:.3f} β={r['beta']:.3f} setpoint={r['temp_limit']:.1f} | "
+                  f"peak={r['temp_peak']:.1f}°C above={r['time_above_s']:.1f}s duty={r['duty_mean']:.3f} J={r['J']:.3f}")
+        print(f"    template: {json.dumps(pl['template'])}")
+    out = args.out or os.path.join(os.environ.get("TGO_OUTDIR", "."), "tgo_thermal_sweep.json")
+    with open(out, "w") as f: json.dump(res, f, indent=4)
+    print(f"[TGO ThermalSim] Saved: {out}")
+    if store and res["template"]:
+        version = store.update(args.device, lambda t: {**t, **res["template"]}, source="thermal_sim")[1]
+        print(f"[TGO ThermalSim] Template store updated: {args.device} v{version}")
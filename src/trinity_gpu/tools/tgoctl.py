@@ -1,12 +1,34 @@
 ﻿import sys, os, json
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-import tgo_agent
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))  # repo root: teo_client
+from trinity_gpu import tgo_agent
+import teo_client
+
+def _daemon(cmd, **args):
+    try:
+        reply = teo_client.request(cmd, **args)
+    except teo_client.DaemonNotRunning:
+        print("[TGO] TEO daemon not running (start it with `teo run`).")
+        return None
+    if not reply.get("ok"):
+        print("[TGO] daemon:", reply.get("error"))
+        return None
+    return reply
 
 def run():
     cmd = sys.argv[1] if len(sys.argv) > 1 else "status"
 
-    if cmd == "status":
-        print("[TGO] Active GPU frameworks detected:", list(tgo_agent.GPU_BACKENDS.keys()))
+    if cmd == "status" and teo_client.is_running():
+        st = _daemon("status")
+        if st:
+            reg = st["regulation"]
+            print(f"[TGO] daemon pid {st['pid']} mode={st['mode']} period={reg['period_ms']:.1f}±{reg['jitter_ms']:.1f} ms "
+                  f"power={reg['power_w'] or 0:.1f} W controllers={st['controllers']}")
+
+    elif cmd == "status":
+        # cheap path: the discovery cache; probe only if it is missing, stale or --refresh is given
+        backends = tgo_agent.discover(refresh="--refresh" in sys.argv)
+        print("[TGO] Active GPU frameworks detected:", list(backends.keys()))
 
     elif cmd == "run":
         tgo_agent.run_observer(15)
@@ -28,8 +50,25 @@ def run():
             print("⚠ Efficiency module not found. Make sure tgo_efficiency.py exists.")
             print("Details:", e)
 
+    elif cmd == "mode":
+        r = _daemon("mode", mode=sys.argv[2] if len(sys.argv) > 2 else None)
+        if r: print(f"[TGO] mode={r['mode']} (available: {', '.join(r['modes'])})")
+
+    elif cmd in ("start", "stop"):
+        name = sys.argv[2] if len(sys.argv) > 2 else None
+        if cmd == "start" and not name:
+            print("Usage: python tgoctl.py start <controller> [--active]")
+        else:
+            r = _daemon(cmd, controller=name, active="--active" in sys.argv)
+            if r: print(json.dumps({k: v for k, v in r.items() if k != "ok"}, indent=4))
+
+    elif cmd == "metrics":
+        r = _daemon("metrics")
+        if r: print(json.dumps(r, indent=4, default=str))
+
     else:
-        print("Usage: python tgoctl.py [status|run|active <seconds>|efficiency <seconds> --duty <value>]")
+        print("Usage: python tgoctl.py [status [--refresh]|run|active <seconds>|efficiency <seconds> --duty <value>|"
+              "mode [name]|start <controller> [--active]|stop [controller]|metrics]")
 
 if __name__ == "__main__":
     run()
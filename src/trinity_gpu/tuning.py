@@ -0,0 +1,92 @@
+import os, queue, threading
+from trinity_gpu.clock import resolve
+
+# Concurrent multi-device tuning. One sampler thread takes a cpu/mem sample per
+# period and broadcasts it to every device currently being tuned; each device
+# has its own worker and tuner object (step(sample) per sample, finish() ->
+# result once its duration is covered, which is where the tuner writes its
+# template). A semaphore caps how many devices are tuned at once, so a full
+# cycle takes one tuning duration when max_concurrent >= devices and
+# ceil(devices / max_concurrent) durations otherwise.
+
+MAX_CONCURRENT = int(os.environ.get("TGO_TUNE_MAX_CONCURRENT", "0")) or None
+
+class TuningOrchestrator:
+    def __init__(self, devices, make_tuner, duration: float = 60.0, period_s: float = 0.5,
+                 max_concurrent: int | None = MAX_CONCURRENT, clock=None, source=None, probe=None):
+        self.devices = list(devices)
+        self.make_tuner = make_tuner          # device -> tuner with step(sample) and finish() -> dict
+        self.duration = duration
+        self.period_s = period_s
+        self.max_concurrent = max(1, min(max_concurrent or len(self.devices), len(self.devices) or 1))
+        self.clock, self.source = resolve(clock, source)
+        self.probe = probe                    # optional () -> dict merged into every sample
+        self.samples = 0
+        self.error = None                     # sampler failure, reported to every worker
+        self._subs = {}                       # worker index -> queue of samples (names may repeat)
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+
+    def sample(self) -> dict:
+        cpu = self.source.cpu_percent(self.period_s)
+        s = {"t": self.clock.time(), "cpu": cpu, "mem": self.source.mem_percent()}
+        if self.probe: s.update(self.probe())
+        return s
+
+    def _sampler(self, done: threading.Event):
+        while not done.is_set():
+            with self._lock:
+                subs = list(self._subs.values())
+            if not subs:
+                done.wait(0.01)   # devices between slots; nothing to feed
+                continue
+            try:
+                s = self.sample()
+            except Exception as e:
+                with self._lock:
+                    self.error = e
+                    for q in self._subs.values(): q.put(None)
+                return
+            self.samples += 1
+            for q in subs:
+                q.put(s)
+
+    def _worker(self, device, results, i):
+        with self._slots:
+            try:
+                tuner = self.make_tuner(device)
+                q = queue.Queue()
+                with self._lock:
+                    if self.error: raise RuntimeError(f"sampler failed: {self.error}")
+                    self._subs[i] = q
+                    t0 = self.clock.time()
+                try:
+                    while True:
+                        s = q.get()
+                        if s is None: raise RuntimeError(f"sampler failed: {self.error}")
+                        tuner.step(s)
+                        if s["t"] - t0 >= self.duration:
+                            break
+                finally:
+                    with self._lock:
+                        self._subs.pop(i, None)
+                results[i] = tuner.finish()
+            except Exception as e:
+                print(f"[TGO Tuning] {device}: tuning failed: {e}")
+                results[i] = {"device": device, "error": str(e)}
+
+    def run(self) -> list:
+        """Tune every device; results in device order."""
+        results = [None] * len(self.devices)
+        done = threading.Event()
+        sampler = threading.Thread(target=self._sampler, args=(done,), name="tgo-tune-sampler", daemon=True)
+        workers = [threading.Thread(target=self._worker, args=(d, results, i), name=f"tgo-tune-{i}")
+                   for i, d in enumerate(self.devices)]
+        sampler.start()
+        for w in workers: w.start()
+        try:
+            for w in workers: w.join()
+        finally:
+            done.set()
+            sampler.join()
+        return results
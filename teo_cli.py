@@ -1,11 +1,11 @@
 ﻿import click
 import json
 import os
-import time
 import platform
 import psutil
 from datetime import datetime
 from pathlib import Path
+import teo_client
 
 CONFIG_DIR = Path.home() / (".config/TEO" if os.name != "nt" else "AppData/Roaming/TEO")
 CONFIG_PATH = CONFIG_DIR / "configs" / "auto_profile.json"
@@ -46,30 +46,108 @@ def scan():
     click.echo("✅ Hardware profile generated successfully")
     log("Hardware profile generated successfully")
 
+def daemon_request(cmd, **args):
+    """One request to the TEO daemon; prints why and returns None when it is not running or refuses."""
+    try:
+        reply = teo_client.request(cmd, **args)
+    except teo_client.DaemonNotRunning:
+        click.echo("[STOPPED] TEO daemon not running. Start it with `teo run`.")
+        return None
+    if not reply.get("ok"):
+        click.echo(f"❌ {reply.get('error', 'request failed')}")
+        return None
+    return reply
+
 @main.command()
-def run():
+@click.option("--daemon", "-d", "detach", is_flag=True, help="run in the background (log: ~/.config/TEO/logs/teo_daemon.log)")
+@click.option("--mode", type=click.Choice(list(teo_client.MODES)), default="balanced", show_default=True)
+@click.option("--loops", is_flag=True, help="also run the Trinity_STEM loop supervisor")
+@click.option("--controller", multiple=True, help="duty controller to host (repeatable; the first is active)")
+@click.option("--summary", type=float, default=10.0, show_default=True, help="seconds between status lines (0: off)")
+def run(detach, mode, loops, controller, summary):
+    """Run the regulation loop (foreground; Ctrl+C or SIGTERM stops it)."""
     if not CONFIG_PATH.exists():
         click.echo("❌ No configuration found. Run `teo scan` first.")
         return
-    click.echo("🚀 Starting Trinity Energy Optimizer...")
-    log("Optimizer started")
-    for i in range(3):
-        time.sleep(1)
-        click.echo(f"[Δ + 1] Regulating load... pass {i+1}/3")
-        log(f"Loop iteration {i+1}")
-    click.echo("✅ System equilibrium achieved")
-    log("Equilibrium achieved")
+    if teo_client.is_running():
+        click.echo("✅ TEO daemon already running (`teo status`).")
+        return
+    if detach:
+        args = ["--mode", mode, "--summary", str(summary), "--profile", str(CONFIG_PATH)]
+        args += ["--loops"] * loops + [a for c in controller for a in ("--controller", c)]
+        pid = teo_client.spawn(args)
+        if pid is None:
+            click.echo(f"❌ Daemon failed to start; see {teo_client.DAEMON_LOG}")
+            log("Daemon failed to start")
+            return
+        click.echo(f"✅ TEO daemon running (pid {pid})")
+        log(f"Daemon started pid={pid} mode={mode}")
+        return
+    click.echo(f"🚀 Starting Trinity Energy Optimizer (mode {mode})...")
+    log(f"Optimizer started mode={mode}")
+    import teo_daemon   # the server stack; clients above only need teo_client
+    d = teo_daemon.run(json.loads(CONFIG_PATH.read_text()), mode, loops, controller, summary)
+    click.echo("✅ Optimizer stopped")
+    log(f"Optimizer stopped after {d.frames} frames")
 
 @main.command()
 def status():
     if not CONFIG_PATH.exists():
         click.echo("❌ No configuration profile found.")
         return
-    cpu_load = psutil.cpu_percent(interval=1)
-    temp_stability = max(90, 100 - abs(cpu_load - 50) / 0.5)
-    click.echo(f"[RUNNING] TEO active")
-    click.echo(f"CPU Load: {cpu_load:.1f}% | Thermal Stability: {temp_stability:.1f}% | Δ + 1: Balanced")
-    log(f"Status check: CPU={cpu_load:.1f}% Stability={temp_stability:.1f}%")
+    st = daemon_request("status")
+    if st is None:
+        return
+    reg = st["regulation"]
+    power = f"{reg['power_w']:.1f} W" if reg.get("power_w") is not None else "n/a"
+    cpu = f"{reg['cpu_percent']:.1f}%" if reg.get("cpu_percent") is not None else "n/a"
+    click.echo(f"[RUNNING] TEO active (pid {st['pid']}, mode {st['mode']}, up {st['uptime_s']:.0f}s)")
+    click.echo(f"CPU Load: {cpu} | Period: {reg['period_ms']:.1f} ms ± {reg['jitter_ms']:.1f} | "
+               f"Power: {power} | Bursts: {reg['bursts']}/{reg['frames']}")
+    if st["controllers"]:
+        click.echo("Controllers: " + ", ".join(f"{n} ({m})" for n, m in st["controllers"].items()))
+
+@main.command()
+@click.argument("name", required=False)
+def mode(name):
+    """Show or switch the regulation mode."""
+    r = daemon_request("mode", mode=name)
+    if r:
+        click.echo(f"Mode: {r['mode']} (available: {', '.join(r['modes'])})")
+        if name: log(f"Mode switched to {name}")
+
+@main.group()
+def controller():
+    """Start or stop duty controllers inside the daemon."""
+    pass
+
+@controller.command("start")
+@click.argument("name")
+@click.option("--active", is_flag=True, help="apply this controller's duty (default: shadow)")
+def controller_start(name, active):
+    r = daemon_request("start", controller=name, active=active)
+    if r: click.echo(f"▶ {r['controller']} started ({r['mode']})")
+
+@controller.command("stop")
+@click.argument("name", required=False)
+def controller_stop(name):
+    r = daemon_request("stop", controller=name)
+    if r:
+        for n, res in r["stopped"].items():
+            click.echo(f"■ {n} stopped after {res.get('samples', 0)} samples")
+
+@main.command()
+def metrics():
+    """Dump the daemon's live metrics as JSON."""
+    r = daemon_request("metrics")
+    if r: click.echo(json.dumps(r, indent=2, default=str))
+
+@main.command()
+def stop():
+    """Stop the TEO daemon."""
+    if daemon_request("shutdown"):
+        click.echo("■ TEO daemon stopping")
+        log("Daemon stop requested")
 
 @main.command("install-service")
 def install_service():
@@ -81,9 +159,9 @@ def install_service():
     else:
         click.echo("⚙️ Creating systemd service at /etc/systemd/system/teo.service")
         service_file = (
-            "[Unit]\\nDescription=Trinity Energy Optimizer\\n"
-            "[Service]\\nExecStart=/usr/local/bin/teo run\\nRestart=always\\n"
-            "[Install]\\nWantedBy=multi-user.target\\n"
+            "[Unit]\nDescription=Trinity Energy Optimizer\n"
+            "[Service]\nExecStart=/usr/local/bin/teo run --summary 60\nRestart=always\n"
+            "[Install]\nWantedBy=multi-user.target\n"
         )
         try:
             with open("/etc/systemd/system/teo.service", "w") as f:
@@ -0,0 +1,71 @@
+import json
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+
+# Client side of the TEO daemon protocol (see teo_daemon): the paths, the mode
+# names, and request/is_running/spawn. teo_cli and tgoctl import this instead
+# of teo_daemon, so a status call does not load the asyncio server stack.
+
+ROOT = Path(__file__).resolve().parent
+CONFIG_DIR = Path.home() / (".config/TEO" if os.name != "nt" else "AppData/Roaming/TEO")
+SOCKET_PATH = Path(os.environ.get("TEO_SOCKET", str(CONFIG_DIR / "teo.sock")))
+TCP_PORT = int(os.environ.get("TEO_PORT", "47311"))
+DAEMON_LOG = CONFIG_DIR / "logs" / "teo_daemon.log"
+PROFILE_PATH = CONFIG_DIR / "configs" / "auto_profile.json"   # written by `teo scan`
+USE_UNIX = hasattr(socket, "AF_UNIX") and os.name != "nt"
+
+# mode -> multipliers on the loaded config ("section.key": factor); "observe" samples and forecasts but never bursts
+MODES = {
+    "balanced": {},
+    "performance": {"thresholds.cpu_busy_percent": 0.8, "safety.min_cooldown_s": 0.5},
+    "powersave": {"thresholds.cpu_busy_percent": 1.25, "safety.min_cooldown_s": 2.0, "loop.tick_s": 2.0},
+    "observe": {},
+}
+
+class DaemonNotRunning(Exception):
+    pass
+
+def request(cmd: str, timeout: float = 2.0, socket_path: Path | None = None, **args) -> dict:
+    """Send one command to the daemon on socket_path (default SOCKET_PATH) and return its reply."""
+    try:
+        if USE_UNIX:
+            s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            s.settimeout(timeout)
+            s.connect(str(socket_path or SOCKET_PATH))
+        else:
+            s = socket.create_connection(("127.0.0.1", TCP_PORT), timeout=timeout)
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        raise DaemonNotRunning(f"TEO daemon is not running ({e.strerror or e})") from None
+    with s:
+        s.sendall((json.dumps({"cmd": cmd, **args}) + "\n").encode())
+        buf = b""
+        while not buf.endswith(b"\n"):
+            chunk = s.recv(65536)
+            if not chunk: break
+            buf += chunk
+    return json.loads(buf or b'{"ok": false, "error": "empty reply"}')
+
+def is_running(socket_path: Path | None = None) -> bool:
+    try:
+        return request("ping", timeout=0.5, socket_path=socket_path).get("ok", False)
+    except (DaemonNotRunning, OSError, ValueError):
+        return False
+
+def spawn(args=(), wait_s: float = 5.0) -> int | None:
+    """Start the daemon detached (output to DAEMON_LOG); returns its pid once it answers, else None."""
+    import subprocess
+    DAEMON_LOG.parent.mkdir(parents=True, exist_ok=True)
+    log = open(DAEMON_LOG, "a", encoding="utf-8")
+    kw = {"start_new_session": True} if os.name != "nt" else {"creationflags": 0x00000008}  # DETACHED_PROCESS
+    proc = subprocess.Popen([sys.executable, str(ROOT / "teo_daemon.py"), *args],
+                            stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT, **kw)
+    log.close()
+    deadline = time.time() + wait_s
+    while time.time() < deadline:
+        if is_running(): return proc.pid
+        if proc.poll() is not None: return None
+        time.sleep(0.05)
+    return None
@@ -0,0 +1,301 @@
+import asyncio
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from teo_client import (ROOT, CONFIG_DIR, SOCKET_PATH, TCP_PORT, DAEMON_LOG, PROFILE_PATH, USE_UNIX,
+                        MODES, DaemonNotRunning, request, is_running, spawn)
+
+# Long-lived TEO daemon. It hosts the substrate regulation stack
+# (HoloframeScheduler + ResonanceGovernor on a shared Telemetry), an optional
+# Trinity_STEM loop Supervisor and a trinity_gpu ControllerRuntime, keeping
+# their state warm between CLI invocations. Clients talk to it over a local
+# socket (a Unix socket; TCP on 127.0.0.1 where AF_UNIX is unavailable) with
+# one JSON request per line and one JSON reply per line:
+#   {"cmd": "status"} | {"cmd": "metrics"} | {"cmd": "mode", "mode": "powersave"}
+#   {"cmd": "start", "controller": "adaptive", "active": true} | {"cmd": "stop", "controller": "adaptive"}
+#   {"cmd": "shutdown"}
+# Replies are {"ok": true, ...} or {"ok": false, "error": "..."}; status is
+# served from live state, so a round trip takes milliseconds.
+# `teo run` runs it in the foreground (run() below: SIGTERM/SIGINT stop it
+# cleanly, a one-line summary every few seconds); `teo run --daemon` detaches
+# it with spawn(). A "substrate" section in the `teo scan` profile overrides
+# the matching keys of tgo_config.yaml for this machine.
+#
+# The stack comes from the installed tgo_core, trinity_gpu and loops packages
+# (setup.py maps them out of src/; use `pip install -e .` in a checkout) and is
+# imported lazily. Clients use teo_client, which this module re-exports.
+
+def apply_profile(cfg: dict, profile: dict) -> dict:
+    """cfg with the profile's {"substrate": {section: {key: value}}} overrides merged in."""
+    for sec, values in (profile.get("substrate") or {}).items():
+        cfg.setdefault(sec, {}).update(values)
+    return cfg
+
+def substrate_config() -> Path:
+    """Substrate config: $TEO_SUBSTRATE_CONFIG, the installed copy (share/teo), else the source checkout's."""
+    if os.environ.get("TEO_SUBSTRATE_CONFIG"):
+        return Path(os.environ["TEO_SUBSTRATE_CONFIG"])
+    for p in (Path(sys.prefix) / "share" / "teo" / "tgo_config.yaml",
+              ROOT / "src" / "TGO_Substrate" / "tgo_config.yaml"):
+        if p.exists(): return p
+    raise FileNotFoundError("tgo_config.yaml not found; set TEO_SUBSTRATE_CONFIG")
+
+# ─────────────────────────────────────────────
+# Daemon side
+# ─────────────────────────────────────────────
+def _quiet_supervisor(buffer_seconds: float):
+    """Trinity_STEM Supervisor that keeps its heartbeat as state instead of printing it."""
+    from loops.Trinity_STEM import Supervisor
+
+    class QuietSupervisor(Supervisor):
+        heartbeat = {}
+        async def _compose(self):
+            lat = [v["work_latency_ms"] for v in self.state_cache.values() if "work_latency_ms" in v]
+            self.heartbeat = {"loops": len(self.loops), "reporting": len(self.state_cache),
+                              "avg_work_ms": sum(lat) / len(lat) if lat else None,
+                              "uptime_s": time.time() - self.start_time}
+
+    return QuietSupervisor(buffer_seconds=buffer_seconds)
+
+class TEODaemon:
+    def __init__(self, cfg: dict | None = None, profile: dict | None = None, loops: bool = False,
+                 socket_path: Path = SOCKET_PATH, mode: str = "balanced"):
+        from tgo_core.config import load_config
+        from tgo_core.telemetry import Telemetry
+        from tgo_core.governor import ResonanceGovernor
+        from tgo_core.scheduler import HoloframeScheduler
+        from trinity_gpu.streamstats import RollingWindow, EWMA
+
+        self.profile = profile or {}
+        self.cfg = apply_profile(cfg or load_config(str(substrate_config())), self.profile)
+        self.base = json.loads(json.dumps(self.cfg))   # pristine copy the modes scale from
+        self.socket_path = socket_path
+        self.telemetry = Telemetry(self.cfg)
+        self.governor = ResonanceGovernor(self.cfg, self.telemetry)
+        self.scheduler = HoloframeScheduler(self.cfg, self.telemetry, self.governor)
+        self.supervisor = _quiet_supervisor(0.10) if loops else None
+        self.runtime = None; self._runtime_thread = None
+        self._runtime_lock = threading.Lock()
+        self.started = time.time()
+        self.mode = "balanced"
+        window = max(8, int(60 / self.cfg["loop"]["tick_s"]))
+        self.periods = RollingWindow(window)   # achieved tick period, ms
+        self.power = EWMA(0.1)
+        self.frames = self.bursts = self.errors = 0
+        self.last = {}
+        self._stopping = None
+        self.set_mode(mode)
+
+    # --- regulation -------------------------------------------------------
+    def set_mode(self, mode: str):
+        if mode not in MODES:
+            raise ValueError(f"unknown mode {mode!r} (one of {', '.join(MODES)})")
+        for key in {k for m in MODES.values() for k in m}:
+            sec, name = key.split(".")
+            self.cfg[sec][name] = self.base[sec][name] * MODES[mode].get(key, 1.0)
+        self.cfg["thresholds"]["cpu_busy_percent"] = min(self.cfg["thresholds"]["cpu_busy_percent"], 95)
+        self.mode = mode
+
+    async def _regulate(self):
+        last_ts = None
+        next_t = time.monotonic()
+        while not self._stopping.is_set():
+            try:
+                if self.mode == "observe":
+                    sys_ = self.telemetry.read_system()
+                    self.scheduler.forecaster.observe(sys_)
+                    self.last = {"ts": time.time(), "sys": sys_, "burst": False}
+                else:
+                    self.last = await self.scheduler.step()
+            except Exception as e:
+                # keep regulating; one bad sample must not take the daemon down
+                self.errors += 1
+                print(f"[TEO Daemon] regulation step failed: {e}", flush=True)
+                self.last = {"ts": time.time(), "sys": self.last.get("sys", {})}
+            self.frames += 1
+            self.bursts += bool(self.last.get("burst"))
+            ts = self.last.get("ts") or time.time()
+            if last_ts is not None: self.periods.push((ts - last_ts) * 1000.0)
+            last_ts = ts
+            watts = self.last["sys"].get("cpu_watts")
+            if watts is not None: self.power.update(watts)
+            # absolute schedule: a slow step does not push every later tick back
+            next_t += self.cfg["loop"]["tick_s"]
+            delay = next_t - time.monotonic()
+            if delay < 0: next_t, delay = time.monotonic(), 0
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    # --- controllers ------------------------------------------------------
+    def start_controller(self, name: str, active: bool = False, **params) -> dict:
+        from trinity_gpu.controller_runtime import ControllerRuntime, load_controller
+        with self._runtime_lock:
+            if self.runtime is None:
+                # one sampler thread for the daemon's lifetime; it idles while no controller is registered
+                self.runtime = ControllerRuntime(out_path=str(CONFIG_DIR / "logs" / "teo_controllers.ndjson"))
+                self._runtime_thread = threading.Thread(target=self.runtime.run, name="teo-controllers", daemon=True)
+                self._runtime_thread.start()
+            mode = "active" if active and not self.runtime.active else "shadow"
+            self.runtime.add(load_controller(name, **params), mode=mode, name=name)
+        return {"controller": name, "mode": mode}
+
+    def stop_controller(self, name: str | None = None) -> dict:
+        if self.runtime is None or (name and name not in self.runtime.controllers):
+            raise ValueError(f"controller {name!r} is not running" if name else "no controllers running")
+        names = [name] if name else list(self.runtime.controllers)
+        with self._runtime_lock:
+            results = {n: self.runtime.remove(n).result() for n in names}
+        return {"stopped": {n: {k: v for k, v in r.items() if k != "trace"} for n, r in results.items()}}
+
+    # --- introspection ----------------------------------------------------
+    def status(self) -> dict:
+        sys_ = self.last.get("sys", {})
+        return {
+            "pid": os.getpid(), "uptime_s": round(time.time() - self.started, 1), "mode": self.mode,
+            "profile": {k: self.profile[k] for k in ("cpu", "cores", "memory_gb") if k in self.profile},
+            "regulation": {
+                "frames": self.frames, "bursts": self.bursts, "errors": self.errors,
+                "tick_ms": self.cfg["loop"]["tick_s"] * 1000.0,
+                "period_ms": round(self.periods.mean, 3), "jitter_ms": round(self.periods.std, 3),
+                "cpu_percent": sys_.get("cpu_percent"), "power_w": self.power.value,
+                "power_source": sys_.get("power_source"), "cooldown_s": self.last.get("cooldown_s"),
+            },
+            "controllers": {n: self.runtime.modes.get(n) for n in list(self.runtime.controllers)} if self.runtime else {},
+            "loops": self.supervisor.heartbeat if self.supervisor else None,
+        }
+
+    def metrics(self) -> dict:
+        frame = self.last.get("frame")
+        return {
+            **self.status(),
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "config": self.cfg,
+            "last": {"sys": self.last.get("sys"), "granted": self.last.get("granted"),
+                     "predicted": getattr(frame, "predicted_load", None),
+                     "confidence": getattr(frame, "confidence", None)},
+            "periods_ms": self.periods.values(),
+            "controllers": self.runtime.summary() if self.runtime else None,
+            "loops": self.supervisor.state_cache if self.supervisor else None,
+        }
+
+    # --- control socket ---------------------------------------------------
+    def _dispatch(self, req: dict) -> dict:
+        cmd = req.get("cmd")
+        if cmd == "ping": return {"pid": os.getpid()}
+        if cmd == "status": return self.status()
+        if cmd == "metrics": return self.metrics()
+        if cmd == "mode":
+            if req.get("mode"): self.set_mode(req["mode"])
+            return {"mode": self.mode, "modes": list(MODES)}
+        if cmd == "start":
+            return self.start_controller(req["controller"], bool(req.get("active")), **req.get("params", {}))
+        if cmd == "stop": return self.stop_controller(req.get("controller"))
+        if cmd == "shutdown":
+            self._stopping.set()
+            return {"stopping": True}
+        raise ValueError(f"unknown command {cmd!r}")
+
+    async def _client(self, reader, writer):
+        try:
+            line = await reader.readline()
+            try:
+                reply = {"ok": True, **self._dispatch(json.loads(line))}
+            except Exception as e:
+                reply = {"ok": False, "error": str(e)}
+            writer.write((json.dumps(reply, default=str) + "\n").encode())
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _listen(self):
+        if USE_UNIX:
+            if self.socket_path.exists():
+                if is_running(self.socket_path):
+                    raise RuntimeError(f"a TEO daemon is already listening on {self.socket_path}")
+                self.socket_path.unlink()   # stale socket from a crashed daemon
+            self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+            server = await asyncio.start_unix_server(self._client, path=str(self.socket_path))
+            os.chmod(self.socket_path, 0o600)
+        else:
+            server = await asyncio.start_server(self._client, "127.0.0.1", TCP_PORT)
+        return server
+
+    def summary_line(self) -> str:
+        reg = self.status()["regulation"]
+        power = f"{reg['power_w']:.1f} W" if reg["power_w"] is not None else "n/a"
+        cpu = f"{reg['cpu_percent']:.0f}%" if reg["cpu_percent"] is not None else "n/a"
+        return (f"[TEO] {datetime.now():%H:%M:%S} mode={self.mode} period {reg['period_ms']:.1f} ms "
+                f"± {reg['jitter_ms']:.1f} (tick {reg['tick_ms']:.0f}) | power {power} | cpu {cpu} | "
+                f"bursts {reg['bursts']}/{reg['frames']}" + (f" | errors {reg['errors']}" if reg["errors"] else ""))
+
+    async def _report(self, every_s: float):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=every_s)
+            except asyncio.TimeoutError:
+                print(self.summary_line(), flush=True)
+
+    def _handle_signals(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                # Windows event loops: plain handler, handed back to the loop thread
+                signal.signal(sig, lambda *_: loop.call_soon_threadsafe(self.stop))
+
+    async def serve(self, summary_s: float | None = None, handle_signals: bool = False):
+        self._stopping = asyncio.Event()
+        if handle_signals: self._handle_signals()
+        server = await self._listen()
+        tasks = [asyncio.create_task(self._regulate())]
+        if self.supervisor:
+            tasks.append(asyncio.create_task(self.supervisor.run()))
+        if summary_s:
+            tasks.append(asyncio.create_task(self._report(summary_s)))
+        print(f"[TEO Daemon] pid {os.getpid()} mode={self.mode} listening on "
+              f"{self.socket_path if USE_UNIX else f'127.0.0.1:{TCP_PORT}'}", flush=True)
+        try:
+            await self._stopping.wait()
+        finally:
+            server.close()
+            for t in tasks: t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.runtime:
+                self.runtime.stop()
+                self._runtime_thread.join(timeout=2 * self.runtime.period_s + 1)
+            if USE_UNIX and self.socket_path.exists(): self.socket_path.unlink()
+            print(self.summary_line(), flush=True)
+            print("[TEO Daemon] stopped", flush=True)
+
+    def stop(self):
+        if self._stopping: self._stopping.set()
+
+def run(profile: dict | None = None, mode: str = "balanced", loops: bool = False, controllers=(),
+        summary_s: float | None = 10.0):
+    """Run the daemon in the foreground until SIGTERM/SIGINT or a shutdown request."""
+    d = TEODaemon(profile=profile, loops=loops, mode=mode)
+    for i, c in enumerate(controllers):
+        d.start_controller(c, active=(i == 0))
+    asyncio.run(d.serve(summary_s, handle_signals=True))
+    return d
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Run the TEO daemon in the foreground.")
+    ap.add_argument("--mode", choices=list(MODES), default="balanced")
+    ap.add_argument("--loops", action="store_true", help="also host the Trinity_STEM loop Supervisor")
+    ap.add_argument("--controller", action="append", default=[], help="start a duty controller (first one active)")
+    ap.add_argument("--profile", default=str(PROFILE_PATH), help="hardware profile from `teo scan`")
+    ap.add_argument("--summary", type=float, default=10.0, help="seconds between summary lines (0: off)")
+    args = ap.parse_args()
+    profile = json.loads(Path(args.profile).read_text(encoding="utf-8")) if Path(args.profile).exists() else {}
+    run(profile, args.mode, args.loops, args.controller, args.summary)